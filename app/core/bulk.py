@@ -0,0 +1,114 @@
+import json
+import zlib
+from decimal import Decimal
+from typing import AsyncIterable, AsyncIterator, Optional
+
+import orjson
+from fastapi import Request, status
+from pydantic import BaseModel, ValidationError
+
+from app.core.exceptions import ErrorCode
+from app.utils.constant import BULK_CREATE_MAX_ROWS
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+NDJSON_CHUNK_SIZE = 64 * 1024  # Bytes of encoded lines buffered before a chunk of a streamed response is sent
+
+Row = tuple[int, Optional[BaseModel], Optional[dict]]
+
+
+def is_ndjson(request: Request) -> bool:
+    return request.headers.get("content-type", "").split(";", 1)[0].strip().lower() in NDJSON_MEDIA_TYPES
+
+
+def is_gzip(request: Request) -> bool:
+    return request.headers.get("content-encoding", "").strip().lower() == "gzip"
+
+
+async def ndjson_lines(request: Request) -> AsyncIterator[bytes]:
+    """
+    Non-empty lines of a newline-delimited request body, read (and gunzipped with `Content-Encoding: gzip`)
+    as it streams in.
+    """
+    decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16) if is_gzip(request) else None
+    pending = b""
+    async for chunk in request.stream():
+        if decompressor is not None:
+            try:
+                chunk = decompressor.decompress(chunk)
+            except zlib.error:
+                raise ErrorCode.BadRequest("Request body is not valid gzip.")
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if pending.strip():
+        yield pending
+
+
+async def read_rows(request: Request, model: type[BaseModel]) -> AsyncIterator[Row]:
+    """
+    Rows of a bulk request validated one by one against `model`, as (index, payload, error) with either a payload
+    or the row's error result. The body is a JSON array, or an NDJSON stream (one object per line, see
+    NDJSON_MEDIA_TYPES) validated as it is received.
+    At most BULK_CREATE_MAX_ROWS rows are accepted: a longer array is rejected with 413, while a longer stream ends
+    with a 413 row result, since the rows before it may already have been written.
+    """
+    limit_error = f"At most {BULK_CREATE_MAX_ROWS} rows can be created per request."
+    if is_ndjson(request):
+        rows = ndjson_lines(request)
+    else:
+        try:
+            body = json.loads(await request.body())
+        except ValueError:
+            raise ErrorCode.BadRequest("Request body is not valid JSON.")
+        if not isinstance(body, list):
+            raise ErrorCode.BadRequest("Request body must be a JSON array or an NDJSON stream.")
+        if len(body) > BULK_CREATE_MAX_ROWS:
+            raise ErrorCode.PayloadTooLarge(limit_error)
+        rows = _aiter(body)
+
+    index = 0
+    async for row in rows:
+        if index >= BULK_CREATE_MAX_ROWS:
+            yield index, None, {"status": status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, "detail": limit_error}
+            return
+        try:
+            payload = model.model_validate_json(row) if isinstance(row, bytes) else model.model_validate(row)
+        except ValidationError as e:
+            errors = e.errors(include_url=False, include_context=False, include_input=False)
+            yield index, None, {"status": status.HTTP_422_UNPROCESSABLE_ENTITY, "detail": errors}
+        else:
+            yield index, payload, None
+        index += 1
+
+
+async def _aiter(items: list):
+    for item in items:
+        yield item
+
+
+def _encode_default(value):
+    if isinstance(value, Decimal):  # DynamoDB numbers
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, set):
+        return sorted(value)
+    raise TypeError
+
+
+async def ndjson_stream(items: AsyncIterable[dict], gzip: bool = False) -> AsyncIterator[bytes]:
+    """
+    Encode `items` as NDJSON (gzipped if asked) for a StreamingResponse, in chunks of about NDJSON_CHUNK_SIZE bytes
+    so memory stays constant however many items there are.
+    """
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16) if gzip else None
+    buffer = bytearray()
+    async for item in items:
+        buffer += orjson.dumps(item, default=_encode_default, option=orjson.OPT_APPEND_NEWLINE)
+        if len(buffer) >= NDJSON_CHUNK_SIZE:
+            yield compressor.compress(bytes(buffer)) if compressor else bytes(buffer)
+            buffer.clear()
+    if compressor:
+        yield compressor.compress(bytes(buffer)) + compressor.flush()
+    elif buffer:
+        yield bytes(buffer)
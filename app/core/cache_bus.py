@@ -0,0 +1,172 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Keys per message, keeping every datagram well below the default socket buffer size
+MAX_KEYS_PER_MESSAGE = 100
+
+
+def encode_message(origin: str, cache_keys: list[tuple]) -> bytes:
+    return json.dumps({"origin": origin, "keys": cache_keys}, separators=(",", ":")).encode()
+
+
+def decode_message(data: bytes) -> tuple[str, list[tuple]]:
+    message = json.loads(data)
+    return message["origin"], [tuple(key) for key in message["keys"]]
+
+
+class UnixSocketBus:
+    """
+    Invalidation bus between the worker processes of one host.
+
+    Every worker binds a Unix datagram socket in a shared `directory` and publishing sends the message to all
+    other sockets found there. Sockets left behind by dead workers are removed as soon as a send is refused.
+    Sends never block: if a peer's receive buffer is full the message is dropped for that peer, which then
+    serves the row until its cache entry expires.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.path = os.path.join(directory, f"{self.origin}.sock")
+        self.sock = None
+        self.callback = None
+
+    async def start(self, callback):
+        """
+        Bind this worker's socket and call `callback(cache_keys)` for every message other workers publish.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(self.path)
+        sock.setblocking(False)
+        self.sock = sock
+        self.callback = callback
+        asyncio.get_running_loop().add_reader(sock.fileno(), self._receive)
+
+    async def stop(self):
+        if self.sock is None:
+            return
+        asyncio.get_running_loop().remove_reader(self.sock.fileno())
+        self.sock.close()
+        self.sock = None
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def _receive(self):
+        while True:
+            try:
+                data = self.sock.recv(65536)
+            except BlockingIOError:
+                return
+            try:
+                _, cache_keys = decode_message(data)
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning("Ignoring malformed cache invalidation: %s", e)
+                continue
+            self.callback(cache_keys)
+
+    def publish(self, cache_keys: list[tuple]):
+        """
+        Broadcast invalidated (PK, SK) rows to every other worker.
+        """
+        if self.sock is None:
+            return
+        peers = [
+            os.path.join(self.directory, name) for name in os.listdir(self.directory)
+            if name.endswith(".sock") and os.path.join(self.directory, name) != self.path
+        ]
+        for start in range(0, len(cache_keys), MAX_KEYS_PER_MESSAGE):
+            data = encode_message(self.origin, cache_keys[start:start + MAX_KEYS_PER_MESSAGE])
+            for peer in peers:
+                try:
+                    self.sock.sendto(data, peer)
+                except (ConnectionRefusedError, FileNotFoundError):
+                    self._remove_peer(peer)  # Its worker is gone
+                except BlockingIOError:
+                    pass
+
+    @staticmethod
+    def _remove_peer(peer: str):
+        try:
+            os.unlink(peer)
+        except FileNotFoundError:
+            pass
+
+
+class RedisBus:
+    """
+    Invalidation bus over a Redis (or Redis-compatible, e.g. Valkey) pub/sub channel,
+    for workers spread over several hosts. Publishing is queued and sent by a background task.
+    """
+
+    def __init__(self, url: str, channel: str = "entity-cache-invalidations"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise ValueError("The 'redis' cache bus requires the redis package") from e
+
+        self.client = redis.from_url(url)
+        self.channel = channel
+        self.origin = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.queue = None
+        self.pubsub = None
+        self.tasks = []
+
+    async def start(self, callback):
+        """
+        Subscribe to the channel and call `callback(cache_keys)` for every message other workers publish.
+        """
+        self.queue = asyncio.Queue()
+        self.pubsub = self.client.pubsub()
+        await self.pubsub.subscribe(self.channel)
+        self.tasks = [asyncio.create_task(self._listen(callback)), asyncio.create_task(self._send())]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        if self.pubsub is not None:
+            await self.pubsub.aclose()
+            self.pubsub = None
+        await self.client.aclose()
+
+    def publish(self, cache_keys: list[tuple]):
+        """
+        Queue invalidated (PK, SK) rows for broadcasting to every other worker.
+        """
+        if self.queue is None:
+            return
+        for start in range(0, len(cache_keys), MAX_KEYS_PER_MESSAGE):
+            self.queue.put_nowait(encode_message(self.origin, cache_keys[start:start + MAX_KEYS_PER_MESSAGE]))
+
+    async def _send(self):
+        while True:
+            data = await self.queue.get()
+            try:
+                await self.client.publish(self.channel, data)
+            except Exception:
+                logger.exception("Error publishing cache invalidation")
+
+    async def _listen(self, callback):
+        while True:
+            try:
+                async for message in self.pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    origin, cache_keys = decode_message(message["data"])
+                    if origin != self.origin:
+                        callback(cache_keys)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Error receiving cache invalidations")
+                await asyncio.sleep(1)
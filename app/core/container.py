@@ -2,13 +2,43 @@ from dependency_injector import containers, providers
 import boto3
 from dotenv import load_dotenv
 
+from app.core.cache_bus import RedisBus, UnixSocketBus
+from app.core.entity_cache import EntityCache
+from app.core.jobs import JobRunner, PeriodicTask
+from app.core.services.attachments import ContentAddressedFileService
 from app.core.services.cloudwatch import CloudWatchService
+from app.core.services.dynamodb import AioTable, CachedTable, InstrumentedTable, SyncTable, client_config
+from app.core.services.memory import MemoryTable
 from app.core.services.s3 import S3Service
+from app.modules.v1.jobs.services import JobService
 from app.modules.v1.organizations.services import OrganizationService, ProjectService, TaskService, UserService
+from app.utils.constant import (
+    BLOB_GC_GRACE_SECONDS,
+    BLOB_GC_INTERVAL,
+    ENTITY_CACHE_POLICIES,
+    FILE_URL_EXPIRY,
+    JOB_DELETE_ORGANIZATION,
+    LOG_FLUSH_INTERVAL,
+    LOG_QUEUE_SIZE,
+    UPLOAD_MAX_SIZE,
+    UPLOAD_PART_SIZE,
+)
 
 load_dotenv()
 
 
+def scoped(scope, provides, *args, **kwargs):
+    """
+    Provider of `provides` selected by `scope`: one shared instance ("singleton") or a new one per resolution
+    ("request").
+    """
+    return providers.Selector(
+        scope,
+        singleton=providers.Singleton(provides, *args, **kwargs),
+        request=providers.Factory(provides, *args, **kwargs),
+    )
+
+
 class Container(containers.DeclarativeContainer):
     config = providers.Configuration()
 
@@ -19,8 +49,42 @@ class Container(containers.DeclarativeContainer):
     config.aws_secret_access_key.from_env("AWS_SECRET_ACCESS_KEY", default="DUMMY")
     config.endpoint_url.from_env("DYNAMODB_ENDPOINT_URL", default="http://dynamodb-local:8000")
     config.table_name.from_env("DYNAMODB_TABLE", default="ManagerTable")
+    config.dynamodb_backend.from_env("DYNAMODB_BACKEND", default="sync")
+    config.dynamodb_memory_latency.from_env("DYNAMODB_MEMORY_LATENCY", as_=float, default=0)
+    config.aws_max_pool_connections.from_env("AWS_MAX_POOL_CONNECTIONS", as_=int, default=50)
+    config.aws_connect_timeout.from_env("AWS_CONNECT_TIMEOUT", as_=float, default=2)
+    config.aws_read_timeout.from_env("AWS_READ_TIMEOUT", as_=float, default=5)
+    config.aws_max_attempts.from_env("AWS_MAX_ATTEMPTS", as_=int, default=5)
+    config.aws_retry_mode.from_env("AWS_RETRY_MODE", default="adaptive")
+    config.entity_cache.from_dict(ENTITY_CACHE_POLICIES)
+    config.cache_bus.from_env("CACHE_BUS", default="none")
+    config.cache_bus_dir.from_env("CACHE_BUS_DIR", default="/tmp/entity-cache-bus")
+    config.cache_bus_url.from_env("CACHE_BUS_URL", default="redis://localhost:6379/0")
     config.s3_bucket.from_env("AWS_S3_BUCKET", default=None)
     config.local_storage_dir.from_env("LOCAL_STORAGE_DIR", default="uploads")
+    config.upload_max_size.from_env("UPLOAD_MAX_SIZE", as_=int, default=UPLOAD_MAX_SIZE)
+    config.upload_part_size.from_env("UPLOAD_PART_SIZE", as_=int, default=UPLOAD_PART_SIZE)
+    config.upload_concurrency.from_env("UPLOAD_CONCURRENCY", as_=int, default=4)
+    config.file_signing_secret.from_env("FILE_SIGNING_SECRET", default=None)
+    config.file_url_expiry.from_env("FILE_URL_EXPIRY", as_=int, default=FILE_URL_EXPIRY)
+    config.file_storage_mode.from_env("FILE_STORAGE_MODE", default="path")
+    config.blob_gc_grace_seconds.from_env("BLOB_GC_GRACE_SECONDS", as_=int, default=BLOB_GC_GRACE_SECONDS)
+    config.blob_gc_interval.from_env("BLOB_GC_INTERVAL", as_=int, default=BLOB_GC_INTERVAL)
+    config.log_queue_size.from_env("LOG_QUEUE_SIZE", as_=int, default=LOG_QUEUE_SIZE)
+    config.log_flush_interval.from_env("LOG_FLUSH_INTERVAL", as_=float, default=LOG_FLUSH_INTERVAL)
+    config.log_drop_policy.from_env("LOG_DROP_POLICY", default="drop_oldest")
+    config.local_log_dir.from_env("LOCAL_LOG_DIR", default="local_logs")
+    config.service_scope.from_env("SERVICE_SCOPE", default="singleton")
+
+    # botocore settings shared by the long-lived AWS clients (pool size, keep-alive, timeouts, adaptive retries)
+    aws_client_config = providers.Singleton(
+        client_config,
+        max_pool_connections=config.aws_max_pool_connections,
+        connect_timeout=config.aws_connect_timeout,
+        read_timeout=config.aws_read_timeout,
+        max_attempts=config.aws_max_attempts,
+        retry_mode=config.aws_retry_mode,
+    )
 
     # S3 Client
     s3_client = providers.Singleton(
@@ -29,15 +93,21 @@ class Container(containers.DeclarativeContainer):
         aws_access_key_id=config.aws_access_key_id,
         aws_secret_access_key=config.aws_secret_access_key,
         region_name=config.region_name,
+        config=aws_client_config,
     ) if config.aws_access_key_id and config.aws_secret_access_key else None
 
-    # File Service
-    file_service = providers.Factory(
+    # File storage (S3 or local)
+    file_storage = providers.Singleton(
         S3Service,
         is_local=config.enviroment,
         s3_client=s3_client,
         bucket_name=config.s3_bucket,
         local_storage_dir=config.local_storage_dir,
+        max_upload_size=config.upload_max_size,
+        part_size=config.upload_part_size,
+        multipart_concurrency=config.upload_concurrency,
+        signing_secret=config.file_signing_secret,
+        url_expiry=config.file_url_expiry,
     )
     # CloudWatch Service
     log_service = providers.Singleton(
@@ -45,7 +115,11 @@ class Container(containers.DeclarativeContainer):
         is_local=config.enviroment,
         region_name=config.region_name,
         log_group_name=config.cloudwatch_log_group_name,
-        log_stream_name=config.cloudwatch_log_stream_name
+        log_stream_name=config.cloudwatch_log_stream_name,
+        queue_size=config.log_queue_size,
+        flush_interval=config.log_flush_interval,
+        drop_policy=config.log_drop_policy,
+        local_log_dir=config.local_log_dir,
     )
 
     # DynamoDB Resource
@@ -56,36 +130,121 @@ class Container(containers.DeclarativeContainer):
         aws_access_key_id=config.aws_access_key_id,
         aws_secret_access_key=config.aws_secret_access_key,
         endpoint_url=config.endpoint_url,
+        config=aws_client_config,
     )
 
     # DynamoDB Table
-    dynamodb_table = providers.Factory(
-        lambda dynamodb, table_name: dynamodb.Table(table_name),
-        dynamodb=dynamodb_resource,
-        table_name=config.table_name,
+    # "sync" wraps the blocking boto3 resource, "aio" shares one aiobotocore client (and connection pool)
+    # across all requests so their I/O overlaps on the event loop, "memory" keeps the table in this process
+    # (development and benchmarks only, nothing is persisted).
+    dynamodb_backend_table = providers.Selector(
+        config.dynamodb_backend,
+        sync=providers.Singleton(
+            SyncTable,
+            table=providers.Singleton(
+                lambda dynamodb, table_name: dynamodb.Table(table_name),
+                dynamodb=dynamodb_resource,
+                table_name=config.table_name,
+            ),
+        ),
+        aio=providers.Singleton(
+            AioTable,
+            table_name=config.table_name,
+            region_name=config.region_name,
+            endpoint_url=config.endpoint_url,
+            aws_access_key_id=config.aws_access_key_id,
+            aws_secret_access_key=config.aws_secret_access_key,
+            config=aws_client_config,
+        ),
+        memory=providers.Singleton(
+            MemoryTable,
+            table_name=config.table_name,
+            latency=config.dynamodb_memory_latency,
+        ),
+    )
+
+    # Broadcasts entity cache invalidations between worker processes: "unix" for the workers of one host,
+    # "redis" for workers on several hosts, "none" for a single process
+    cache_bus = providers.Selector(
+        config.cache_bus,
+        none=providers.Object(None),
+        unix=providers.Singleton(UnixSocketBus, directory=config.cache_bus_dir),
+        redis=providers.Singleton(RedisBus, url=config.cache_bus_url),
+    )
+
+    # Process-wide cache of organization, project and user rows, configured per entity type
+    # through config.entity_cache (see ENTITY_CACHE_POLICIES)
+    entity_cache = providers.Singleton(EntityCache, policies=config.entity_cache, bus=cache_bus)
+    # Calls reaching the backend (cache misses and writes) are accounted per request and route, see app.core.metrics
+    instrumented_table = providers.Singleton(InstrumentedTable, table=dynamodb_backend_table)
+    dynamodb_table = scoped(config.service_scope, CachedTable, table=instrumented_table, cache=entity_cache)
+
+    # File Service
+    # "path" stores every attachment under its task's key, "content" deduplicates attachments by their hash
+    # and garbage collects unreferenced ones in the background
+    file_service = providers.Selector(
+        config.file_storage_mode,
+        path=file_storage,
+        content=providers.Singleton(
+            ContentAddressedFileService,
+            table=dynamodb_table,
+            file_service=file_storage,
+            gc_grace_seconds=config.blob_gc_grace_seconds,
+        ),
+    )
+    blob_collector = providers.Selector(
+        config.file_storage_mode,
+        path=providers.Object(None),
+        content=providers.Singleton(
+            PeriodicTask,
+            callback=file_service.provided.collect_garbage,
+            interval=config.blob_gc_interval,
+        ),
     )
 
     # Services
-    user_service = providers.Factory(
+    # "singleton" (default): services and the clients they hold are stateless, so one instance of each serves every
+    # request. "request" rebuilds the table wrapper and the service graph on every resolution, as before.
+    # The backend table, the AWS clients and the file storage are shared either way.
+    user_service = scoped(
+        config.service_scope,
         UserService,
         table=dynamodb_table,
         log_service=log_service,
     )
-    task_service = providers.Factory(
+    task_service = scoped(
+        config.service_scope,
         TaskService,
         table=dynamodb_table,
         file_service=file_service,
         user_service=user_service,
         log_service=log_service,
     )
-    project_service = providers.Factory(
+    project_service = scoped(
+        config.service_scope,
         ProjectService,
         table=dynamodb_table,
         file_service=file_service,
         task_service=task_service,
         log_service=log_service,
     )
-    organization_service = providers.Factory(
-        OrganizationService, table=dynamodb_table, file_service=file_service, project_service=project_service,
+    job_service = scoped(
+        config.service_scope,
+        JobService,
+        table=dynamodb_table,
         log_service=log_service,
     )
+    organization_service = scoped(
+        config.service_scope,
+        OrganizationService, table=dynamodb_table, file_service=file_service, project_service=project_service,
+        log_service=log_service, job_service=job_service,
+    )
+
+    # Background job workers
+    job_runner = providers.Singleton(
+        JobRunner,
+        job_service=job_service,
+        handlers=providers.Dict({
+            JOB_DELETE_ORGANIZATION: organization_service.provided.purge_organization,
+        }),
+    )
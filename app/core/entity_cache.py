@@ -0,0 +1,126 @@
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class EntityCache:
+    """
+    Process-wide TTL/LRU cache of hot entity rows, sitting in front of DynamoDB GetItem.
+
+    Rows are grouped by entity type (see `entity_type`), each with its own policy:
+    `ttl` seconds to keep a found item, `negative_ttl` seconds to remember that an item does not exist
+    and `max_size` entries kept before the least recently used ones are evicted. Entity types without a
+    policy, or with a ttl of 0, are never cached. Writes made through this process invalidate the rows they
+    touch. With a `bus` (see app.core.cache_bus) invalidations are also broadcast to, and received from, the
+    other worker processes; without one, rows changed by other processes are picked up once their entry expires.
+    """
+
+    def __init__(self, policies: dict, bus=None):
+        self.policies = {entity: policy for entity, policy in (policies or {}).items() if policy.get("ttl")}
+        self.entries = {entity: OrderedDict() for entity in self.policies}
+        self.stats = {
+            entity: {"hits": 0, "negative_hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+            for entity in self.policies
+        }
+        # Bumped by every invalidation, so a read that raced with a write does not store a stale row
+        self.generation = 0
+        self.bus = bus
+
+    async def start(self):
+        """
+        Start receiving invalidations published by other workers.
+        """
+        if self.bus is not None:
+            await self.bus.start(self.forget)
+
+    async def stop(self):
+        if self.bus is not None:
+            await self.bus.stop()
+
+    @staticmethod
+    def entity_type(pk: str, sk: str) -> Optional[str]:
+        """
+        Entity type of a row: its PK prefix for META rows (ORG#o/META => "ORG"), its SK prefix for
+        the entity rows an organization partition holds (ORG#o/PROJECT#p => "PROJECT", ORG#o/USER#u => "USER").
+        Relationship rows (e.g. PROJECT#p/USER#u) have no entity type.
+        """
+        pk_prefix = pk.split("#", 1)[0]
+        sk_prefix = sk.split("#", 1)[0]
+        if sk_prefix == "META":
+            return pk_prefix
+        if pk_prefix == "ORG":
+            return sk_prefix
+        return None
+
+    def covers(self, key: dict) -> bool:
+        """
+        Whether the row of `key` is of a cached entity type.
+        """
+        return self.entity_type(key["PK"], key["SK"]) in self.policies
+
+    async def get_item(self, key: dict, loader):
+        """
+        Return the cached row for `key` (None if it is known not to exist), awaiting `loader()` on a miss.
+        """
+        entity = self.entity_type(key["PK"], key["SK"])
+        if entity not in self.policies:
+            return await loader()
+
+        entries = self.entries[entity]
+        stats = self.stats[entity]
+        cache_key = (key["PK"], key["SK"])
+        entry = entries.get(cache_key)
+        if entry is not None:
+            expires_at, item = entry
+            if expires_at > time.monotonic():
+                entries.move_to_end(cache_key)
+                stats["hits" if item is not None else "negative_hits"] += 1
+                return item
+            del entries[cache_key]
+
+        stats["misses"] += 1
+        generation = self.generation
+        item = await loader()
+        if generation == self.generation:
+            self._store(entity, cache_key, item)
+        return item
+
+    def _store(self, entity: str, cache_key: tuple, item: Optional[dict]):
+        policy = self.policies[entity]
+        ttl = policy["ttl"] if item is not None else policy.get("negative_ttl", 0)
+        if ttl <= 0:
+            return
+        entries = self.entries[entity]
+        entries[cache_key] = (time.monotonic() + ttl, item)
+        entries.move_to_end(cache_key)
+        while len(entries) > policy["max_size"]:
+            entries.popitem(last=False)
+            self.stats[entity]["evictions"] += 1
+
+    def invalidate(self, *keys: dict):
+        """
+        Forget the cached rows of `keys` after they were written or deleted, in this process and in every worker
+        listening on the bus.
+        """
+        cache_keys = [(key["PK"], key["SK"]) for key in keys if self.entity_type(key["PK"], key["SK"]) in self.policies]
+        self.forget(cache_keys)
+        if cache_keys and self.bus is not None:
+            self.bus.publish(cache_keys)
+
+    def forget(self, cache_keys: list[tuple]):
+        """
+        Drop the given (PK, SK) rows from this process only.
+        """
+        self.generation += 1
+        for pk, sk in cache_keys:
+            entity = self.entity_type(pk, sk)
+            if entity in self.policies and self.entries[entity].pop((pk, sk), None) is not None:
+                self.stats[entity]["invalidations"] += 1
+
+    def clear(self):
+        """
+        Drop every cached row.
+        """
+        self.generation += 1
+        for entries in self.entries.values():
+            entries.clear()
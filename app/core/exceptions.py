@@ -21,6 +21,10 @@ class ErrorCode:
     def BadRequest(message: str):
         return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=message)
 
+    @staticmethod
+    def PayloadTooLarge(message: str):
+        return HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=message)
+
     @staticmethod
     def Unauthorized(message: str):
         return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=message)
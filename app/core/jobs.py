@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+
+from app.core.metrics import metrics_scope
+from app.utils.constant import JOB_LEASE_SECONDS, JOB_POLL_INTERVAL, JOB_WORKERS
+
+logger = logging.getLogger(__name__)
+
+
+class JobRunner:
+    """
+    In-process pool of asyncio workers executing the background jobs persisted by JobService.
+
+    Jobs are queued by `submit` right after they are created. A poller periodically re-queues unfinished jobs
+    whose lease expired (e.g. their worker died or the process restarted), so work resumes from the last
+    checkpoint. A job already queued or running in this process is not queued again. Handlers are looked up by
+    job type and called as `handler(job, checkpoint)`, where `await checkpoint(progress, checkpoint)` persists
+    progress and renews the lease.
+    """
+
+    def __init__(self, job_service, handlers: dict, workers: int = JOB_WORKERS,
+                 lease_seconds: int = JOB_LEASE_SECONDS, poll_interval: int = JOB_POLL_INTERVAL):
+        self.job_service = job_service
+        self.handlers = handlers
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.queue = None
+        self.tasks = []
+        self.in_flight = set()  # Jobs queued or running in this process
+
+    async def start(self):
+        """
+        Start the workers and the poller that picks up unfinished jobs.
+        """
+        self.queue = asyncio.Queue()
+        self.in_flight = set()
+        self.tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self.tasks.append(asyncio.create_task(self._poll()))
+
+    async def stop(self):
+        """
+        Stop all workers. Jobs they were running keep their checkpoint and are resumed once their lease expires.
+        """
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    def submit(self, job_uuid: str):
+        """
+        Queue a job for execution by this process.
+        """
+        if self.queue is not None and job_uuid not in self.in_flight:
+            self.in_flight.add(job_uuid)
+            self.queue.put_nowait(job_uuid)
+
+    async def _poll(self):
+        while True:
+            try:
+                for job in await self.job_service.get_unfinished_jobs():
+                    if int(job.get("LeaseExpiresAt", 0)) < self.job_service.now():
+                        self.submit(self.job_service.extract_uuid(job["PK"], prefix="JOB"))
+            except Exception:
+                logger.exception("Error polling jobs")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _work(self):
+        while True:
+            job_uuid = await self.queue.get()
+            try:
+                await self.run(job_uuid)
+            except Exception:
+                logger.exception("Error running job %s", job_uuid)
+            finally:
+                self.in_flight.discard(job_uuid)
+                self.queue.task_done()
+
+    async def run(self, job_uuid: str):
+        """
+        Claim a job and run its handler to completion, recording failures for a later retry.
+        """
+        job = await self.job_service.claim_job(job_uuid, self.owner, self.lease_seconds)
+        if not job:
+            return  # Finished already, or another worker holds the lease
+
+        async def checkpoint(progress: dict, position: str = None):
+            await self.job_service.checkpoint_job(job_uuid, self.owner, self.lease_seconds, progress, position)
+
+        # The job's storage calls and consumed capacity are accounted to its target organization
+        with metrics_scope(job.get("Target", "-")) as metrics:
+            try:
+                progress = await self.handlers[job["Type"]](job, checkpoint)
+            except Exception as e:
+                await self.job_service.fail_job(job_uuid, self.owner, str(e))
+                return
+            finally:
+                metrics.publish(f"job:{job['Type']}")
+        await self.job_service.complete_job(job_uuid, self.owner, progress)
+
+
+class PeriodicTask:
+    """
+    Runs `callback()` every `interval` seconds in the background, e.g. to garbage collect unreferenced blobs.
+    """
+
+    def __init__(self, callback, interval: int):
+        self.callback = callback
+        self.interval = interval
+        self.task = None
+
+    async def start(self):
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.callback()
+            except Exception:
+                logger.exception("Error running periodic task")
@@ -0,0 +1,314 @@
+import functools
+import time
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from app.utils.constant import CAPACITY_LEDGER_MAX_ENTRIES, METRICS_LATENCY_BUCKETS, METRICS_PER_REQUEST_BUCKETS
+
+STORAGE_CALLS_HEADER = "X-DynamoDB-Calls"
+BACKGROUND_ROUTE = "background"
+EVICTED_ORGANIZATIONS = "*"
+
+
+class Histogram:
+    """
+    Cumulative Prometheus histogram: one counter per upper bound, plus the sum and count of observations.
+    """
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    Process-wide counters and histograms, keyed by metric name and a tuple of label pairs,
+    rendered in the Prometheus text exposition format by `render`.
+    """
+
+    def __init__(self):
+        self.counters = defaultdict(lambda: defaultdict(float))
+        self.histograms = defaultdict(dict)
+        self.help = {}
+
+    def describe(self, name: str, kind: str, text: str):
+        self.help[name] = (kind, text)
+
+    def inc(self, name: str, labels: dict, value: float = 1):
+        self.counters[name][tuple(labels.items())] += value
+
+    def observe(self, name: str, labels: dict, value: float, buckets: tuple = METRICS_LATENCY_BUCKETS):
+        series = self.histograms[name]
+        key = tuple(labels.items())
+        if key not in series:
+            series[key] = Histogram(buckets)
+        series[key].observe(value)
+
+    def render(self, gauges: dict = None) -> str:
+        """
+        Prometheus text format of every series, with extra `gauges` ({name: {labels tuple: value}}) sampled
+        by the caller at scrape time.
+        """
+        lines = []
+        for name, series in sorted(self.counters.items()):
+            lines.extend(self._header(name, "counter"))
+            lines.extend(f"{name}{_labels(key)} {_number(value)}" for key, value in series.items())
+        for name, series in sorted((gauges or {}).items()):
+            lines.extend(self._header(name, "gauge"))
+            lines.extend(f"{name}{_labels(key)} {_number(value)}" for key, value in series.items())
+        for name, series in sorted(self.histograms.items()):
+            lines.extend(self._header(name, "histogram"))
+            for key, histogram in series.items():
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    lines.append(f"{name}_bucket{_labels(key + (('le', _number(bound)),))} {count}")
+                lines.append(f"{name}_bucket{_labels(key + (('le', '+Inf'),))} {histogram.count}")
+                lines.append(f"{name}_sum{_labels(key)} {_number(histogram.sum)}")
+                lines.append(f"{name}_count{_labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def _header(self, name: str, default_kind: str) -> list[str]:
+        kind, text = self.help.get(name, (default_kind, name))
+        return [f"# HELP {name} {text}", f"# TYPE {name} {kind}"]
+
+
+def _labels(key: tuple) -> str:
+    if not key:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in key)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(key, escaped)) + "}"
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+registry = MetricsRegistry()
+registry.describe("app_storage_calls_total", "counter",
+                  "DynamoDB and S3 operations by service, operation, key prefix and route")
+registry.describe("app_storage_items_total", "counter",
+                  "Items read or written by DynamoDB operations, by service, operation, key prefix and route")
+registry.describe("app_storage_bytes_total", "counter",
+                  "Bytes of DynamoDB responses and S3 uploads, by service, operation, key prefix and route")
+registry.describe("app_storage_errors_total", "counter", "Storage operations that raised, by service and operation")
+registry.describe("app_storage_call_duration_seconds", "histogram",
+                  "Latency of storage operations by service, operation and key prefix")
+registry.describe("app_http_requests_total", "counter", "HTTP requests by route, method and status")
+registry.describe("app_http_request_duration_seconds", "histogram", "HTTP request latency by route and method")
+registry.describe("app_request_storage_calls", "histogram", "Storage operations issued per HTTP request, by route")
+registry.describe("app_dynamodb_capacity_units_total", "counter",
+                  "DynamoDB capacity units consumed, by kind (read/write), operation, key prefix and route")
+registry.describe("app_tenant_capacity_units_total", "counter",
+                  "DynamoDB capacity units consumed, by kind (read/write) and organization")
+
+
+class CapacityLedger:
+    """
+    Process-wide totals of the DynamoDB capacity units consumed per (organization, route), kept for the admin
+    capacity report. Work outside of an organization (e.g. listing organizations) is recorded under "-".
+    At most `max_entries` pairs are kept: the least recently updated are folded into the EVICTED_ORGANIZATIONS
+    entry of their route, so memory stays bounded however many organizations there are and totals stay exact.
+    """
+
+    def __init__(self, max_entries: int = CAPACITY_LEDGER_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.totals = OrderedDict()
+        self.since = time.time()
+
+    def add(self, organization: str, route: str, calls: int, read_units: float, write_units: float):
+        self._add((organization, route), calls, read_units, write_units)
+        while len(self.totals) > self.max_entries:
+            (_, evicted_route), entry = self.totals.popitem(last=False)
+            self._add((EVICTED_ORGANIZATIONS, evicted_route), entry["calls"], entry["read_units"],
+                      entry["write_units"])
+
+    def _add(self, key: tuple, calls: int, read_units: float, write_units: float):
+        entry = self.totals.get(key)
+        if entry is None:
+            entry = self.totals[key] = {"calls": 0, "read_units": 0.0, "write_units": 0.0}
+        else:
+            self.totals.move_to_end(key)
+        entry["calls"] += calls
+        entry["read_units"] += read_units
+        entry["write_units"] += write_units
+
+    def summary(self, group_by: str = "organization", organization: str = None, limit: int = None) -> list[dict]:
+        """
+        Totals grouped by "organization" or "route" (optionally only for one organization),
+        the most expensive first.
+        """
+        groups = defaultdict(lambda: {"calls": 0, "read_units": 0.0, "write_units": 0.0})
+        for (entry_organization, route), entry in list(self.totals.items()):
+            if organization is not None and entry_organization != organization:
+                continue
+            group = groups[entry_organization if group_by == "organization" else route]
+            for name, value in entry.items():
+                group[name] += value
+        rows = [{group_by: name, **totals, "capacity_units": totals["read_units"] + totals["write_units"]}
+                for name, totals in groups.items()]
+        rows.sort(key=lambda row: row["capacity_units"], reverse=True)
+        return rows[:limit] if limit else rows
+
+
+capacity_ledger = CapacityLedger()
+
+
+class RequestMetrics:
+    """
+    Storage operations made while serving one request, aggregated per (service, operation, key prefix),
+    with the DynamoDB capacity they consumed. `organization` is the tenant the request is attributed to.
+    """
+
+    def __init__(self, organization: str = "-"):
+        self.organization = organization
+        self.calls = defaultdict(lambda: {
+            "calls": 0, "items": 0, "bytes": 0, "seconds": 0.0, "read_units": 0.0, "write_units": 0.0,
+        })
+
+    @property
+    def total_calls(self) -> int:
+        return sum(entry["calls"] for entry in self.calls.values())
+
+    @property
+    def dynamodb_calls(self) -> int:
+        return sum(entry["calls"] for (service, _, _), entry in self.calls.items() if service == "dynamodb")
+
+    def record(self, service: str, operation: str, prefix: str, seconds: float, items: int = 0, size: int = 0,
+               read_units: float = 0, write_units: float = 0):
+        entry = self.calls[(service, operation, prefix)]
+        entry["calls"] += 1
+        entry["items"] += items
+        entry["bytes"] += size
+        entry["seconds"] += seconds
+        entry["read_units"] += read_units
+        entry["write_units"] += write_units
+
+    def publish(self, route: str):
+        """
+        Add this request's operations to the process-wide counters of `route` and to the capacity consumed by
+        its organization.
+        """
+        read_units = write_units = 0.0
+        dynamodb_calls = 0
+        for (service, operation, prefix), entry in self.calls.items():
+            labels = {"service": service, "operation": operation, "prefix": prefix, "route": route}
+            registry.inc("app_storage_calls_total", labels, entry["calls"])
+            if entry["items"]:
+                registry.inc("app_storage_items_total", labels, entry["items"])
+            if entry["bytes"]:
+                registry.inc("app_storage_bytes_total", labels, entry["bytes"])
+            if service != "dynamodb":
+                continue
+            dynamodb_calls += entry["calls"]
+            labels = {"operation": operation, "prefix": prefix, "route": route}
+            for kind in ("read", "write"):
+                if entry[f"{kind}_units"]:
+                    registry.inc("app_dynamodb_capacity_units_total", {"kind": kind, **labels}, entry[f"{kind}_units"])
+            read_units += entry["read_units"]
+            write_units += entry["write_units"]
+        if dynamodb_calls:
+            capacity_ledger.add(self.organization, route, dynamodb_calls, read_units, write_units)
+            for kind, units in (("read", read_units), ("write", write_units)):
+                if units:
+                    registry.inc("app_tenant_capacity_units_total", {"kind": kind, "organization": self.organization},
+                                 units)
+
+
+_current: ContextVar[Optional[RequestMetrics]] = ContextVar("request_metrics", default=None)
+
+
+def current_request_metrics() -> Optional[RequestMetrics]:
+    """
+    Return the accounting of the request being served, or None outside of a request (e.g. in background jobs).
+    """
+    return _current.get()
+
+
+@contextmanager
+def metrics_scope(organization: str = "-"):
+    """
+    Install a fresh RequestMetrics for the duration of a request (or background job).
+    """
+    metrics = RequestMetrics(organization)
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+def record_call(service: str, operation: str, prefix: str, seconds: float, items: int = 0, size: int = 0,
+                failed: bool = False, read_units: float = 0, write_units: float = 0):
+    """
+    Account one storage operation: its latency right away, its counts and consumed capacity with the current
+    request (or under the "background" route when there is none).
+    """
+    registry.observe("app_storage_call_duration_seconds",
+                     {"service": service, "operation": operation, "prefix": prefix}, seconds)
+    if failed:
+        registry.inc("app_storage_errors_total", {"service": service, "operation": operation})
+    metrics = current_request_metrics()
+    if metrics is not None:
+        metrics.record(service, operation, prefix, seconds, items, size, read_units, write_units)
+    else:
+        background = RequestMetrics()
+        background.record(service, operation, prefix, seconds, items, size, read_units, write_units)
+        background.publish(BACKGROUND_ROUTE)
+
+
+def record_request(route: str, method: str, status: int, seconds: float, metrics: RequestMetrics):
+    """
+    Account a finished HTTP request and the storage operations it made.
+    """
+    registry.inc("app_http_requests_total", {"route": route, "method": method, "status": str(status)})
+    registry.observe("app_http_request_duration_seconds", {"route": route, "method": method}, seconds)
+    registry.observe("app_request_storage_calls", {"route": route}, metrics.total_calls,
+                     buckets=METRICS_PER_REQUEST_BUCKETS)
+    metrics.publish(route)
+
+
+def key_prefix(value) -> str:
+    """
+    Entity prefix of a DynamoDB or storage key, e.g. "ORG" for "ORG#1234" or "organizations" for an S3 key,
+    so metrics stay grouped by access pattern instead of by individual key.
+    """
+    if not isinstance(value, str) or not value:
+        return "-"
+    if "#" in value:
+        return value.split("#", 1)[0]
+    return value.lstrip("/").split("/", 1)[0] or "-"
+
+
+def instrumented(service: str, key=None, size=None):
+    """
+    Decorate an async storage method, accounting its calls and latency. The key prefix is taken from
+    `key(self, *args)`, by default the first argument (a storage key); `size(self, *args)` gives the bytes sent.
+    """
+
+    def decorator(method):
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            start = time.perf_counter()
+            failed = True
+            try:
+                result = await method(self, *args, **kwargs)
+                failed = False
+                return result
+            finally:
+                prefix = key_prefix(key(self, *args) if key else args[0] if args else None)
+                record_call(service, method.__name__, prefix, time.perf_counter() - start,
+                            size=(size(self, *args) or 0) if size else 0, failed=failed)
+
+        return wrapper
+
+    return decorator
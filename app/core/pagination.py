@@ -0,0 +1,74 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field
+from typing import Optional
+
+from fastapi import Query, Response
+
+from app.core.exceptions import ErrorCode
+
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+@dataclass
+class Page:
+    """
+    One page of a list query and the opaque cursor pointing at the next one (None on the last page).
+    """
+    items: list = field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor(last_evaluated_key: Optional[dict]) -> Optional[str]:
+    """
+    Encode a DynamoDB LastEvaluatedKey as an opaque, URL-safe cursor.
+    """
+    if not last_evaluated_key:
+        return None
+    raw = json.dumps(last_evaluated_key, separators=(",", ":"), sort_keys=True).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[dict]:
+    """
+    Decode a cursor produced by `encode_cursor` back into an ExclusiveStartKey.
+    """
+    if not cursor:
+        return None
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise ErrorCode.BadRequest("Invalid pagination cursor.")
+    if not isinstance(key, dict) or not all(isinstance(k, str) and isinstance(v, str) for k, v in key.items()):
+        raise ErrorCode.BadRequest("Invalid pagination cursor.")
+    return key
+
+
+class PageParams:
+    """
+    `limit`/`cursor` query parameters shared by every list route.
+    Without either of them the route returns the complete list.
+    """
+
+    def __init__(
+            self,
+            limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of items"),
+            cursor: Optional[str] = Query(None, description=f"Value of a previous {NEXT_CURSOR_HEADER} header"),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+
+
+def paginated(response: Response, page: Page, serializer=None):
+    """
+    Expose the next cursor of `page` as a response header and return its items as the body,
+    already serialized when a ResponseSerializer is given (see app.core.serialization).
+    """
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    if serializer is None:
+        return page.items
+    # A returned Response replaces the one FastAPI injected, so the cursor header is carried over
+    return serializer.response(page.items, headers=dict(response.headers))
@@ -0,0 +1,90 @@
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+REQUEST_CACHE_HITS_HEADER = "X-Read-Cache-Hits"
+
+# Totals across every finished request of this process
+request_cache_stats = {"requests": 0, "hits": 0, "misses": 0, "invalidations": 0}
+
+
+class RequestCache:
+    """
+    Identity map of the items read while serving one request.
+
+    `get_item` results are memoized by key and `get_items` results by (PK, SK prefix). Reads of a key already
+    in flight wait for the same DynamoDB call instead of issuing another one, and missing items are memoized
+    too. Every write made through BaseService drops the entries of the partition it touched, so a request
+    always reads its own writes. Readers get copies, so mutating a returned item never leaks into the map.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def load(self, key: tuple, loader):
+        """
+        Return the memoized result for `key`, awaiting `loader()` on the first read.
+        A failed read is not memoized, so the next caller retries it.
+        """
+        future = self.entries.get(key)
+        if future is None:
+            self.misses += 1
+            future = asyncio.ensure_future(loader())
+            self.entries[key] = future
+            future.add_done_callback(lambda done: self._forget_failure(key, done))
+        else:
+            self.hits += 1
+        # Shielded, so a cancelled caller does not cancel the read other callers are waiting for
+        return _copy(await asyncio.shield(future))
+
+    def _forget_failure(self, key: tuple, future: asyncio.Future):
+        if (future.cancelled() or future.exception() is not None) and self.entries.get(key) is future:
+            del self.entries[key]
+
+    def invalidate(self, pk: str):
+        """
+        Drop every memoized item and query of the partition `pk`.
+        """
+        stale = [key for key in self.entries if key[0] == pk]
+        for key in stale:
+            del self.entries[key]
+        self.invalidations += len(stale)
+
+
+def _copy(result):
+    if isinstance(result, dict):
+        return dict(result)
+    if isinstance(result, list):
+        return [_copy(item) for item in result]
+    return result
+
+
+_current: ContextVar[Optional[RequestCache]] = ContextVar("request_cache", default=None)
+
+
+def current_request_cache() -> Optional[RequestCache]:
+    """
+    Return the cache of the request being served, or None outside of a request (e.g. in background jobs).
+    """
+    return _current.get()
+
+
+@contextmanager
+def request_scope():
+    """
+    Install a fresh RequestCache for the duration of a request and add its counters to the process totals.
+    """
+    cache = RequestCache()
+    token = _current.set(cache)
+    try:
+        yield cache
+    finally:
+        _current.reset(token)
+        request_cache_stats["requests"] += 1
+        request_cache_stats["hits"] += cache.hits
+        request_cache_stats["misses"] += cache.misses
+        request_cache_stats["invalidations"] += cache.invalidations
@@ -0,0 +1,28 @@
+from typing import Callable
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+from app.core.exceptions import ErrorCode
+from app.utils.constant import UPLOAD_FORM_OVERHEAD
+
+
+class UploadRoute(APIRoute):
+    """
+    Route receiving a file in a multipart form. FastAPI parses (and spools) the whole form before any dependency
+    runs, so the request's Content-Length is checked here instead: a body larger than the file service's
+    `max_upload_size` plus UPLOAD_FORM_OVERHEAD is refused with 413 before it is read. Bodies without a length
+    (chunked) are still bounded by the service while it stores the file.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            max_size = request.app.container.file_storage().max_upload_size
+            content_length = request.headers.get("content-length", "")
+            if content_length.isdigit() and int(content_length) > max_size + UPLOAD_FORM_OVERHEAD:
+                raise ErrorCode.PayloadTooLarge(f"File exceeds the maximum upload size of {max_size} bytes.")
+            return await handler(request)
+
+        return route_handler
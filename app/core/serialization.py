@@ -0,0 +1,98 @@
+from typing import Annotated, Optional
+
+from fastapi import Query, Response
+from pydantic import BaseModel, TypeAdapter
+from typing_extensions import TypedDict
+
+from app.core.exceptions import ErrorCode
+
+
+class FieldParams:
+    """
+    Optional `fields` query parameter of list and detail routes: the comma-separated response fields to return.
+    """
+
+    def __init__(self, fields: Optional[str] = Query(None, description="Comma-separated response fields")):
+        names = [name.strip() for name in fields.split(",") if name.strip()] if fields else []
+        self.fields = tuple(dict.fromkeys(names)) or None
+
+
+class ResponseSerializer:
+    """
+    Validates and serializes DynamoDB items as a response model, whole lists in a single pydantic-core pass.
+
+    FastAPI validates a list response item by item, calling the model's `model_validator(mode="before")` (which
+    splits the UUID out of the item's key) for each one, then encodes the result again with the json module.
+    Instead, the UUIDs of the whole list are extracted up front and the items are validated against a TypedDict
+    with the model's fields but none of its Python validators (plain dicts are also cheaper to build than model
+    instances), through a TypeAdapter built once, which also writes the JSON. The output is the same as the model's.
+
+    `select` returns the serializer of a sparse fieldset, whose `projection` names the item attributes to read.
+    """
+
+    def __init__(self, model: type[BaseModel], key_attribute: str = "SK", fields: Optional[tuple] = None):
+        self.model = model
+        self.key_attribute = key_attribute
+        self.fields = fields
+        model_fields = {name: field for name, field in model.model_fields.items() if not fields or name in fields}
+        row = TypedDict(f"{model.__name__}Row", {
+            name: Annotated[field.annotation, field] for name, field in model_fields.items()
+        })
+        row.__pydantic_config__ = model.model_config
+        self.adapter = TypeAdapter(list[row])
+        self.item_adapter = TypeAdapter(row)
+        # Item attribute each field is read from: its validation alias, or the key holding the UUID
+        self.attributes = {
+            name: field.validation_alias if isinstance(field.validation_alias, str) else name
+            for name, field in model_fields.items()
+        }
+        if "uuid" in self.attributes:
+            self.attributes["uuid"] = key_attribute
+        self.selections = {}
+
+    @property
+    def projection(self) -> Optional[tuple]:
+        """
+        Item attributes read by this fieldset, None when every field is returned (whole items are read).
+        """
+        if self.fields is None:
+            return None
+        return tuple(dict.fromkeys(self.attributes.values()))
+
+    def select(self, fields: Optional[tuple]) -> "ResponseSerializer":
+        """
+        Serializer of only `fields` (this one when None), built once per fieldset.
+        """
+        if not fields:
+            return self
+        unknown = [name for name in fields if name not in self.attributes]
+        if unknown:
+            raise ErrorCode.BadRequest(f"Unknown fields: {', '.join(unknown)}. "
+                                       f"Available fields: {', '.join(self.attributes)}.")
+        key = tuple(sorted(fields))
+        if key not in self.selections:
+            self.selections[key] = ResponseSerializer(self.model, self.key_attribute, fields=key)
+        return self.selections[key]
+
+    def with_uuids(self, items: list[dict]) -> list[dict]:
+        """
+        Copies of `items` carrying the UUID part of their key (e.g. "TASK#<uuid>" => "<uuid>") as "uuid".
+        """
+        key = self.key_attribute
+        return [{**item, "uuid": item[key].split("#", 1)[1]} for item in items]
+
+    def dump_json(self, items: list[dict]) -> bytes:
+        return self.adapter.dump_json(self.adapter.validate_python(self.with_uuids(items)))
+
+    def response(self, items: list[dict], headers: Optional[dict] = None) -> Response:
+        """
+        Response with `items` already serialized, so FastAPI skips its own validation of the route's response_model.
+        """
+        return Response(self.dump_json(items), media_type="application/json", headers=headers)
+
+    def item_response(self, item: dict) -> Response:
+        """
+        Response with a single item already serialized.
+        """
+        row = self.item_adapter.validate_python(self.with_uuids([item])[0])
+        return Response(self.item_adapter.dump_json(row), media_type="application/json")
@@ -0,0 +1,198 @@
+import asyncio
+import hashlib
+import logging
+from datetime import datetime
+
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import ClientError
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from app.core.exceptions import ErrorCode
+from app.core.services.base import BaseService, FileService
+from app.utils.constant import (
+    BATCH_MAX_RETRIES,
+    BATCH_RETRY_BASE_DELAY,
+    BLOB_GC_GRACE_SECONDS,
+    ENTITY_TYPE_ATTRIBUTE,
+    GSI_ENTITY_TYPE,
+    UPLOAD_CHUNK_SIZE,
+)
+
+BLOB_KEY_PREFIX = "blobs/sha256"
+
+logger = logging.getLogger(__name__)
+
+
+class ContentAddressedFileService(BaseService, FileService):
+    """
+    Deduplicating attachment store in front of a FileService (S3 or local storage).
+
+    Uploaded files are stored once per content, under blobs/sha256/<ab>/<cd>/<sha256>, however many tasks
+    reference them. Every blob has a BLOB#<sha256>/META row counting its references. The last release does not
+    delete the blob right away: the row is flagged with GcAfter and EntityType=BLOB, which puts it in the sparse
+    entity-type index, and `collect_garbage` deletes blobs that were not referenced again within the grace period.
+    Direct uploads (upload URLs) keep their per-task key and are passed through unchanged.
+    """
+
+    def __init__(self, table, file_service: FileService, gc_grace_seconds: int = BLOB_GC_GRACE_SECONDS):
+        super().__init__(table, pk_prefix="BLOB", service_name="Blob")
+        self.file_service = file_service
+        self.gc_grace_seconds = gc_grace_seconds
+
+    @staticmethod
+    def now() -> int:
+        return int(datetime.utcnow().timestamp())
+
+    @staticmethod
+    def blob_key(digest: str) -> str:
+        return f"{BLOB_KEY_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}"
+
+    async def upload_file(self, file: UploadFile, key: str) -> str:
+        """
+        Store a file by content. The file is hashed while it is streamed from the request; if a blob with the same
+        content exists it is referenced instead of being uploaded again. `key` is ignored.
+        """
+        # Step 1: Hash the upload, enforcing the size limit
+        digest, size = await self._hash(file)
+
+        # Step 2: Take a reference first, so the blob cannot be garbage collected while it is being checked
+        blob_key = self.blob_key(digest)
+        await self._acquire(digest, blob_key, size)
+
+        # Step 3: Upload the content only if no blob holds it yet
+        try:
+            if await self.file_service.get_file_size(blob_key) is None:
+                await file.seek(0)
+                await self.file_service.upload_file(file, blob_key)
+        except BaseException:
+            await self._release(digest)
+            raise
+        return self.file_service.file_url(blob_key)
+
+    async def _hash(self, file: UploadFile) -> tuple[str, int]:
+        digest = hashlib.sha256()
+        size = 0
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > self.file_service.max_upload_size:
+                raise ErrorCode.PayloadTooLarge(
+                    f"File exceeds the maximum upload size of {self.file_service.max_upload_size} bytes."
+                )
+            await run_in_threadpool(digest.update, chunk)
+        return digest.hexdigest(), size
+
+    def _digest(self, file_url: str):
+        """
+        Content hash of a blob URL, or None for files stored outside the blob store.
+        """
+        key = self.file_service.file_key(file_url)
+        if not key.startswith(f"{BLOB_KEY_PREFIX}/"):
+            return None
+        return key.rsplit("/", 1)[1]
+
+    async def _acquire(self, digest: str, blob_key: str, size: int):
+        for attempt in range(BATCH_MAX_RETRIES + 1):
+            try:
+                await self.table.update_item(
+                    Key={"PK": f"{self.pk_prefix}#{digest}", "SK": "META"},
+                    UpdateExpression="ADD RefCount :one SET #key = :key, #size = :size, UpdatedAt = :now "
+                                     "REMOVE GcAfter, #type",
+                    ExpressionAttributeNames={"#key": "Key", "#size": "Size", "#type": ENTITY_TYPE_ATTRIBUTE},
+                    ExpressionAttributeValues={":one": 1, ":key": blob_key, ":size": size, ":now": self.now()},
+                    ConditionExpression=Attr("Collecting").not_exists(),
+                )
+                return
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise ErrorCode.BadRequest(str(e))
+            # The blob is being garbage collected, wait for the collector to finish before recreating it
+            await asyncio.sleep(BATCH_RETRY_BASE_DELAY * 2 ** attempt)
+        raise ErrorCode.BadRequest("File is being deleted, please retry.")
+
+    async def _release(self, digest: str):
+        key = {"PK": f"{self.pk_prefix}#{digest}", "SK": "META"}
+        try:
+            response = await self.table.update_item(
+                Key=key,
+                UpdateExpression="ADD RefCount :minus SET UpdatedAt = :now",
+                ExpressionAttributeValues={":minus": -1, ":now": self.now()},
+                ConditionExpression=Attr("PK").exists(),
+                ReturnValues="UPDATED_NEW",
+            )
+            if response["Attributes"]["RefCount"] > 0:
+                return
+            # Last reference gone: schedule the blob for garbage collection
+            await self.table.update_item(
+                Key=key,
+                UpdateExpression="SET GcAfter = :after, #type = :type",
+                ExpressionAttributeNames={"#type": ENTITY_TYPE_ATTRIBUTE},
+                ExpressionAttributeValues={":after": self.now() + self.gc_grace_seconds, ":type": self.pk_prefix},
+                ConditionExpression=Attr("RefCount").lte(0),
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise ErrorCode.BadRequest(str(e))
+            # The blob row is gone or was referenced again in the meantime
+
+    async def delete_file(self, file_url: str):
+        """
+        Release a task's reference to a blob; files stored outside the blob store are deleted right away.
+        """
+        digest = self._digest(file_url)
+        if digest is None:
+            return await self.file_service.delete_file(file_url)
+        await self._release(digest)
+        return {"message": f"File '{file_url}' released"}
+
+    async def collect_garbage(self) -> int:
+        """
+        Delete the blobs whose last reference was released more than the grace period ago.
+        Returns the number of blobs deleted.
+        """
+        now = self.now()
+        collected = 0
+        async for response in self.paginate("query", IndexName=GSI_ENTITY_TYPE,
+                                            KeyConditionExpression=Key(ENTITY_TYPE_ATTRIBUTE).eq(self.pk_prefix)):
+            for row in response.get("Items", []):
+                if int(row.get("GcAfter", now)) < now and await self._collect(row, now):
+                    collected += 1
+        return collected
+
+    async def _collect(self, row: dict, now: int) -> bool:
+        key = {"PK": row["PK"], "SK": row["SK"]}
+        # Step 1: Flag the row, which blocks new references until the blob is gone
+        try:
+            await self.table.update_item(
+                Key=key,
+                UpdateExpression="SET Collecting = :now",
+                ExpressionAttributeValues={":now": now},
+                ConditionExpression=Attr("RefCount").lte(0) & Attr("GcAfter").lt(now),
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                return False  # Referenced again
+            raise
+
+        # Step 2: Delete the blob, then its row. If the blob cannot be deleted the flag is cleared again, so
+        # uploads of the same content are not blocked until the next run, which retries the deletion
+        try:
+            await self.file_service.delete_file(self.file_service.file_url(row["Key"]))
+        except Exception:
+            logger.exception("Error deleting blob %s", row["Key"])
+            await self.table.update_item(Key=key, UpdateExpression="REMOVE Collecting")
+            return False
+        await self.table.delete_item(Key=key)
+        return True
+
+    def file_url(self, key: str) -> str:
+        return self.file_service.file_url(key)
+
+    def create_upload_url(self, key: str, content_type: str, size: int) -> dict:
+        return self.file_service.create_upload_url(key, content_type, size)
+
+    def create_download_url(self, file_url: str) -> dict:
+        return self.file_service.create_download_url(file_url)
+
+    async def get_file_size(self, key: str):
+        return await self.file_service.get_file_size(key)
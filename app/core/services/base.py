@@ -1,9 +1,25 @@
+import asyncio
 import uuid
+from datetime import datetime
 from abc import ABC, abstractmethod
 from fastapi import UploadFile
 
-from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.conditions import Attr, ConditionExpressionBuilder, Key
+from botocore.exceptions import ClientError
 from app.core.exceptions import ErrorCode
+from app.core.pagination import Page, decode_cursor, encode_cursor
+from app.core.request_cache import current_request_cache
+from app.utils.constant import (
+    BATCH_GET_MAX_KEYS,
+    BATCH_MAX_RETRIES,
+    BATCH_RETRY_BASE_DELAY,
+    BATCH_WRITE_CONCURRENCY,
+    BATCH_WRITE_MAX_ITEMS,
+    BULK_CREATE_WINDOW,
+    ENTITY_TYPE_ATTRIBUTE,
+    GSI_ENTITY_TYPE,
+    TOMBSTONE_ATTRIBUTE,
+)
 
 
 class LogService(ABC):
@@ -28,14 +44,42 @@ class FileService(ABC):
     """
 
     @abstractmethod
-    def upload_file(self, file: UploadFile, key: str) -> str:
+    async def upload_file(self, file: UploadFile, key: str) -> str:
         """
-        Upload a file to the respective storage (S3 or local).
+        Upload a file to the respective storage (S3 or local), streaming it without blocking the event loop.
         """
         pass
 
     @abstractmethod
-    def delete_file(self, file_url: str):
+    def file_url(self, key: str) -> str:
+        """
+        URL recorded for the file stored under `key`.
+        """
+        pass
+
+    @abstractmethod
+    def create_upload_url(self, key: str, content_type: str, size: int) -> dict:
+        """
+        Issue a short-lived URL the client uploads the file to directly, bypassing the API.
+        """
+        pass
+
+    @abstractmethod
+    def create_download_url(self, file_url: str) -> dict:
+        """
+        Issue a short-lived URL the client downloads a stored file from directly.
+        """
+        pass
+
+    @abstractmethod
+    async def get_file_size(self, key: str):
+        """
+        Size of a stored file in bytes, or None if it does not exist.
+        """
+        pass
+
+    @abstractmethod
+    async def delete_file(self, file_url: str):
         """
         Delete a file from the respective storage (S3 or local).
         """
@@ -55,6 +99,26 @@ class BaseService:
         """
         return str(uuid.uuid4())
 
+    @staticmethod
+    def chunks(items: list, size: int) -> list[list]:
+        """
+        Split a list into consecutive chunks of at most `size` elements.
+        """
+        return [items[i:i + size] for i in range(0, len(items), size)]
+
+    @staticmethod
+    async def gather_limited(coroutines, limit: int = BATCH_WRITE_CONCURRENCY) -> list:
+        """
+        Await coroutines concurrently with at most `limit` of them in flight, returning results in order.
+        """
+        semaphore = asyncio.Semaphore(limit)
+
+        async def run(coroutine):
+            async with semaphore:
+                return await coroutine
+
+        return await asyncio.gather(*(run(coroutine) for coroutine in coroutines))
+
     @staticmethod
     def extract_uuid(key: str, prefix: str) -> str:
         """
@@ -65,9 +129,32 @@ class BaseService:
             return key.split("#", 1)[1]
         raise ValueError(f"Invalid key format: {key} does not start with prefix {prefix}#")
 
-    async def create_item(self, identifier: str, sk: str, attributes: dict, pk_prefix=None):
+    @staticmethod
+    async def memoized(memo_key: tuple, loader):
+        """
+        Await `loader()` once per request for `memo_key` ((PK, kind, ...)), serving repeats from the request cache.
+        """
+        cache = current_request_cache()
+        if cache is None:
+            return await loader()
+        return await cache.load(memo_key, loader)
+
+    @staticmethod
+    def invalidate(*pks: str):
+        """
+        Drop the reads of the given partitions memoized by the current request, after writing to them.
+        """
+        cache = current_request_cache()
+        if cache is not None:
+            for pk in set(pks):
+                cache.invalidate(pk)
+
+    async def create_item(self, identifier: str, sk: str, attributes: dict, pk_prefix=None, condition=None,
+                          error=None):
         """
         Create a new item in the table.
+        With a `condition` (e.g. Attr("PK").not_exists()) the write only happens if it holds; otherwise
+        `error` is raised, by default ErrorCode.Conflict for this service and identifier.
         """
         if not pk_prefix:
             pk_prefix = self.pk_prefix
@@ -76,74 +163,505 @@ class BaseService:
             "SK": sk,
             **attributes,
         }
+        kwargs = {"Item": item}
+        if condition is not None:
+            kwargs["ConditionExpression"] = condition
         try:
-            self.table.put_item(Item=item)
+            await self.table.put_item(**kwargs)
             return item
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                raise error or ErrorCode.Conflict(self.service_name, identifier)
+            raise ErrorCode.BadRequest(str(e))
         except Exception as e:
             raise ErrorCode.BadRequest(str(e))
+        finally:
+            self.invalidate(item["PK"])
+
+    @staticmethod
+    def projection_kwargs(projection) -> dict:
+        """
+        ProjectionExpression parameters reading only the `projection` attributes (plus PK, SK and the tombstone
+        marker, so keys and deletions are always visible) instead of whole items. An empty projection reads just
+        the keys, e.g. for existence checks; None reads whole items.
+        """
+        if projection is None:
+            return {}
+        names = {f"#p{i}": name for i, name in enumerate(dict.fromkeys(("PK", "SK", TOMBSTONE_ATTRIBUTE, *projection)))}
+        return {"ProjectionExpression": ", ".join(names), "ExpressionAttributeNames": names}
+
+    @staticmethod
+    def _condition_kwargs(condition) -> dict:
+        """
+        Render a condition object into ConditionExpression parameters. Needed inside TransactItems,
+        where boto3 does not translate condition objects by itself.
+        """
+        built = ConditionExpressionBuilder().build_expression(condition)
+        kwargs = {
+            "ConditionExpression": built.condition_expression,
+            "ExpressionAttributeNames": built.attribute_name_placeholders,
+        }
+        if built.attribute_value_placeholders:
+            kwargs["ExpressionAttributeValues"] = built.attribute_value_placeholders
+        return kwargs
+
+    def transact_check(self, key: dict, error):
+        """
+        Transaction operation asserting that an item exists (and is not tombstoned), raising `error` otherwise.
+        """
+        condition = Attr("PK").exists() & Attr(TOMBSTONE_ATTRIBUTE).not_exists()
+        operation = {"TableName": self.table.name, "Key": key, **self._condition_kwargs(condition)}
+        return {"ConditionCheck": operation}, error
+
+    def transact_put(self, item: dict, error=None):
+        """
+        Transaction operation writing an item. With an `error` the item must not exist yet and `error` is raised
+        if it does.
+        """
+        operation = {"TableName": self.table.name, "Item": item}
+        if error is not None:
+            operation.update(self._condition_kwargs(Attr("PK").not_exists()))
+        return {"Put": operation}, error
+
+    def transact_ensure(self, key: dict, attributes: dict):
+        """
+        Transaction operation creating an item unless it already exists, in which case it is left untouched.
+        """
+        return {"Update": {
+            "TableName": self.table.name,
+            "Key": key,
+            "UpdateExpression": "SET " + ", ".join(f"#{k} = if_not_exists(#{k}, :{k})" for k in attributes),
+            "ExpressionAttributeNames": {f"#{k}": k for k in attributes},
+            "ExpressionAttributeValues": {f":{k}": v for k, v in attributes.items()},
+        }}, None
+
+    def transact_update(self, key: dict, attributes: dict, error):
+        """
+        Transaction operation setting `attributes` on an existing item that is not tombstoned, raising `error`
+        otherwise.
+        """
+        condition = self._condition_kwargs(Attr("PK").exists() & Attr(TOMBSTONE_ATTRIBUTE).not_exists())
+        return {"Update": {
+            "TableName": self.table.name,
+            "Key": key,
+            "UpdateExpression": "SET " + ", ".join(f"#{k}=:{k}" for k in attributes),
+            "ConditionExpression": condition["ConditionExpression"],
+            "ExpressionAttributeNames": {**condition["ExpressionAttributeNames"], **{f"#{k}": k for k in attributes}},
+            "ExpressionAttributeValues": {**condition.get("ExpressionAttributeValues", {}),
+                                          **{f":{k}": v for k, v in attributes.items()}},
+        }}, error
+
+    def transact_delete(self, key: dict, error=None):
+        """
+        Transaction operation deleting an item. With an `error` the item must exist and `error` is raised if not.
+        """
+        operation = {"TableName": self.table.name, "Key": key}
+        if error is not None:
+            operation.update(self._condition_kwargs(Attr("PK").exists()))
+        return {"Delete": operation}, error
+
+    async def transact_write(self, operations: list[tuple]):
+        """
+        Apply `transact_*` operations atomically with a single TransactWriteItems call.
+        If a condition fails, the error attached to the first failing operation is raised.
+        """
+        try:
+            await self.table.transact_write_items(TransactItems=[operation for operation, _ in operations])
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "TransactionCanceledException":
+                reasons = e.response.get("CancellationReasons", [])
+                for (_, error), reason in zip(operations, reasons):
+                    if reason.get("Code") == "ConditionalCheckFailed" and error is not None:
+                        raise error
+            raise ErrorCode.BadRequest(str(e))
+        finally:
+            self.invalidate(*(
+                (body.get("Item") or body["Key"])["PK"]
+                for operation, _ in operations for kind, body in operation.items() if kind != "ConditionCheck"
+            ))
+
+    def _parent_keys(self, organization_uuid: str, project_uuid: str = None, task_uuid: str = None,
+                     user_uuid: str = None, project_member: bool = False, task_member: bool = False) -> dict:
+        keys = {"organization": ("Organization", organization_uuid, {"PK": f"ORG#{organization_uuid}", "SK": "META"})}
+        if project_uuid:
+            keys["project"] = ("Project", project_uuid,
+                               {"PK": f"ORG#{organization_uuid}", "SK": f"PROJECT#{project_uuid}"})
+        if task_uuid:
+            keys["task"] = ("Task", task_uuid, {"PK": f"PROJECT#{project_uuid}", "SK": f"TASK#{task_uuid}"})
+        if user_uuid:
+            keys["user"] = ("User", user_uuid, {"PK": f"ORG#{organization_uuid}", "SK": f"USER#{user_uuid}"})
+        if project_member:
+            keys["project_member"] = ("User", user_uuid, {"PK": f"PROJECT#{project_uuid}", "SK": f"USER#{user_uuid}"})
+        if task_member:
+            keys["task_member"] = ("User", user_uuid, {"PK": f"TASK#{task_uuid}", "SK": f"USER#{user_uuid}"})
+        return keys
+
+    def parent_checks(self, organization_uuid: str, project_uuid: str = None, task_uuid: str = None,
+                      user_uuid: str = None, project_member: bool = False, task_member: bool = False) -> list:
+        """
+        Transaction condition checks equivalent to `get_parents`, raising the same NotFound errors.
+        """
+        return [
+            self.transact_check(key, ErrorCode.NotFound(service_name, uuid_value))
+            for service_name, uuid_value, key in self._parent_keys(
+                organization_uuid, project_uuid, task_uuid, user_uuid, project_member, task_member
+            ).values()
+        ]
 
-    async def get_items(self, identifier: str, sk_prefix: str, pk_prefix=None):
+    async def paginate(self, operation: str = "query", **kwargs):
         """
-        Query items by PK and SK prefix.
+        Yield the raw response pages of a Query or Scan, following LastEvaluatedKey until exhausted.
         """
+        method = getattr(self.table, operation)
+        while True:
+            response = await method(**kwargs)
+            yield response
+            if "LastEvaluatedKey" not in response:
+                return
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    async def iter_items(self, identifier: str, sk_prefix: str, pk_prefix=None, page_size: int = None,
+                         projection: tuple = None):
+        """
+        Iterate over all items matching PK and SK prefix one DynamoDB page at a time,
+        so arbitrarily large partitions can be walked in constant memory.
+        """
+        if not pk_prefix:
+            pk_prefix = self.pk_prefix
+        kwargs = {
+            "KeyConditionExpression": Key("PK").eq(f"{pk_prefix}#{identifier}") & Key("SK").begins_with(sk_prefix),
+            **self.projection_kwargs(projection),
+        }
+        if page_size:
+            kwargs["Limit"] = page_size
         try:
-            if not pk_prefix:
-                pk_prefix = self.pk_prefix
-            response = self.table.query(
-                KeyConditionExpression=Key("PK").eq(f"{pk_prefix}#{identifier}")
-                                       & Key("SK").begins_with(sk_prefix)
-            )
-            return response.get("Items", [])
+            async for response in self.paginate("query", **kwargs):
+                for item in response.get("Items", []):
+                    yield item
+        except Exception as e:
+            raise ErrorCode.BadRequest(str(e))
+
+    async def get_items(self, identifier: str, sk_prefix: str, pk_prefix=None, projection: tuple = None):
+        """
+        Query all items by PK and SK prefix, across every DynamoDB page.
+        """
+        if not pk_prefix:
+            pk_prefix = self.pk_prefix
+
+        async def load():
+            return [item async for item in self.iter_items(identifier, sk_prefix, pk_prefix=pk_prefix,
+                                                           projection=projection)]
+
+        return await self.memoized((f"{pk_prefix}#{identifier}", "query", sk_prefix, projection), load)
+
+    async def query_page(self, limit: int = None, cursor: str = None, expected_key: dict = None, **kwargs):
+        """
+        Run a Query (any KeyConditionExpression/IndexName in `kwargs`) and return one page starting after `cursor`.
+        Without `limit` and `cursor` every page is read and all matching items are returned.
+        `expected_key` holds key attributes a cursor must carry, so it cannot be replayed against another partition.
+        """
+        if limit is None and cursor is None:
+            try:
+                items = [item async for response in self.paginate("query", **kwargs)
+                         for item in response.get("Items", [])]
+            except Exception as e:
+                raise ErrorCode.BadRequest(str(e))
+            return Page(items=items)
+
+        if limit:
+            kwargs["Limit"] = limit
+        start_key = decode_cursor(cursor)
+        if start_key:
+            if any(start_key.get(name) != value for name, value in (expected_key or {}).items()):
+                raise ErrorCode.BadRequest("Invalid pagination cursor.")
+            kwargs["ExclusiveStartKey"] = start_key
+        try:
+            response = await self.table.query(**kwargs)
         except Exception as e:
             raise ErrorCode.BadRequest(str(e))
+        return Page(items=response.get("Items", []), next_cursor=encode_cursor(response.get("LastEvaluatedKey")))
 
-    async def get_item(self, identifier: str, sk: str, pk_prefix=None, ignore_error=False):
+    async def get_page(self, identifier: str, sk_prefix: str, pk_prefix=None, limit: int = None, cursor: str = None,
+                       projection: tuple = None):
         """
-        Get an item by PK and SK.
+        Query a single page of items by PK and SK prefix, starting after `cursor`.
+        Without `limit` and `cursor` every matching item is returned.
+        """
+        if not pk_prefix:
+            pk_prefix = self.pk_prefix
+        pk = f"{pk_prefix}#{identifier}"
+        return await self.query_page(
+            limit=limit,
+            cursor=cursor,
+            expected_key={"PK": pk},
+            KeyConditionExpression=Key("PK").eq(pk) & Key("SK").begins_with(sk_prefix),
+            **self.projection_kwargs(projection),
+        )
+
+    async def get_item(self, identifier: str, sk: str, pk_prefix=None, ignore_error=False, projection: tuple = None):
+        """
+        Get an item by PK and SK, only its `projection` attributes (see `projection_kwargs`) if given.
         """
         if not pk_prefix:
             pk_prefix = self.pk_prefix
 
         key = {"PK": f"{pk_prefix}#{identifier}", "SK": sk}
 
-        response = self.table.get_item(Key=key)
+        async def load():
+            return (await self.table.get_item(Key=key, **self.projection_kwargs(projection))).get("Item")
 
-        if not ignore_error and "Item" not in response:
+        item = await self.memoized((key["PK"], "item", sk, projection), load)
+        if item and TOMBSTONE_ATTRIBUTE in item:
+            item = None  # Tombstoned items are being deleted and no longer exist for readers
+
+        if not ignore_error and not item:
             raise ErrorCode.NotFound(self.service_name, identifier)
-        return response.get("Item")
+        return item
+
+    async def get_parents(self, organization_uuid: str, project_uuid: str = None, task_uuid: str = None,
+                          user_uuid: str = None, project_member: bool = False, task_member: bool = False,
+                          projections: dict = None):
+        """
+        Fetch an organization and whichever of its project, task (within the project), user and the user's
+        project/task memberships are requested, all concurrently in a single round of GetItems.
+        Raises NotFound for the first missing record in that order, like a chain of sequential checks would.
+        Returns the records keyed by "organization", "project", "task", "user", "project_member", "task_member".
+        Only the keys of each record are read, unless `projections` maps its name to the attributes the caller
+        needs (None for the whole item).
+        """
+        checks = self._parent_keys(organization_uuid, project_uuid, task_uuid, user_uuid, project_member, task_member)
+        projections = projections or {}
+        items = await asyncio.gather(*(
+            self._get_by_key(key, projections.get(name, ())) for name, (_, _, key) in checks.items()
+        ))
+        for (service_name, uuid_value, _), item in zip(checks.values(), items):
+            if not item:
+                raise ErrorCode.NotFound(service_name, uuid_value)
+        return dict(zip(checks, items))
+
+    def _get_by_key(self, key: dict, projection: tuple = None):
+        pk_prefix, identifier = key["PK"].split("#", 1)
+        return self.get_item(identifier=identifier, sk=key["SK"], pk_prefix=pk_prefix, ignore_error=True,
+                             projection=projection)
+
+    async def verify_organization(self, organization_uuid: str):
+        """
+        Ensure an organization exists and is not being deleted, returning the keys of its META record.
+        """
+        return (await self.get_parents(organization_uuid))["organization"]
+
+    async def verify_project(self, organization_uuid: str, project_uuid: str, projection: tuple = ()):
+        """
+        Ensure a project exists in a live organization, checking both concurrently.
+        Returns the project record, with only its keys unless a `projection` is given (None for the whole item).
+        """
+        parents = await self.get_parents(organization_uuid, project_uuid=project_uuid,
+                                         projections={"project": projection})
+        return parents["project"]
+
+    async def batch_get_items(self, keys: list[dict], projection: tuple = None):
+        """
+        Fetch many items by their full keys ({"PK": ..., "SK": ...}) with BatchGetItem.
+        Keys are de-duplicated, sent in concurrent chunks of 100 and any UnprocessedKeys are retried
+        with exponential backoff. Missing items are skipped; found items keep the order of `keys`.
+        """
+        unique_keys = list({(key["PK"], key["SK"]): key for key in keys}.values())
+        try:
+            results = await asyncio.gather(*(
+                self._batch_get_chunk(chunk, projection) for chunk in self.chunks(unique_keys, BATCH_GET_MAX_KEYS)
+            ))
+        except Exception as e:
+            raise ErrorCode.BadRequest(str(e))
+
+        found = {(item["PK"], item["SK"]): item for chunk_items in results for item in chunk_items}
+        return [found[(key["PK"], key["SK"])] for key in unique_keys if (key["PK"], key["SK"]) in found]
+
+    async def _batch_get_chunk(self, keys: list[dict], projection: tuple = None):
+        items = []
+        request = {self.table.name: {"Keys": keys, **self.projection_kwargs(projection)}}
+        for attempt in range(BATCH_MAX_RETRIES + 1):
+            response = await self.table.batch_get_item(RequestItems=request)
+            items.extend(response.get("Responses", {}).get(self.table.name, []))
+            request = response.get("UnprocessedKeys")
+            if not request:
+                return items
+            await asyncio.sleep(BATCH_RETRY_BASE_DELAY * 2 ** attempt)
+        raise Exception(f"BatchGetItem left {len(request[self.table.name]['Keys'])} keys unprocessed")
+
+    async def get_keys(self, identifier: str, sk_prefix: str = None, pk_prefix=None, attributes: tuple = ()):
+        """
+        Collect the keys of every item in a partition (optionally only those with an SK prefix),
+        projecting just PK, SK and the requested `attributes`.
+        """
+        if not pk_prefix:
+            pk_prefix = self.pk_prefix
+        condition = Key("PK").eq(f"{pk_prefix}#{identifier}")
+        if sk_prefix:
+            condition = condition & Key("SK").begins_with(sk_prefix)
+        kwargs = {"KeyConditionExpression": condition, "ProjectionExpression": ", ".join(("PK", "SK", *attributes))}
+        try:
+            return [item async for response in self.paginate("query", **kwargs) for item in response.get("Items", [])]
+        except Exception as e:
+            raise ErrorCode.BadRequest(str(e))
 
-    async def get_all_meta(self):
+    async def batch_write(self, requests: list[dict]) -> int:
         """
-        Retrieve all meta records in the table where PK starts with the defined prefix
-        and SK is 'META'.
+        Send PutRequest/DeleteRequest entries with BatchWriteItem in chunks of 25, a few chunks in flight at once,
+        retrying UnprocessedItems with exponential backoff. Returns the number of requests written.
         """
         try:
-            response = self.table.scan(
-                FilterExpression=Key("PK").begins_with(self.pk_prefix) & Key("SK").eq("META")
+            await self.gather_limited(
+                self._batch_write_chunk(chunk) for chunk in self.chunks(requests, BATCH_WRITE_MAX_ITEMS)
             )
-            items = response.get("Items", [])
-            return items
         except Exception as e:
             raise ErrorCode.BadRequest(str(e))
+        finally:
+            self.invalidate(*(
+                (body.get("Item") or body["Key"])["PK"] for request in requests for body in request.values()
+            ))
+        return len(requests)
 
-    async def update_item(self, identifier: str, sk: str, attributes: dict):
+    async def batch_put_items(self, items: list[dict]) -> list:
         """
-        Update an existing item in the table.
+        Write many new items with BatchWriteItem like `batch_write`, except that a chunk failing after its retries
+        does not fail the others. Returns, per item, None once written or the error of its chunk.
         """
-        key = {"PK": f"{self.pk_prefix}#{identifier}", "SK": sk}
-        update_expression = "SET " + ", ".join(f"#{k}=:{k}" for k in attributes.keys())
-        expression_attribute_names = {f"#{k}": k for k in attributes.keys()}
-        expression_attribute_values = {f":{k}": v for k, v in attributes.items()}
+        chunks = self.chunks(items, BATCH_WRITE_MAX_ITEMS)
+
+        async def write(chunk: list[dict]):
+            try:
+                await self._batch_write_chunk([{"PutRequest": {"Item": item}} for item in chunk])
+            except Exception as e:
+                return str(e)
+
         try:
-            self.table.update_item(
+            errors = await self.gather_limited(write(chunk) for chunk in chunks)
+        finally:
+            self.invalidate(*(item["PK"] for item in items))
+        return [error for chunk, error in zip(chunks, errors) for _ in chunk]
+
+    async def bulk_create(self, rows, build_item) -> dict:
+        """
+        Create one item per valid row of a bulk request (see app.core.bulk.read_rows), built by `build_item(payload)`.
+        Valid rows are written with `batch_put_items` every BULK_CREATE_WINDOW rows, while the rest of the request
+        is still being read. Returns the result of every row in input order and the number of created/failed rows.
+        """
+        results, window = [], []
+
+        async def flush():
+            errors = await self.batch_put_items([item for _, item in window])
+            for (result, item), error in zip(window, errors):
+                if error is None:
+                    result.update(status=201, uuid=item["SK"].split("#", 1)[1])
+                else:
+                    result.update(status=400, detail=error)
+            window.clear()
+
+        async for index, payload, error in rows:
+            result = {"index": index}
+            results.append(result)
+            if error is not None:
+                result.update(error)
+                continue
+            window.append((result, build_item(payload)))
+            if len(window) >= BULK_CREATE_WINDOW:
+                await flush()
+        if window:
+            await flush()
+
+        created = sum(result["status"] == 201 for result in results)
+        return {"created": created, "failed": len(results) - created, "results": results}
+
+    async def _batch_write_chunk(self, requests: list[dict]):
+        request = {self.table.name: requests}
+        for attempt in range(BATCH_MAX_RETRIES + 1):
+            response = await self.table.batch_write_item(RequestItems=request)
+            request = response.get("UnprocessedItems")
+            if not request:
+                return
+            await asyncio.sleep(BATCH_RETRY_BASE_DELAY * 2 ** attempt)
+        raise Exception(f"BatchWriteItem left {len(request[self.table.name])} items unprocessed")
+
+    async def batch_delete_items(self, keys: list[dict]) -> int:
+        """
+        Delete many items by their full keys with BatchWriteItem. Returns the number of distinct keys deleted.
+        """
+        unique_keys = {(key["PK"], key["SK"]): {"PK": key["PK"], "SK": key["SK"]} for key in keys}
+        return await self.batch_write([{"DeleteRequest": {"Key": key}} for key in unique_keys.values()])
+
+    async def get_all_meta(self, limit: int = None, cursor: str = None, projection: tuple = None):
+        """
+        Retrieve META records of this service's entity type (EntityType == pk_prefix).
+        Reads the sparse entity-type GSI, so the cost grows with the number of entities, not the table size.
+        Tombstoned records still carrying an EntityType (e.g. tagged by a migration) are filtered out, so a page
+        may hold fewer than `limit` items.
+        """
+        return await self.query_page(
+            limit=limit,
+            cursor=cursor,
+            expected_key={ENTITY_TYPE_ATTRIBUTE: self.pk_prefix},
+            IndexName=GSI_ENTITY_TYPE,
+            KeyConditionExpression=Key(ENTITY_TYPE_ATTRIBUTE).eq(self.pk_prefix),
+            FilterExpression=Attr(TOMBSTONE_ATTRIBUTE).not_exists(),
+            **self.projection_kwargs(projection),
+        )
+
+    async def update_item(self, identifier: str, sk: str, attributes: dict, pk_prefix=None, checks: list = (),
+                          error=None):
+        """
+        Update an existing item in the table, along with `checks` (e.g. `parent_checks`) in the same transaction.
+        The item must exist and not be tombstoned, so an update never recreates a deleted item; otherwise `error`
+        is raised, by default ErrorCode.NotFound for this service and identifier.
+        """
+        if not pk_prefix:
+            pk_prefix = self.pk_prefix
+        key = {"PK": f"{pk_prefix}#{identifier}", "SK": sk}
+        operation, error = self.transact_update(key, attributes, error or ErrorCode.NotFound(self.service_name,
+                                                                                            identifier))
+        if checks:
+            await self.transact_write([*checks, (operation, error)])
+            return {**key, **attributes}
+        kwargs = {name: value for name, value in operation["Update"].items() if name != "TableName"}
+        try:
+            await self.table.update_item(**kwargs)
+            return {**key, **attributes}
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                raise error
+            raise ErrorCode.BadRequest(str(e))
+        except Exception as e:
+            raise ErrorCode.BadRequest(str(e))
+        finally:
+            self.invalidate(key["PK"])
+
+    async def tombstone_item(self, identifier: str, sk: str, attributes: dict = None, pk_prefix=None):
+        """
+        Mark an existing item as deleted without removing it: reads treat it as gone right away and it drops out
+        of the sparse entity-type index. Raises NotFound if the item is missing or already tombstoned.
+        """
+        if not pk_prefix:
+            pk_prefix = self.pk_prefix
+        attributes = {TOMBSTONE_ATTRIBUTE: int(datetime.utcnow().timestamp()), **(attributes or {})}
+        update_expression = "SET " + ", ".join(f"#{k}=:{k}" for k in attributes) + " REMOVE #EntityType"
+        expression_attribute_names = {f"#{k}": k for k in attributes}
+        expression_attribute_names["#EntityType"] = ENTITY_TYPE_ATTRIBUTE
+        key = {"PK": f"{pk_prefix}#{identifier}", "SK": sk}
+        try:
+            response = await self.table.update_item(
                 Key=key,
                 UpdateExpression=update_expression,
                 ExpressionAttributeNames=expression_attribute_names,
-                ExpressionAttributeValues=expression_attribute_values,
+                ExpressionAttributeValues={f":{k}": v for k, v in attributes.items()},
+                ConditionExpression=Attr("PK").exists() & Attr(TOMBSTONE_ATTRIBUTE).not_exists(),
+                ReturnValues="ALL_NEW",
             )
-            return {"PK": key["PK"], "SK": key["SK"], **attributes}
-        except Exception as e:
+            return response["Attributes"]
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                raise ErrorCode.NotFound(self.service_name, identifier)
             raise ErrorCode.BadRequest(str(e))
+        finally:
+            self.invalidate(key["PK"])
 
     async def delete_item(self, identifier: str, sk: str, pk_prefix=None):
         """
@@ -154,27 +672,16 @@ class BaseService:
 
         key = {"PK": f"{pk_prefix}#{identifier}", "SK": sk}
         try:
-            self.table.delete_item(Key=key)
+            await self.table.delete_item(Key=key)
         except Exception as e:
             raise ErrorCode.BadRequest(str(e))
+        finally:
+            self.invalidate(key["PK"])
 
     async def delete_items_by_sk_prefix(self, identifier: str, sk_prefix: str, pk_prefix=None):
-        try:
-            if not pk_prefix:
-                pk_prefix = self.pk_prefix
+        items = await self.get_keys(identifier, sk_prefix=sk_prefix, pk_prefix=pk_prefix)
+        if not items:
+            return {"message": f"No items found with SK prefix '{sk_prefix}' for identifier '{identifier}'."}
 
-            response = self.table.query(
-                KeyConditionExpression=Key("PK").eq(f"{pk_prefix}#{identifier}")
-                                       & Key("SK").begins_with(sk_prefix)
-            )
-
-            items = response.get("Items", [])
-            if not items:
-                return {"message": f"No items found with SK prefix '{sk_prefix}' for identifier '{identifier}'."}
-
-            for item in items:
-                self.table.delete_item(Key={"PK": item["PK"], "SK": item["SK"]})
-
-            return {"message": f"All items with SK prefix '{sk_prefix}' have been deleted."}
-        except Exception as e:
-            raise ErrorCode.BadRequest(f"Error deleting items: {str(e)}")
+        await self.batch_delete_items(items)
+        return {"message": f"All items with SK prefix '{sk_prefix}' have been deleted."}
@@ -1,23 +1,70 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
 import boto3
 from botocore.exceptions import ClientError
-import os
-from pathlib import Path
-from app.core.exceptions import ErrorCode
+from starlette.concurrency import run_in_threadpool
+
 from app.core.services.base import LogService
+from app.utils.constant import (
+    BATCH_MAX_RETRIES,
+    BATCH_RETRY_BASE_DELAY,
+    LOG_BATCH_MAX_BYTES,
+    LOG_BATCH_MAX_EVENTS,
+    LOG_BATCH_MAX_SPAN_MS,
+    LOG_EVENT_MAX_BYTES,
+    LOG_EVENT_OVERHEAD,
+    LOG_FLUSH_INTERVAL,
+    LOG_QUEUE_SIZE,
+)
+
+LOG_DROP_POLICIES = ("drop_newest", "drop_oldest")
+
+logger = logging.getLogger(__name__)
 
 
 class CloudWatchService(LogService):
+    """
+    LogService shipping messages to AWS CloudWatch (or a local file in development) in the background.
+
+    `log` only appends the message to a bounded in-memory queue, so request handlers never wait on the network.
+    Once started, a shipper task sends the queue in batches that respect the PutLogEvents limits (event count,
+    payload bytes and time span), whenever a batch fills up or every `flush_interval` seconds. When the queue is
+    full, messages are dropped according to `drop_policy` and the number dropped is logged with the next batch.
+    `stop` flushes whatever is still queued. Before `start` (e.g. in scripts) messages are written synchronously.
+    """
+
     def __init__(self, is_local="development", region_name="us-east-1", log_group_name="my-log-group",
-                 log_stream_name="my-log-stream", s3_client=None):
+                 log_stream_name="my-log-stream", s3_client=None, queue_size: int = LOG_QUEUE_SIZE,
+                 flush_interval: float = LOG_FLUSH_INTERVAL, drop_policy: str = "drop_oldest",
+                 local_log_dir: str = "local_logs"):
         """
         Initializes the CloudWatch service.
-        If is_local=True, it will simulate the logging locally instead of AWS CloudWatch.
+        If is_local=True, it will simulate the logging locally (under `local_log_dir`) instead of AWS CloudWatch.
         """
+        if drop_policy not in LOG_DROP_POLICIES:
+            raise ValueError(f"Unknown log drop policy '{drop_policy}', expected one of {LOG_DROP_POLICIES}")
         self.is_local = is_local == "development"
         self.region_name = region_name
-        self.log_group_name = log_group_name
-        self.log_stream_name = log_stream_name
+        self.log_group_name = log_group_name or "my-log-group"
+        self.log_stream_name = log_stream_name or "my-log-stream"
         self.client = s3_client
+        self.queue_size = queue_size
+        self.flush_interval = flush_interval
+        self.drop_policy = drop_policy
+        self.local_log_dir = local_log_dir
+        self.queue = deque()
+        self.dropped = 0
+        self.lock = threading.Lock()  # `log` may be called from the thread pool as well as the event loop
+        self.flush_lock = threading.Lock()  # Keeps batches in order when stop() flushes behind the shipper
+        self.loop = None
+        self.wakeup = None
+        self.task = None
+        self.log_file = None
 
         if not self.is_local:
             self.client = boto3.client("logs", region_name=self.region_name)
@@ -43,30 +90,128 @@ class CloudWatchService(LogService):
                     logStreamName=self.log_stream_name
                 )
 
+    async def start(self):
+        """
+        Start the background shipper.
+        """
+        self.loop = asyncio.get_running_loop()
+        self.wakeup = asyncio.Event()
+        self.task = asyncio.create_task(self._ship())
+
+    async def stop(self):
+        """
+        Stop the shipper after sending every queued message, then close the local log file.
+        """
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        self.loop = None
+        await run_in_threadpool(self.flush)
+        if self.log_file is not None:
+            self.log_file.close()
+            self.log_file = None
+
     def log(self, message: str):
-        """Log a message to AWS CloudWatch."""
-        if self.is_local:
-            # If running locally, log to a file (simulating CloudWatch logs)
-            self.log_locally(message)
+        """Queue a message for AWS CloudWatch (or the local log file)."""
+        event = {"timestamp": int(time.time() * 1000), "message": self._truncate(message)}
+        with self.lock:
+            if len(self.queue) >= self.queue_size:
+                self.dropped += 1
+                if self.drop_policy == "drop_newest":
+                    return
+                self.queue.popleft()
+            self.queue.append(event)
+            full = len(self.queue) >= LOG_BATCH_MAX_EVENTS
+        if self.loop is None:
+            self.flush()  # Not started: write right away
+        elif full:
+            self._wake()
+
+    def _wake(self):
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            self.wakeup.set()
         else:
-            # Send the log message to CloudWatch
+            self.loop.call_soon_threadsafe(self.wakeup.set)
+
+    @staticmethod
+    def _truncate(message: str) -> str:
+        encoded = message.encode("utf-8")
+        if len(encoded) <= LOG_EVENT_MAX_BYTES:
+            return message
+        return encoded[:LOG_EVENT_MAX_BYTES].decode("utf-8", errors="ignore")
+
+    async def _ship(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            try:
+                await run_in_threadpool(self.flush)
+            except Exception:
+                logger.exception("Error shipping logs")
+
+    def _next_batch(self) -> list[dict]:
+        """
+        Take the oldest queued events that fit in a single PutLogEvents call.
+        """
+        with self.lock:
+            if self.dropped:
+                dropped, self.dropped = self.dropped, 0
+                self.queue.appendleft({
+                    "timestamp": self.queue[0]["timestamp"] if self.queue else int(time.time() * 1000),
+                    "message": f"{dropped} log messages dropped, the log queue was full",
+                })
+            batch, size = [], 0
+            while self.queue and len(batch) < LOG_BATCH_MAX_EVENTS:
+                event = self.queue[0]
+                event_size = len(event["message"].encode("utf-8")) + LOG_EVENT_OVERHEAD
+                if batch and (size + event_size > LOG_BATCH_MAX_BYTES
+                              or event["timestamp"] - batch[0]["timestamp"] > LOG_BATCH_MAX_SPAN_MS):
+                    break
+                batch.append(self.queue.popleft())
+                size += event_size
+        # Events are queued in order, but the clock may step backwards and CloudWatch requires them sorted
+        return sorted(batch, key=lambda event: event["timestamp"])
+
+    def flush(self):
+        """
+        Send every queued message, one batch at a time, blocking until done.
+        """
+        with self.flush_lock:
+            while batch := self._next_batch():
+                if self.is_local:
+                    self.log_locally(batch)
+                else:
+                    self._put_log_events(batch)
+
+    def _put_log_events(self, batch: list[dict]):
+        for attempt in range(BATCH_MAX_RETRIES + 1):
             try:
-                response = self.client.put_log_events(
+                self.client.put_log_events(
                     logGroupName=self.log_group_name,
                     logStreamName=self.log_stream_name,
-                    logEvents=[{
-                        "timestamp": int(round(os.times()[4] * 1000)),  # Current time in ms
-                        "message": message
-                    }]
+                    logEvents=batch,
                 )
-                print(f"Successfully logged to CloudWatch: {response}")
+                return
             except ClientError as e:
-                raise ErrorCode.BadRequest(f"Error logging to CloudWatch: {e.response['Error']['Message']}")
-
-    def log_locally(self, message: str):
-        """Simulate logging to local storage (for testing purposes)."""
-        log_path = Path("local_logs") / f"{self.log_group_name}.log"
-        log_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(log_path, "a") as log_file:
-            log_file.write(f"{message}\n")
-        print(f"Logged locally: {message}")
+                if e.response["Error"]["Code"] not in ("ThrottlingException", "ServiceUnavailableException"):
+                    logger.exception("Error logging to CloudWatch: %s", e.response["Error"]["Message"])
+                    return
+            time.sleep(BATCH_RETRY_BASE_DELAY * 2 ** attempt)
+        logger.warning("Dropped %d log messages, CloudWatch kept throttling", len(batch))
+
+    def log_locally(self, batch: list[dict]):
+        """Simulate logging to local storage (for testing purposes), keeping the log file open."""
+        if self.log_file is None:
+            log_path = Path(self.local_log_dir) / f"{self.log_group_name}.log"
+            log_path.parent.mkdir(parents=True, exist_ok=True)
+            self.log_file = open(log_path, "a")
+        self.log_file.writelines(f"{event['message']}\n" for event in batch)
+        self.log_file.flush()
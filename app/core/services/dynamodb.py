@@ -0,0 +1,405 @@
+import asyncio
+import time
+from contextlib import AsyncExitStack
+
+from boto3.dynamodb.transform import TransformationInjector, copy_dynamodb_params
+from botocore.config import Config
+
+from app.core.metrics import key_prefix, record_call
+
+READ_OPERATIONS = ("get_item", "query", "scan", "batch_get_item", "transact_get_items")
+PROJECTION_ARGUMENTS = {"Key", "ProjectionExpression", "ExpressionAttributeNames"}
+
+
+def client_config(max_pool_connections: int = 50, connect_timeout: float = 2, read_timeout: float = 5,
+                  max_attempts: int = 5, retry_mode: str = "adaptive") -> Config:
+    """
+    botocore client settings for long-lived, shared AWS clients: a connection pool sized for the number of
+    concurrent requests, TCP keep-alive on pooled connections, short timeouts so a stalled connection fails fast
+    instead of holding a worker, and adaptive retries that also rate-limit the client when AWS throttles it.
+    """
+    return Config(
+        max_pool_connections=max_pool_connections,
+        tcp_keepalive=True,
+        connect_timeout=connect_timeout,
+        read_timeout=read_timeout,
+        retries={"mode": retry_mode, "total_max_attempts": max_attempts},
+    )
+
+
+class SyncTable:
+    """
+    Awaitable facade over a boto3 ``Table`` resource.
+    Calls run inline on the event loop, so every round trip blocks the worker until DynamoDB answers.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self.client = table.meta.client
+        self.name = table.name
+
+    async def put_item(self, **kwargs):
+        return self.table.put_item(**kwargs)
+
+    async def get_item(self, **kwargs):
+        return self.table.get_item(**kwargs)
+
+    async def update_item(self, **kwargs):
+        return self.table.update_item(**kwargs)
+
+    async def delete_item(self, **kwargs):
+        return self.table.delete_item(**kwargs)
+
+    async def query(self, **kwargs):
+        return self.table.query(**kwargs)
+
+    async def scan(self, **kwargs):
+        return self.table.scan(**kwargs)
+
+    async def batch_get_item(self, **kwargs):
+        return self.client.batch_get_item(**kwargs)
+
+    async def batch_write_item(self, **kwargs):
+        return self.client.batch_write_item(**kwargs)
+
+    async def transact_get_items(self, **kwargs):
+        return self.client.transact_get_items(**kwargs)
+
+    async def transact_write_items(self, **kwargs):
+        return self.client.transact_write_items(**kwargs)
+
+    async def close(self):
+        pass
+
+
+class AioTable:
+    """
+    Native asyncio DynamoDB table backed by a single aiobotocore client.
+    The client (and its HTTP connection pool) is created lazily on first use and shared by every request,
+    so concurrent requests overlap their I/O instead of queueing behind each other.
+    Accepts and returns plain Python values, exactly like the boto3 ``Table`` resource.
+    `config` tunes the client (pool size, timeouts, retries), see `client_config`.
+    """
+
+    def __init__(self, table_name: str, region_name: str = "us-east-1", endpoint_url: str = None,
+                 aws_access_key_id: str = None, aws_secret_access_key: str = None, config: Config = None):
+        try:
+            from aiobotocore.session import get_session
+        except ImportError as e:
+            raise ValueError("The 'aio' DynamoDB backend requires the aiobotocore package") from e
+
+        self.name = table_name
+        self.session = get_session()
+        self.client_kwargs = {
+            "region_name": region_name,
+            "endpoint_url": endpoint_url,
+            "aws_access_key_id": aws_access_key_id,
+            "aws_secret_access_key": aws_secret_access_key,
+            "config": config or client_config(),
+        }
+        self.client = None
+        self._exit_stack = None
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _register_transforms(client):
+        """
+        Install the same serialization hooks boto3 registers on its ``dynamodb`` resource,
+        so condition objects and native values are translated to and from the wire format.
+        """
+        injector = TransformationInjector()
+        events = client.meta.events
+        events.register("provide-client-params.dynamodb", copy_dynamodb_params,
+                        unique_id="dynamodb-create-params-copy")
+        events.register("before-parameter-build.dynamodb", injector.inject_condition_expressions,
+                        unique_id="dynamodb-condition-expression")
+        events.register("before-parameter-build.dynamodb", injector.inject_attribute_value_input,
+                        unique_id="dynamodb-attr-value-input")
+        events.register("after-call.dynamodb", injector.inject_attribute_value_output,
+                        unique_id="dynamodb-attr-value-output")
+
+    async def get_client(self):
+        """
+        Return the shared client, creating it on first use.
+        """
+        if self.client is None:
+            async with self._lock:
+                if self.client is None:
+                    exit_stack = AsyncExitStack()
+                    client = await exit_stack.enter_async_context(
+                        self.session.create_client("dynamodb", **self.client_kwargs)
+                    )
+                    self._register_transforms(client)
+                    self._exit_stack = exit_stack
+                    self.client = client
+        return self.client
+
+    async def _call_table(self, operation: str, **kwargs):
+        client = await self.get_client()
+        return await getattr(client, operation)(TableName=self.name, **kwargs)
+
+    async def _call_client(self, operation: str, **kwargs):
+        client = await self.get_client()
+        return await getattr(client, operation)(**kwargs)
+
+    async def put_item(self, **kwargs):
+        return await self._call_table("put_item", **kwargs)
+
+    async def get_item(self, **kwargs):
+        return await self._call_table("get_item", **kwargs)
+
+    async def update_item(self, **kwargs):
+        return await self._call_table("update_item", **kwargs)
+
+    async def delete_item(self, **kwargs):
+        return await self._call_table("delete_item", **kwargs)
+
+    async def query(self, **kwargs):
+        return await self._call_table("query", **kwargs)
+
+    async def scan(self, **kwargs):
+        return await self._call_table("scan", **kwargs)
+
+    async def batch_get_item(self, **kwargs):
+        return await self._call_client("batch_get_item", **kwargs)
+
+    async def batch_write_item(self, **kwargs):
+        return await self._call_client("batch_write_item", **kwargs)
+
+    async def transact_get_items(self, **kwargs):
+        return await self._call_client("transact_get_items", **kwargs)
+
+    async def transact_write_items(self, **kwargs):
+        return await self._call_client("transact_write_items", **kwargs)
+
+    async def close(self):
+        """
+        Release the shared client and its connection pool.
+        """
+        if self._exit_stack is not None:
+            await self._exit_stack.aclose()
+            self._exit_stack = None
+            self.client = None
+
+
+class CachedTable:
+    """
+    Table wrapper serving GetItem calls from a process-wide EntityCache and invalidating the cached rows touched
+    by every write. Plain GetItems (just a ``Key``) and those projecting top-level attributes of a cached entity
+    type are served from the whole cached row. All other calls go straight to `table`.
+    """
+
+    def __init__(self, table, cache):
+        self.table = table
+        self.cache = cache
+        self.name = table.name
+
+    async def get_item(self, **kwargs):
+        key = kwargs["Key"]
+        attributes = self._projected_attributes(kwargs) if self.cache.covers(key) else None
+        if set(kwargs) != {"Key"} and attributes is None:
+            return await self.table.get_item(**kwargs)  # Nested projections and consistent reads bypass the cache
+
+        async def load():
+            # Fill with a strongly consistent read, so a row is never cached from before the latest write
+            return (await self.table.get_item(Key=key, ConsistentRead=True)).get("Item")
+
+        item = await self.cache.get_item(key, load)
+        if item is None:
+            return {}
+        if attributes is not None:
+            return {"Item": {name: item[name] for name in attributes if name in item}}
+        return {"Item": dict(item)}
+
+    @staticmethod
+    def _projected_attributes(kwargs: dict):
+        """
+        Attribute names of a ProjectionExpression made of top-level attributes only, else None.
+        """
+        if "ProjectionExpression" not in kwargs or not set(kwargs) <= PROJECTION_ARGUMENTS:
+            return None
+        names = kwargs.get("ExpressionAttributeNames", {})
+        attributes = []
+        for path in kwargs["ProjectionExpression"].split(","):
+            path = path.strip()
+            if "." in path or "[" in path:
+                return None
+            attributes.append(names.get(path, path))
+        return attributes
+
+    async def put_item(self, **kwargs):
+        try:
+            return await self.table.put_item(**kwargs)
+        finally:
+            self.cache.invalidate(kwargs["Item"])
+
+    async def update_item(self, **kwargs):
+        try:
+            return await self.table.update_item(**kwargs)
+        finally:
+            self.cache.invalidate(kwargs["Key"])
+
+    async def delete_item(self, **kwargs):
+        try:
+            return await self.table.delete_item(**kwargs)
+        finally:
+            self.cache.invalidate(kwargs["Key"])
+
+    async def query(self, **kwargs):
+        return await self.table.query(**kwargs)
+
+    async def scan(self, **kwargs):
+        return await self.table.scan(**kwargs)
+
+    async def batch_get_item(self, **kwargs):
+        return await self.table.batch_get_item(**kwargs)
+
+    async def batch_write_item(self, **kwargs):
+        try:
+            return await self.table.batch_write_item(**kwargs)
+        finally:
+            self.cache.invalidate(*(
+                body.get("Item") or body["Key"]
+                for requests in kwargs["RequestItems"].values() for request in requests for body in request.values()
+            ))
+
+    async def transact_get_items(self, **kwargs):
+        return await self.table.transact_get_items(**kwargs)
+
+    async def transact_write_items(self, **kwargs):
+        try:
+            return await self.table.transact_write_items(**kwargs)
+        finally:
+            self.cache.invalidate(*(
+                body.get("Item") or body["Key"]
+                for operation in kwargs["TransactItems"] for kind, body in operation.items() if kind != "ConditionCheck"
+            ))
+
+    async def close(self):
+        await self.table.close()
+
+
+class InstrumentedTable:
+    """
+    Table wrapper accounting every call to `table` (see app.core.metrics): operation, entity prefix of the
+    partition key, latency, item count, response bytes and the read/write capacity units DynamoDB
+    reports (every call asks for ReturnConsumedCapacity), per request, route and organization.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self.name = table.name
+
+    async def _call(self, operation: str, prefix: str, **kwargs):
+        kwargs.setdefault("ReturnConsumedCapacity", "TOTAL")
+        start = time.perf_counter()
+        response = None
+        try:
+            response = await getattr(self.table, operation)(**kwargs)
+            return response
+        finally:
+            read_units, write_units = self._capacity(operation, (response or {}).get("ConsumedCapacity"))
+            record_call("dynamodb", operation, prefix, time.perf_counter() - start,
+                        items=self._items(operation, kwargs, response or {}), size=self._size(response or {}),
+                        failed=response is None, read_units=read_units, write_units=write_units)
+
+    @staticmethod
+    def _size(response: dict) -> int:
+        """
+        Bytes of the HTTP response body, as reported by DynamoDB (the in-memory backend reports none), so the
+        payload is never serialized again just to be measured.
+        """
+        headers = response.get("ResponseMetadata", {}).get("HTTPHeaders", {})
+        length = headers.get("content-length", "")
+        return int(length) if length.isdigit() else 0
+
+    @staticmethod
+    def _capacity(operation: str, consumed) -> tuple[float, float]:
+        """
+        Read and write capacity units reported by a call (one ConsumedCapacity entry, or one per table).
+        """
+        read_units = write_units = 0.0
+        for entry in consumed if isinstance(consumed, list) else [consumed] if consumed else []:
+            if "ReadCapacityUnits" in entry or "WriteCapacityUnits" in entry:
+                read_units += float(entry.get("ReadCapacityUnits", 0))
+                write_units += float(entry.get("WriteCapacityUnits", 0))
+            elif operation in READ_OPERATIONS:
+                read_units += float(entry.get("CapacityUnits", 0))
+            else:
+                write_units += float(entry.get("CapacityUnits", 0))
+        return read_units, write_units
+
+    @staticmethod
+    def _items(operation: str, kwargs: dict, response: dict) -> int:
+        """
+        Number of items read or written by a call.
+        """
+        if operation == "get_item":
+            return 1 if response.get("Item") else 0
+        if operation in ("query", "scan"):
+            return response.get("Count", len(response.get("Items", [])))
+        if operation == "batch_get_item":
+            return sum(len(items) for items in response.get("Responses", {}).values())
+        if operation == "transact_get_items":
+            return sum(1 for entry in response.get("Responses", []) if entry.get("Item"))
+        if operation == "batch_write_item":
+            return sum(len(requests) for requests in kwargs["RequestItems"].values())
+        if operation == "transact_write_items":
+            return len(kwargs["TransactItems"])
+        return 1
+
+    @staticmethod
+    def _condition_prefix(condition) -> str:
+        """
+        Entity prefix of the value a key condition (e.g. Key("PK").eq("ORG#...") & ...) compares the hash key to.
+        """
+        while condition is not None and hasattr(condition, "get_expression"):
+            values = condition.get_expression()["values"]
+            if condition.get_expression()["operator"] == "=":
+                return key_prefix(values[1])
+            condition = values[0]
+        return "-"
+
+    @staticmethod
+    def _first_key(bodies) -> str:
+        for body in bodies:
+            return key_prefix((body.get("Item") or body.get("Key") or {}).get("PK"))
+        return "-"
+
+    async def put_item(self, **kwargs):
+        return await self._call("put_item", key_prefix(kwargs["Item"]["PK"]), **kwargs)
+
+    async def get_item(self, **kwargs):
+        return await self._call("get_item", key_prefix(kwargs["Key"]["PK"]), **kwargs)
+
+    async def update_item(self, **kwargs):
+        return await self._call("update_item", key_prefix(kwargs["Key"]["PK"]), **kwargs)
+
+    async def delete_item(self, **kwargs):
+        return await self._call("delete_item", key_prefix(kwargs["Key"]["PK"]), **kwargs)
+
+    async def query(self, **kwargs):
+        return await self._call("query", self._condition_prefix(kwargs.get("KeyConditionExpression")), **kwargs)
+
+    async def scan(self, **kwargs):
+        return await self._call("scan", "-", **kwargs)
+
+    async def batch_get_item(self, **kwargs):
+        prefix = self._first_key({"Key": key} for request in kwargs["RequestItems"].values() for key in request["Keys"])
+        return await self._call("batch_get_item", prefix, **kwargs)
+
+    async def batch_write_item(self, **kwargs):
+        prefix = self._first_key(body for requests in kwargs["RequestItems"].values() for request in requests
+                                 for body in request.values())
+        return await self._call("batch_write_item", prefix, **kwargs)
+
+    async def transact_get_items(self, **kwargs):
+        prefix = self._first_key(body for operation in kwargs["TransactItems"] for body in operation.values())
+        return await self._call("transact_get_items", prefix, **kwargs)
+
+    async def transact_write_items(self, **kwargs):
+        prefix = self._first_key(body for operation in kwargs["TransactItems"] for body in operation.values())
+        return await self._call("transact_write_items", prefix, **kwargs)
+
+    async def close(self):
+        await self.table.close()
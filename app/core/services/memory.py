@@ -0,0 +1,1091 @@
+import asyncio
+import functools
+import math
+import re
+from bisect import bisect_left, bisect_right
+from decimal import Decimal
+
+from boto3.dynamodb.conditions import ConditionBase, ConditionExpressionBuilder
+from botocore.exceptions import ClientError
+
+from app.init_table import ENTITY_TYPE_INDEX
+
+MAX_ITEM_SIZE = 400 * 1024
+MAX_PAGE_SIZE = 1024 ** 2  # A Query or Scan page stops after evaluating 1 MB of items
+MAX_BATCH_GET_KEYS = 100
+MAX_BATCH_WRITE_ITEMS = 25
+MAX_TRANSACT_ITEMS = 100
+READ_UNIT_SIZE = 4 * 1024
+WRITE_UNIT_SIZE = 1024
+
+
+def _error(code: str, message: str, operation: str, **extra) -> ClientError:
+    return ClientError({"Error": {"Code": code, "Message": message}, **extra}, operation)
+
+
+def _validation(message: str, operation: str) -> ClientError:
+    return _error("ValidationException", message, operation)
+
+
+def _store(value):
+    """
+    Copy a value into the table the way boto3 serializes it: ints become Decimals, floats are refused.
+    """
+    if isinstance(value, dict):
+        return {k: _store(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_store(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return {_store(v) for v in value}
+    if isinstance(value, bool) or value is None or isinstance(value, (str, bytes, Decimal)):
+        return value
+    if isinstance(value, int):
+        return Decimal(value)
+    if isinstance(value, float):
+        raise TypeError("Float types are not supported. Use Decimal types instead.")
+    raise TypeError(f"Unsupported type {type(value)} for value {value!r}")
+
+
+def _clone(value):
+    if isinstance(value, dict):
+        return {k: _clone(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_clone(v) for v in value]
+    if isinstance(value, set):
+        return set(value)
+    return value
+
+
+def _size(value) -> int:
+    """
+    Approximate DynamoDB size of a stored value in bytes.
+    """
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, bytes):
+        return len(value)
+    if isinstance(value, Decimal):
+        return 1 + (len(value.as_tuple().digits) + 1) // 2
+    if isinstance(value, dict):
+        return 3 + sum(len(k.encode("utf-8")) + _size(v) + 1 for k, v in value.items())
+    if isinstance(value, (list, set)):
+        return 3 + sum(_size(v) + 1 for v in value)
+    return 1
+
+
+def item_size(item: dict) -> int:
+    return sum(len(name.encode("utf-8")) + _size(value) for name, value in item.items())
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (Decimal, int)) and not isinstance(value, bool)
+
+
+def _comparable(a, b) -> bool:
+    return (_is_number(a) and _is_number(b)) or (type(a) is type(b) and isinstance(a, (str, bytes)))
+
+
+def _prefix_end(prefix: str) -> str:
+    """
+    Smallest string greater than every string starting with `prefix`.
+    """
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1) if prefix else "\U0010ffff"
+
+
+# Expressions
+
+TOKEN = re.compile(r"\s*(?:(<>|<=|>=|[=<>()\[\],.+\-])|(#[A-Za-z0-9_]+)|(:[A-Za-z0-9_]+)|(\d+)|([A-Za-z_][A-Za-z0-9_]*))")
+MISSING = object()
+
+
+class ExpressionError(ValueError):
+    pass
+
+
+class Parser:
+    """
+    Recursive descent parser of the DynamoDB expression language (conditions, key conditions, updates and
+    projections) into small tuple ASTs. Placeholders are kept as they are ("#name" path segments and
+    ("value", ":value") nodes) and collected, so that a parsed expression can be cached and bound to the
+    ExpressionAttributeNames and ExpressionAttributeValues of each call.
+    """
+
+    def __init__(self, expression: str):
+        self.tokens = []
+        self.position = 0
+        self.names = set()
+        self.values = set()
+        index, expression = 0, expression.rstrip()
+        while index < len(expression):
+            match = TOKEN.match(expression, index)
+            if not match or match.end() == index:
+                raise ExpressionError(f"Invalid expression: syntax error near '{expression[index:index + 10]}'")
+            symbol, name, value, number, word = match.groups()
+            if symbol:
+                self.tokens.append(("symbol", symbol))
+            elif name:
+                self.tokens.append(("name", name))
+            elif value:
+                self.tokens.append(("value", value))
+            elif number:
+                self.tokens.append(("number", int(number)))
+            else:
+                self.tokens.append(("word", word))
+            index = match.end()
+
+    # Tokens
+
+    def _peek(self, offset: int = 0):
+        index = self.position + offset
+        return self.tokens[index] if index < len(self.tokens) else (None, None)
+
+    def _next(self):
+        token = self._peek()
+        self.position += 1
+        return token
+
+    def _accept(self, kind: str, text=None) -> bool:
+        token_kind, token_text = self._peek()
+        if token_kind == kind and (text is None or str(token_text).upper() == text):
+            self.position += 1
+            return True
+        return False
+
+    def _expect(self, kind: str, text=None):
+        if not self._accept(kind, text):
+            raise ExpressionError(f"Invalid expression: expected {text or kind}, got {self._peek()[1]!r}")
+
+    def _done(self):
+        if self.position != len(self.tokens):
+            raise ExpressionError(f"Invalid expression: unexpected {self._peek()[1]!r}")
+
+    # Operands
+
+    def _name(self) -> str:
+        kind, text = self._next()
+        if kind == "name":
+            self.names.add(text)
+            return text
+        if kind == "word":
+            return text
+        raise ExpressionError(f"Invalid expression: expected an attribute name, got {text!r}")
+
+    def _path(self) -> tuple:
+        segments = [self._name()]
+        while True:
+            if self._accept("symbol", "."):
+                segments.append(self._name())
+            elif self._accept("symbol", "["):
+                kind, index = self._next()
+                if kind != "number":
+                    raise ExpressionError("Invalid expression: list index must be a number")
+                self._expect("symbol", "]")
+                segments.append(index)
+            else:
+                return ("path", tuple(segments))
+
+    def _value(self) -> tuple:
+        kind, text = self._next()
+        if kind != "value":
+            raise ExpressionError(f"Invalid expression: expected a value, got {text!r}")
+        self.values.add(text)
+        return ("value", text)
+
+    def _operand(self) -> tuple:
+        kind, text = self._peek()
+        if kind == "value":
+            return self._value()
+        if kind == "word" and self._peek(1) == ("symbol", "("):
+            function = text.lower()
+            self.position += 2
+            args = [self._operand()]
+            while self._accept("symbol", ","):
+                args.append(self._operand())
+            self._expect("symbol", ")")
+            return ("call", function, tuple(args))
+        return self._path()
+
+    # Conditions
+
+    def condition(self):
+        node = self._or()
+        self._done()
+        return node
+
+    def _or(self):
+        node = self._and()
+        while self._accept("word", "OR"):
+            node = ("or", node, self._and())
+        return node
+
+    def _and(self):
+        node = self._not()
+        while self._accept("word", "AND"):
+            node = ("and", node, self._not())
+        return node
+
+    def _not(self):
+        if self._accept("word", "NOT"):
+            return ("not", self._not())
+        return self._comparison()
+
+    def _comparison(self):
+        if self._accept("symbol", "("):
+            node = self._or()
+            self._expect("symbol", ")")
+            return node
+        left = self._operand()
+        if left[0] == "call" and left[1] != "size":
+            return left
+        kind, text = self._peek()
+        if kind == "symbol" and text in ("=", "<>", "<", "<=", ">", ">="):
+            self.position += 1
+            return ("compare", text, left, self._operand())
+        if self._accept("word", "BETWEEN"):
+            low = self._operand()
+            self._expect("word", "AND")
+            return ("between", left, low, self._operand())
+        if self._accept("word", "IN"):
+            self._expect("symbol", "(")
+            options = [self._operand()]
+            while self._accept("symbol", ","):
+                options.append(self._operand())
+            self._expect("symbol", ")")
+            return ("in", left, tuple(options))
+        raise ExpressionError(f"Invalid expression: unexpected {text!r}")
+
+    # Updates
+
+    def update(self) -> tuple:
+        """
+        Actions of an UpdateExpression: ("SET", path, value), ("REMOVE", path), ("ADD", path, value),
+        ("DELETE", path, value).
+        """
+        actions, seen = [], set()
+        while self.position < len(self.tokens):
+            kind, clause = self._next()
+            clause = str(clause).upper()
+            if kind != "word" or clause not in ("SET", "REMOVE", "ADD", "DELETE") or clause in seen:
+                raise ExpressionError(f"Invalid UpdateExpression: unexpected {clause!r}")
+            seen.add(clause)
+            while True:
+                path = self._path()
+                if clause == "SET":
+                    self._expect("symbol", "=")
+                    actions.append((clause, path, self._set_value()))
+                elif clause == "REMOVE":
+                    actions.append((clause, path))
+                else:
+                    actions.append((clause, path, self._value()))
+                if not self._accept("symbol", ","):
+                    break
+        return tuple(actions)
+
+    def _set_value(self):
+        left = self._operand()
+        kind, text = self._peek()
+        if kind == "symbol" and text in ("+", "-"):
+            self.position += 1
+            return ("arithmetic", text, left, self._operand())
+        return left
+
+    # Projections
+
+    def projection(self) -> tuple:
+        paths = [self._path()]
+        while self._accept("symbol", ","):
+            paths.append(self._path())
+        self._done()
+        return tuple(paths)
+
+
+@functools.lru_cache(maxsize=4096)
+def parse(kind: str, expression: str) -> tuple:
+    """
+    AST of an expression of `kind` ("condition", "update" or "projection") and the placeholder names and values
+    it uses. Services send the same few expressions over and over, so parsing is cached.
+    """
+    parser = Parser(expression)
+    return getattr(parser, kind)(), frozenset(parser.names), frozenset(parser.values)
+
+
+class Expressions:
+    """
+    Expressions of one call, bound to its ExpressionAttributeNames and ExpressionAttributeValues.
+    Conditions may also be given as boto3 condition objects. Remembers which placeholders were used, since
+    DynamoDB rejects calls defining unused ones.
+    """
+
+    def __init__(self, names: dict = None, values: dict = None, operation: str = ""):
+        self.names = dict(names or {})
+        self.values = {k: _store(v) for k, v in (values or {}).items()}
+        self.operation = operation
+        self.used_names = set()
+        self.used_values = set()
+        self.builder = ConditionExpressionBuilder()  # One builder keeps placeholders unique across expressions
+
+    def check_unused(self):
+        unused_names = set(self.names) - self.used_names
+        unused_values = set(self.values) - self.used_values
+        if unused_names:
+            raise _validation(f"Value provided in ExpressionAttributeNames unused in expressions: "
+                              f"keys: {{{', '.join(sorted(unused_names))}}}", self.operation)
+        if unused_values:
+            raise _validation(f"Value provided in ExpressionAttributeValues unused in expressions: "
+                              f"keys: {{{', '.join(sorted(unused_values))}}}", self.operation)
+
+    def condition(self, expression):
+        """
+        AST of a condition, given as a string or as a boto3 condition object.
+        """
+        if isinstance(expression, ConditionBase):
+            built = self.builder.build_expression(expression)
+            self.names.update(built.attribute_name_placeholders)
+            self.values.update({k: _store(v) for k, v in built.attribute_value_placeholders.items()})
+            expression = built.condition_expression
+        return self._parse("condition", expression)
+
+    def update(self, expression: str) -> tuple:
+        return self._parse("update", expression)
+
+    def projection(self, expression: str) -> list[tuple]:
+        return [path[1] for path in self._parse("projection", expression)]
+
+    def _parse(self, kind: str, expression: str):
+        try:
+            node, names, values = parse(kind, expression)
+        except ExpressionError as e:
+            raise _validation(str(e), self.operation)
+        for name in names:
+            if name not in self.names:
+                raise _validation(f"An expression attribute name used in the document path is not defined; "
+                                  f"attribute name: {name}", self.operation)
+        for value in values:
+            if value not in self.values:
+                raise _validation(f"An expression attribute value used in expression is not defined; "
+                                  f"attribute value: {value}", self.operation)
+        self.used_names |= names
+        self.used_values |= values
+        return self._bind(node)
+
+    def _bind(self, node):
+        """
+        Copy of a parsed AST with its placeholders replaced by this call's names and values.
+        """
+        if node[0] == "path":
+            return ("path", tuple(self.names[segment] if isinstance(segment, str) and segment[0] == "#" else segment
+                                  for segment in node[1]))
+        if node[0] == "value":
+            return ("value", self.values[node[1]])
+        return tuple(self._bind(child) if isinstance(child, tuple) else child for child in node)
+
+
+def _resolve(item: dict, segments: tuple):
+    value = item
+    for segment in segments:
+        if isinstance(segment, int):
+            if not isinstance(value, list) or segment >= len(value):
+                return MISSING
+            value = value[segment]
+        else:
+            if not isinstance(value, dict) or segment not in value:
+                return MISSING
+            value = value[segment]
+    return value
+
+
+def _evaluate(node, item: dict):
+    kind = node[0]
+    if kind == "value":
+        return node[1]
+    if kind == "path":
+        return _resolve(item, node[1])
+    if kind == "call":
+        _, function, args = node
+        if function == "attribute_exists":
+            return _resolve(item, args[0][1]) is not MISSING
+        if function == "attribute_not_exists":
+            return _resolve(item, args[0][1]) is MISSING
+        if function == "size":
+            value = _evaluate(args[0], item)
+            if isinstance(value, str):
+                return Decimal(len(value.encode("utf-8")))
+            return Decimal(len(value)) if isinstance(value, (bytes, list, dict, set)) else MISSING
+        value, operand = _evaluate(args[0], item), _evaluate(args[1], item)
+        if function == "begins_with":
+            return type(value) is type(operand) and isinstance(value, (str, bytes)) and value.startswith(operand)
+        if function == "contains":
+            if isinstance(value, str) and isinstance(operand, str):
+                return operand in value
+            return isinstance(value, (list, set)) and operand in value
+        if function == "attribute_type":
+            return _type(value) == operand
+        raise ValueError(f"Unknown function {function}")
+    if kind == "and":
+        return _evaluate(node[1], item) and _evaluate(node[2], item)
+    if kind == "or":
+        return _evaluate(node[1], item) or _evaluate(node[2], item)
+    if kind == "not":
+        return not _evaluate(node[1], item)
+    if kind == "compare":
+        _, operator, left, right = node
+        a, b = _evaluate(left, item), _evaluate(right, item)
+        if a is MISSING or b is MISSING:
+            return operator == "<>" and not (a is MISSING and b is MISSING)
+        if operator == "=":
+            return a == b and _type(a) == _type(b)
+        if operator == "<>":
+            return not (a == b and _type(a) == _type(b))
+        if not _comparable(a, b):
+            return False
+        return {"<": a < b, "<=": a <= b, ">": a > b, ">=": a >= b}[operator]
+    if kind == "between":
+        value, low, high = (_evaluate(operand, item) for operand in node[1:])
+        return _comparable(value, low) and _comparable(value, high) and low <= value <= high
+    if kind == "in":
+        value = _evaluate(node[1], item)
+        return any(value == _evaluate(option, item) and _type(value) == _type(_evaluate(option, item))
+                   for option in node[2])
+    raise ValueError(f"Unknown expression node {kind}")
+
+
+def _type(value) -> str:
+    if value is MISSING:
+        return "MISSING"
+    if isinstance(value, bool):
+        return "BOOL"
+    if value is None:
+        return "NULL"
+    if _is_number(value):
+        return "N"
+    if isinstance(value, str):
+        return "S"
+    if isinstance(value, bytes):
+        return "B"
+    if isinstance(value, dict):
+        return "M"
+    if isinstance(value, list):
+        return "L"
+    if isinstance(value, set):
+        element = next(iter(value), "")
+        return "NS" if _is_number(element) else "BS" if isinstance(element, bytes) else "SS"
+    return "?"
+
+
+def _assign(item: dict, segments: tuple, value, operation: str):
+    target = item
+    for segment in segments[:-1]:
+        target = target.get(segment) if isinstance(target, dict) else (
+            target[segment] if isinstance(target, list) and segment < len(target) else None)
+        if not isinstance(target, (dict, list)):
+            raise _validation("The document path provided in the update expression is invalid for update", operation)
+    last = segments[-1]
+    if isinstance(last, int):
+        if not isinstance(target, list):
+            raise _validation("The document path provided in the update expression is invalid for update", operation)
+        if last < len(target):
+            target[last] = value
+        else:
+            target.append(value)
+    else:
+        target[last] = value
+
+
+def _remove(item: dict, segments: tuple):
+    parent = _resolve(item, segments[:-1]) if len(segments) > 1 else item
+    last = segments[-1]
+    if isinstance(parent, dict):
+        parent.pop(last, None)
+    elif isinstance(parent, list) and isinstance(last, int) and last < len(parent):
+        del parent[last]
+
+
+def _project(item: dict, paths: list[tuple]) -> dict:
+    projected = {}
+    for segments in paths:
+        value = _resolve(item, segments)
+        if value is MISSING:
+            continue
+        target = projected
+        for segment, next_segment in zip(segments, segments[1:]):
+            target = target.setdefault(segment, [] if isinstance(next_segment, int) else {})
+        if isinstance(target, list):
+            target.append(value)
+        else:
+            target[segments[-1]] = value
+    return projected
+
+
+class MemoryIndex:
+    """
+    Global secondary index: per hash value, entries (range value, PK, SK) kept sorted.
+    Only items carrying every key attribute of the index (as strings) are indexed, like a sparse GSI.
+    """
+
+    def __init__(self, definition: dict):
+        self.name = definition["IndexName"]
+        schema = {key["KeyType"]: key["AttributeName"] for key in definition["KeySchema"]}
+        self.hash_key = schema["HASH"]
+        self.range_key = schema.get("RANGE")
+        self.partitions = {}
+
+    def entry(self, item: dict):
+        hash_value = item.get(self.hash_key)
+        range_value = item.get(self.range_key) if self.range_key else ""
+        if not isinstance(hash_value, str) or not isinstance(range_value, str):
+            return None
+        return hash_value, (range_value, item["PK"], item["SK"])
+
+    def add(self, item: dict):
+        entry = self.entry(item)
+        if entry:
+            keys = self.partitions.setdefault(entry[0], [])
+            keys.insert(bisect_left(keys, entry[1]), entry[1])
+
+    def discard(self, item: dict):
+        entry = self.entry(item)
+        if entry and entry[0] in self.partitions:
+            keys = self.partitions[entry[0]]
+            position = bisect_left(keys, entry[1])
+            if position < len(keys) and keys[position] == entry[1]:
+                del keys[position]
+            if not keys:
+                del self.partitions[entry[0]]
+
+
+class MemoryTable:
+    """
+    In-memory DynamoDB table with the same awaitable interface as SyncTable and AioTable.
+
+    Every partition keeps its sort keys in a sorted list next to a dict of items, so GetItem is a dict lookup and a
+    Query is a binary search plus a slice, and global secondary indexes (by default those created by
+    app.init_table) are maintained on every write. It follows DynamoDB semantics closely enough to stand in for it
+    in development and benchmarks: condition, key condition, filter, projection and update expressions (given as
+    strings with placeholders or as boto3 condition objects), numbers stored as Decimals, Limit/ExclusiveStartKey/
+    LastEvaluatedKey pagination with the 1 MB page size, batch and transaction limits, all-or-nothing transactions
+    with CancellationReasons, ReturnValues and ReturnConsumedCapacity. Errors are raised as botocore ClientErrors
+    with DynamoDB's error codes. `latency` seconds are awaited before every call to emulate the network round trip.
+    GSIs are updated synchronously, so unlike DynamoDB they are never stale.
+    """
+
+    def __init__(self, table_name: str = "ManagerTable", indexes: list[dict] = None, latency: float = 0):
+        self.name = table_name
+        self.latency = latency
+        self.partitions = {}  # PK -> (sorted SKs, {SK: item})
+        self.sizes = {}  # (PK, SK) -> item size, for capacity and page size accounting
+        self.indexes = {
+            definition["IndexName"]: MemoryIndex(definition)
+            for definition in (indexes if indexes is not None else [ENTITY_TYPE_INDEX])
+        }
+
+    def __len__(self):
+        return sum(len(items) for _, items in self.partitions.values())
+
+    async def _round_trip(self):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    # Storage
+
+    def _key(self, key: dict, operation: str) -> tuple[str, str]:
+        pk, sk = key.get("PK"), key.get("SK")
+        if not isinstance(pk, str) or not isinstance(sk, str) or not pk or not sk or set(key) - {"PK", "SK"}:
+            raise _validation("The provided key element does not match the schema", operation)
+        return pk, sk
+
+    def _get(self, pk: str, sk: str):
+        partition = self.partitions.get(pk)
+        return partition[1].get(sk) if partition else None
+
+    def _stored_size(self, item) -> int:
+        return self.sizes[(item["PK"], item["SK"])] if item else 0
+
+    def _put(self, item: dict, size: int):
+        pk, sk = item["PK"], item["SK"]
+        keys, items = self.partitions.setdefault(pk, ([], {}))
+        previous = items.get(sk)
+        if previous is None:
+            keys.insert(bisect_left(keys, sk), sk)
+        else:
+            for index in self.indexes.values():
+                index.discard(previous)
+        items[sk] = item
+        self.sizes[(pk, sk)] = size
+        for index in self.indexes.values():
+            index.add(item)
+        return previous
+
+    def _delete(self, pk: str, sk: str):
+        partition = self.partitions.get(pk)
+        if not partition or sk not in partition[1]:
+            return None
+        keys, items = partition
+        previous = items.pop(sk)
+        del self.sizes[(pk, sk)]
+        del keys[bisect_left(keys, sk)]
+        if not items:
+            del self.partitions[pk]
+        for index in self.indexes.values():
+            index.discard(previous)
+        return previous
+
+    @staticmethod
+    def _check_size(item: dict, operation: str) -> int:
+        size = item_size(item)
+        if size > MAX_ITEM_SIZE:
+            raise _validation("Item size has exceeded the maximum allowed size", operation)
+        return size
+
+    # Expressions
+
+    @staticmethod
+    def _expressions(kwargs: dict, operation: str) -> Expressions:
+        return Expressions(kwargs.get("ExpressionAttributeNames"), kwargs.get("ExpressionAttributeValues"),
+                           operation)
+
+    @staticmethod
+    def _condition_holds(expressions: Expressions, condition, item) -> bool:
+        if condition is None:
+            return True
+        return bool(_evaluate(expressions.condition(condition), item or {}))
+
+    def _updated(self, current: dict, key: dict, actions: list[tuple], operation: str) -> tuple[dict, set]:
+        item = _clone(current) if current else dict(key)
+        touched = set()
+        for action in actions:
+            clause, path = action[0], action[1][1]
+            touched.add(path[0])
+            if path[0] in ("PK", "SK"):
+                raise _validation(f"Cannot update attribute {path[0]}. This attribute is part of the key", operation)
+            if clause == "SET":
+                _assign(item, path, _clone(self._update_value(action[2], current or {}, operation)), operation)
+            elif clause == "REMOVE":
+                _remove(item, path)
+            elif clause == "ADD":
+                existing, value = _resolve(item, path), action[2][1]
+                if existing is MISSING:
+                    _assign(item, path, _clone(value), operation)
+                elif _is_number(existing) and _is_number(value):
+                    _assign(item, path, existing + value, operation)
+                elif isinstance(existing, set) and isinstance(value, set):
+                    _assign(item, path, existing | value, operation)
+                else:
+                    raise _validation("An operand in the update expression has an incorrect data type", operation)
+            else:  # DELETE
+                existing, value = _resolve(item, path), action[2][1]
+                if isinstance(existing, set) and isinstance(value, set):
+                    remaining = existing - value
+                    if remaining:
+                        _assign(item, path, remaining, operation)
+                    else:
+                        _remove(item, path)
+                elif existing is not MISSING:
+                    raise _validation("An operand in the update expression has an incorrect data type", operation)
+        return item, touched
+
+    def _update_value(self, node, item: dict, operation: str):
+        if node[0] == "arithmetic":
+            _, operator, left, right = node
+            a, b = self._update_value(left, item, operation), self._update_value(right, item, operation)
+            if not (_is_number(a) and _is_number(b)):
+                raise _validation("An operand in the update expression has an incorrect data type", operation)
+            return a + b if operator == "+" else a - b
+        if node[0] == "call" and node[1] == "if_not_exists":
+            existing = _resolve(item, node[2][0][1])
+            return existing if existing is not MISSING else self._update_value(node[2][1], item, operation)
+        if node[0] == "call" and node[1] == "list_append":
+            a, b = (self._update_value(arg, item, operation) for arg in node[2])
+            if not isinstance(a, list) or not isinstance(b, list):
+                raise _validation("An operand in the update expression has an incorrect data type", operation)
+            return a + b
+        value = _evaluate(node, item)
+        if value is MISSING:
+            raise _validation("The provided expression refers to an attribute that does not exist in the item",
+                              operation)
+        return value
+
+    # Capacity
+
+    @staticmethod
+    def _units(size: int, unit: int, minimum: int = 1) -> int:
+        return max(minimum, math.ceil(size / unit))
+
+    def _capacity(self, kwargs: dict, read: float = 0, write: float = 0) -> dict:
+        if kwargs.get("ReturnConsumedCapacity", "NONE") == "NONE":
+            return {}
+        entry = {"TableName": self.name, "CapacityUnits": float(read + write)}
+        if read:
+            entry["ReadCapacityUnits"] = float(read)
+        if write:
+            entry["WriteCapacityUnits"] = float(write)
+        return {"ConsumedCapacity": entry}
+
+    def _read_units(self, size: int, consistent: bool) -> float:
+        units = self._units(size, READ_UNIT_SIZE)
+        return units if consistent else units / 2
+
+    # Single-item operations
+
+    def _return_values(self, kwargs: dict, operation: str, allowed: tuple, old: dict = None, new: dict = None,
+                       touched: set = ()) -> dict:
+        mode = kwargs.get("ReturnValues", "NONE")
+        if mode not in allowed:
+            raise _validation(f"ReturnValues {mode} is not supported by {operation}", operation)
+        if mode == "ALL_OLD" and old:
+            return {"Attributes": _clone(old)}
+        if mode == "ALL_NEW" and new:
+            return {"Attributes": _clone(new)}
+        if mode == "UPDATED_OLD" and old:
+            return {"Attributes": {k: _clone(old[k]) for k in touched if k in old}}
+        if mode == "UPDATED_NEW" and new:
+            return {"Attributes": {k: _clone(new[k]) for k in touched if k in new}}
+        return {}
+
+    async def put_item(self, **kwargs):
+        await self._round_trip()
+        item = _store(kwargs["Item"])
+        pk, sk = self._key({"PK": item.get("PK"), "SK": item.get("SK")}, "PutItem")
+        size = self._check_size(item, "PutItem")
+        expressions = self._expressions(kwargs, "PutItem")
+        current = self._get(pk, sk)
+        if not self._condition_holds(expressions, kwargs.get("ConditionExpression"), current):
+            raise _error("ConditionalCheckFailedException", "The conditional request failed", "PutItem")
+        expressions.check_unused()
+        written = max(size, self._stored_size(current))
+        self._put(item, size)
+        return {**self._return_values(kwargs, "PutItem", ("NONE", "ALL_OLD"), old=current),
+                **self._capacity(kwargs, write=self._units(written, WRITE_UNIT_SIZE))}
+
+    async def get_item(self, **kwargs):
+        await self._round_trip()
+        item = self._get(*self._key(kwargs["Key"], "GetItem"))
+        response = self._capacity(kwargs, read=self._read_units(self._stored_size(item),
+                                                                kwargs.get("ConsistentRead", False)))
+        if item is not None:
+            if "ProjectionExpression" in kwargs:
+                expressions = self._expressions(kwargs, "GetItem")
+                item = _project(item, expressions.projection(kwargs["ProjectionExpression"]))
+                expressions.check_unused()
+            response["Item"] = _clone(item)
+        return response
+
+    async def update_item(self, **kwargs):
+        await self._round_trip()
+        pk, sk = self._key(kwargs["Key"], "UpdateItem")
+        expressions = self._expressions(kwargs, "UpdateItem")
+        current = self._get(pk, sk)
+        if not self._condition_holds(expressions, kwargs.get("ConditionExpression"), current):
+            raise _error("ConditionalCheckFailedException", "The conditional request failed", "UpdateItem")
+        actions = expressions.update(kwargs["UpdateExpression"]) if kwargs.get("UpdateExpression") else []
+        expressions.check_unused()
+        item, touched = self._updated(current, {"PK": pk, "SK": sk}, actions, "UpdateItem")
+        size = self._check_size(item, "UpdateItem")
+        written = max(size, self._stored_size(current))
+        self._put(item, size)
+        return {**self._return_values(kwargs, "UpdateItem", ("NONE", "ALL_OLD", "ALL_NEW", "UPDATED_OLD",
+                                                             "UPDATED_NEW"), old=current, new=item, touched=touched),
+                **self._capacity(kwargs, write=self._units(written, WRITE_UNIT_SIZE))}
+
+    async def delete_item(self, **kwargs):
+        await self._round_trip()
+        pk, sk = self._key(kwargs["Key"], "DeleteItem")
+        expressions = self._expressions(kwargs, "DeleteItem")
+        current = self._get(pk, sk)
+        if not self._condition_holds(expressions, kwargs.get("ConditionExpression"), current):
+            raise _error("ConditionalCheckFailedException", "The conditional request failed", "DeleteItem")
+        expressions.check_unused()
+        size = self._stored_size(current)
+        self._delete(pk, sk)
+        return {**self._return_values(kwargs, "DeleteItem", ("NONE", "ALL_OLD"), old=current),
+                **self._capacity(kwargs, write=self._units(size, WRITE_UNIT_SIZE))}
+
+    # Query and Scan
+
+    def _key_range(self, node, hash_key: str, range_key: str, operation: str):
+        """
+        Split a key condition into the partition value and a (low, high) slice function over the sorted range keys.
+        """
+        conditions = []
+        while node[0] == "and":
+            conditions.append(node[2])
+            node = node[1]
+        conditions.append(node)
+        hash_value, range_condition = None, None
+        for condition in conditions:
+            if condition[0] == "compare" and condition[1] == "=" and condition[2] == ("path", (hash_key,)):
+                hash_value = condition[3][1]
+            elif range_key and (
+                    (condition[0] in ("compare", "between") and condition[2 if condition[0] == "compare" else 1]
+                     == ("path", (range_key,)))
+                    or (condition[0] == "call" and condition[1] == "begins_with"
+                        and condition[2][0] == ("path", (range_key,)))) and range_condition is None:
+                range_condition = condition
+            else:
+                raise _validation("Query key condition not supported", operation)
+        if not isinstance(hash_value, str):
+            raise _validation("Query condition missed key schema element", operation)
+        return hash_value, range_condition
+
+    @staticmethod
+    def _slice(keys: list, condition, key=None) -> tuple[int, int]:
+        if condition is None:
+            return 0, len(keys)
+        if condition[0] == "call":  # begins_with
+            prefix = condition[2][1][1]
+            return bisect_left(keys, prefix, key=key), bisect_left(keys, _prefix_end(prefix), key=key)
+        if condition[0] == "between":
+            return bisect_left(keys, condition[2][1], key=key), bisect_right(keys, condition[3][1], key=key)
+        operator, value = condition[1], condition[3][1]
+        return {
+            "=": lambda: (bisect_left(keys, value, key=key), bisect_right(keys, value, key=key)),
+            "<": lambda: (0, bisect_left(keys, value, key=key)),
+            "<=": lambda: (0, bisect_right(keys, value, key=key)),
+            ">": lambda: (bisect_right(keys, value, key=key), len(keys)),
+            ">=": lambda: (bisect_left(keys, value, key=key), len(keys)),
+        }[operator]()
+
+    def _page(self, candidates, kwargs: dict, expressions: Expressions, last_key, operation: str) -> dict:
+        """
+        Evaluate items in order up to Limit or 1 MB, then filter, project and count them like DynamoDB does.
+        """
+        limit = kwargs.get("Limit")
+        if limit is not None and limit < 1:
+            raise _validation("Limit must be greater than or equal to 1", operation)
+        filter_node = expressions.condition(kwargs["FilterExpression"]) if kwargs.get("FilterExpression") else None
+        projection = (expressions.projection(kwargs["ProjectionExpression"])
+                      if kwargs.get("ProjectionExpression") else None)
+        expressions.check_unused()
+        items, scanned, size, last = [], 0, 0, None
+        for item in candidates:
+            if (limit is not None and scanned >= limit) or size >= MAX_PAGE_SIZE:
+                last = last_key(previous)
+                break
+            scanned += 1
+            size += self._stored_size(item)
+            previous = item
+            if filter_node is None or _evaluate(filter_node, item):
+                items.append(_clone(_project(item, projection) if projection else item))
+        response = {"Count": len(items), "ScannedCount": scanned}
+        if kwargs.get("Select") != "COUNT":
+            response["Items"] = items
+        if last is not None:
+            response["LastEvaluatedKey"] = last
+        response.update(self._capacity(kwargs, read=self._read_units(size, kwargs.get("ConsistentRead", False))))
+        return response
+
+    async def query(self, **kwargs):
+        await self._round_trip()
+        expressions = self._expressions(kwargs, "Query")
+        condition = kwargs.get("KeyConditionExpression")
+        if condition is None:
+            raise _validation("Either the KeyConditions or KeyConditionExpression parameter must be specified",
+                              "Query")
+        node = expressions.condition(condition)
+        forward = kwargs.get("ScanIndexForward", True)
+        start = kwargs.get("ExclusiveStartKey")
+        index_name = kwargs.get("IndexName")
+
+        if index_name is None:
+            pk, range_condition = self._key_range(node, "PK", "SK", "Query")
+            keys, items = self.partitions.get(pk, ([], {}))
+            low, high = self._slice(keys, range_condition)
+            if start:
+                if forward:
+                    low = max(low, bisect_right(keys, start["SK"]))
+                else:
+                    high = min(high, bisect_left(keys, start["SK"]))
+            selected = keys[low:high] if forward else keys[low:high][::-1]
+            candidates = (items[sk] for sk in selected)
+            return self._page(candidates, kwargs, expressions, lambda item: {"PK": item["PK"], "SK": item["SK"]},
+                              "Query")
+
+        index = self.indexes.get(index_name)
+        if index is None:
+            raise _validation("The table does not have the specified index: " + index_name, "Query")
+        if kwargs.get("ConsistentRead"):
+            raise _validation("Consistent reads are not supported on global secondary indexes", "Query")
+        hash_value, range_condition = self._key_range(node, index.hash_key, index.range_key, "Query")
+        entries = index.partitions.get(hash_value, [])
+        low, high = self._slice(entries, range_condition, key=lambda entry: entry[0])
+        if start:
+            position = (start.get(index.range_key, "") if index.range_key else "", start["PK"], start["SK"])
+            if forward:
+                low = max(low, bisect_right(entries, position))
+            else:
+                high = min(high, bisect_left(entries, position))
+        selected = entries[low:high] if forward else entries[low:high][::-1]
+        candidates = (self._get(pk, sk) for _, pk, sk in selected)
+
+        def last_key(item):
+            key = {"PK": item["PK"], "SK": item["SK"], index.hash_key: item[index.hash_key]}
+            if index.range_key:
+                key[index.range_key] = item[index.range_key]
+            return key
+
+        return self._page(candidates, kwargs, expressions, last_key, "Query")
+
+    async def scan(self, **kwargs):
+        await self._round_trip()
+        expressions = self._expressions(kwargs, "Scan")
+        segment, segments = kwargs.get("Segment"), kwargs.get("TotalSegments")
+        partitions = sorted(self.partitions)
+        if segments:
+            partitions = [pk for pk in partitions if hash(pk) % segments == segment]
+        start = kwargs.get("ExclusiveStartKey")
+
+        def candidates():
+            for pk in partitions:
+                if start and pk < start["PK"]:
+                    continue
+                keys, items = self.partitions[pk]
+                low = bisect_right(keys, start["SK"]) if start and pk == start["PK"] else 0
+                for sk in keys[low:]:
+                    yield items[sk]
+
+        return self._page(candidates(), kwargs, expressions, lambda item: {"PK": item["PK"], "SK": item["SK"]},
+                          "Scan")
+
+    # Batches
+
+    def _table_requests(self, request_items: dict, operation: str):
+        unknown = set(request_items) - {self.name}
+        if unknown:
+            raise _error("ResourceNotFoundException", f"Requested resource not found: {', '.join(unknown)}",
+                         operation)
+        return request_items.get(self.name)
+
+    async def batch_get_item(self, **kwargs):
+        await self._round_trip()
+        request = self._table_requests(kwargs["RequestItems"], "BatchGetItem")
+        keys = [self._key(key, "BatchGetItem") for key in request["Keys"]]
+        if not keys or len(keys) > MAX_BATCH_GET_KEYS:
+            raise _validation(f"Too many items requested for the BatchGetItem call", "BatchGetItem")
+        if len(set(keys)) != len(keys):
+            raise _validation("Provided list of item keys contains duplicates", "BatchGetItem")
+        projection = None
+        if request.get("ProjectionExpression"):
+            expressions = Expressions(request.get("ExpressionAttributeNames"), None, "BatchGetItem")
+            projection = expressions.projection(request["ProjectionExpression"])
+            expressions.check_unused()
+        found, units = [], 0
+        for pk, sk in keys:
+            item = self._get(pk, sk)
+            units += self._read_units(self._stored_size(item), request.get("ConsistentRead", False))
+            if item is not None:
+                found.append(_clone(_project(item, projection) if projection else item))
+        response = {"Responses": {self.name: found}, "UnprocessedKeys": {}}
+        capacity = self._capacity(kwargs, read=units)
+        if capacity:
+            response["ConsumedCapacity"] = [capacity["ConsumedCapacity"]]
+        return response
+
+    async def batch_write_item(self, **kwargs):
+        await self._round_trip()
+        requests = self._table_requests(kwargs["RequestItems"], "BatchWriteItem")
+        if not requests or len(requests) > MAX_BATCH_WRITE_ITEMS:
+            raise _validation("Too many items requested for the BatchWriteItem call", "BatchWriteItem")
+        writes = []
+        for request in requests:
+            if "PutRequest" in request:
+                item = _store(request["PutRequest"]["Item"])
+                key = self._key({"PK": item.get("PK"), "SK": item.get("SK")}, "BatchWriteItem")
+                writes.append((key, item, self._check_size(item, "BatchWriteItem")))
+            else:
+                writes.append((self._key(request["DeleteRequest"]["Key"], "BatchWriteItem"), None, 0))
+        if len({key for key, _, _ in writes}) != len(writes):
+            raise _validation("Provided list of item keys contains duplicates", "BatchWriteItem")
+        units = 0
+        for (pk, sk), item, size in writes:
+            units += self._units(max(size, self.sizes.get((pk, sk), 0)), WRITE_UNIT_SIZE)
+            if item is not None:
+                self._put(item, size)
+            else:
+                self._delete(pk, sk)
+        response = {"UnprocessedItems": {}}
+        capacity = self._capacity(kwargs, write=units)
+        if capacity:
+            response["ConsumedCapacity"] = [capacity["ConsumedCapacity"]]
+        return response
+
+    # Transactions
+
+    async def transact_get_items(self, **kwargs):
+        await self._round_trip()
+        operations = kwargs["TransactItems"]
+        if not operations or len(operations) > MAX_TRANSACT_ITEMS:
+            raise _validation("Too many items in the TransactGetItems call", "TransactGetItems")
+        responses, units = [], 0
+        for operation in operations:
+            body = operation["Get"]
+            self._table_requests({body["TableName"]: None}, "TransactGetItems")
+            item = self._get(*self._key(body["Key"], "TransactGetItems"))
+            units += 2 * self._units(self._stored_size(item), READ_UNIT_SIZE)
+            if item is not None and body.get("ProjectionExpression"):
+                expressions = self._expressions(body, "TransactGetItems")
+                item = _project(item, expressions.projection(body["ProjectionExpression"]))
+            responses.append({"Item": _clone(item)} if item is not None else {})
+        response = {"Responses": responses}
+        capacity = self._capacity(kwargs, read=units)
+        if capacity:
+            response["ConsumedCapacity"] = [capacity["ConsumedCapacity"]]
+        return response
+
+    async def transact_write_items(self, **kwargs):
+        await self._round_trip()
+        operations = kwargs["TransactItems"]
+        if not operations or len(operations) > MAX_TRANSACT_ITEMS:
+            raise _validation("Too many items in the TransactWriteItems call", "TransactWriteItems")
+
+        # Step 1: Validate every operation and evaluate its condition against the current items
+        planned, reasons, seen = [], [], set()
+        for operation in operations:
+            (kind, body), = operation.items()
+            self._table_requests({body["TableName"]: None}, "TransactWriteItems")
+            expressions = self._expressions(body, "TransactWriteItems")
+            if kind == "Put":
+                item = _store(body["Item"])
+                key = self._key({"PK": item.get("PK"), "SK": item.get("SK")}, "TransactWriteItems")
+                size = self._check_size(item, "TransactWriteItems")
+            else:
+                key = self._key(body["Key"], "TransactWriteItems")
+            if key in seen:
+                raise _validation("Transaction request cannot include multiple operations on one item",
+                                  "TransactWriteItems")
+            seen.add(key)
+            current = self._get(*key)
+            holds = self._condition_holds(expressions, body.get("ConditionExpression"), current)
+            if kind == "Update":
+                actions = expressions.update(body["UpdateExpression"])
+                expressions.check_unused()
+                item, _ = self._updated(current, {"PK": key[0], "SK": key[1]}, actions, "TransactWriteItems")
+                size = self._check_size(item, "TransactWriteItems")
+            elif kind in ("Delete", "ConditionCheck"):
+                expressions.check_unused()
+                item, size = None, 0
+            else:
+                expressions.check_unused()
+            planned.append((kind, key, item, size))
+            reasons.append({"Code": "None"} if holds else
+                           {"Code": "ConditionalCheckFailed", "Message": "The conditional request failed"})
+        if any(reason["Code"] != "None" for reason in reasons):
+            codes = ", ".join(reason["Code"] for reason in reasons)
+            raise _error("TransactionCanceledException",
+                         f"Transaction cancelled, please refer cancellation reasons for specific reasons [{codes}]",
+                         "TransactWriteItems", CancellationReasons=reasons)
+
+        # Step 2: Apply them all; nothing awaits in between, so no other call sees a partial transaction
+        units = 0
+        for kind, (pk, sk), item, size in planned:
+            units += 2 * self._units(max(size, self.sizes.get((pk, sk), 0)), WRITE_UNIT_SIZE)
+            if kind in ("Put", "Update"):
+                self._put(item, size)
+            elif kind == "Delete":
+                self._delete(pk, sk)
+        response = {}
+        capacity = self._capacity(kwargs, write=units)
+        if capacity:
+            response["ConsumedCapacity"] = [capacity["ConsumedCapacity"]]
+        return response
+
+    async def close(self):
+        pass
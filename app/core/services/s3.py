@@ -1,23 +1,53 @@
+import asyncio
+import os
 import re
+import secrets
+import time
 
+from app.core.exceptions import ErrorCode
+from app.core.metrics import instrumented
 from app.core.services.base import FileService
+from app.core.signing import sign_token, verify_token
+from app.utils.constant import (
+    FILE_URL_EXPIRY,
+    S3_MIN_PART_SIZE,
+    UPLOAD_CHUNK_SIZE,
+    UPLOAD_MAX_SIZE,
+    UPLOAD_PART_SIZE,
+)
 
 from pathlib import Path
 from fastapi import UploadFile
 from botocore.exceptions import BotoCoreError, ClientError
+from starlette.concurrency import run_in_threadpool
 
 
 class S3Service(FileService):
     def __init__(self, is_local="development", s3_client=None, bucket_name=None, local_storage_dir="uploads",
-                 static_endpoint="/static/uploads"):
+                 static_endpoint="/static/uploads", max_upload_size: int = UPLOAD_MAX_SIZE,
+                 part_size: int = UPLOAD_PART_SIZE, multipart_concurrency: int = 4, signing_secret: str = None,
+                 files_endpoint="/files", url_expiry: int = FILE_URL_EXPIRY):
         """
         Initialize the file service for managing files locally or on S3.
+        Uploads larger than `max_upload_size` bytes are rejected; S3 uploads larger than `part_size` bytes are sent
+        as multipart uploads with up to `multipart_concurrency` parts in flight.
+        Direct upload/download URLs are valid for `url_expiry` seconds. On S3 they are presigned; in local storage
+        they point at `files_endpoint` with a token signed by `signing_secret`. The secret defaults to a random
+        one, so it must be set explicitly when several workers serve those URLs.
         """
+        if part_size < S3_MIN_PART_SIZE:
+            raise ValueError(f"part_size must be at least {S3_MIN_PART_SIZE} bytes")
         self.is_local = is_local == "development"
         self.s3_client = s3_client
         self.bucket_name = bucket_name
         self.local_storage_dir = local_storage_dir
         self.static_endpoint = static_endpoint
+        self.max_upload_size = max_upload_size
+        self.part_size = part_size
+        self.multipart_concurrency = multipart_concurrency
+        self.signing_secret = signing_secret or secrets.token_urlsafe(32)
+        self.files_endpoint = files_endpoint
+        self.url_expiry = url_expiry
 
         if not self.s3_client and not self.is_local:
             raise ValueError("Either s3_client must be provided or is_local must be True")
@@ -25,25 +55,224 @@ class S3Service(FileService):
         if not self.is_local:
             Path(self.local_storage_dir).mkdir(parents=True, exist_ok=True)
 
-    def upload_file(self, file: UploadFile, key: str) -> str:
-        """Upload file to S3 or local storage."""
+    @instrumented("s3", key=lambda self, file, key: key, size=lambda self, file, key: file.size)
+    async def upload_file(self, file: UploadFile, key: str) -> str:
+        """
+        Stream a file to S3 or local storage in fixed-size chunks, off the event loop and without reading
+        it into memory. Fails with 413 once more than `max_upload_size` bytes have been read. By then the form
+        has already been received, so routes taking uploads also refuse oversized bodies up front (UploadRoute).
+        """
+        if file.size is not None and file.size > self.max_upload_size:
+            raise self._too_large()
+        if self.is_local:
+            await self._write_local(key, self._limited(self._read_chunks(file, UPLOAD_CHUNK_SIZE)))
+            return self.file_url(key)
+        try:
+            await self._upload_s3(file, key)
+            return self.file_url(key)
+        except (BotoCoreError, ClientError) as e:
+            raise Exception(f"S3 upload failed: {str(e)}")
+
+    def file_url(self, key: str) -> str:
+        """
+        URL recorded for a stored file.
+        """
         if self.is_local:
-            # Local file upload
-            file_path = Path(self.local_storage_dir) / key
-            file_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(file_path, "wb") as f:
-                f.write(file.file.read())
             return f"{self.static_endpoint}/{key}"
+        return f"https://{self.bucket_name}.s3.amazonaws.com/{key}"
 
+    def file_key(self, file_url: str) -> str:
+        """
+        Storage key of a file from the URL returned by `file_url`.
+        """
+        if file_url.startswith(self.static_endpoint):
+            return file_url[len(self.static_endpoint) + 1:]
+        return re.sub(r'https://[^/]+/([^/]+/.*)', r'\1', file_url)
+
+    def create_upload_url(self, key: str, content_type: str, size: int) -> dict:
+        """
+        URL a client can PUT the file to directly, with the headers it must send.
+        The declared `size` is part of the signature, so a larger body is refused by the storage.
+        """
+        if size > self.max_upload_size:
+            raise self._too_large()
+        headers = {"Content-Type": content_type, "Content-Length": str(size)}
+        if self.is_local:
+            token = sign_token(self.signing_secret, {"key": key, "method": "PUT", "size": size}, self.url_expiry)
+            url = f"{self.files_endpoint}/{token}"
         else:
-            # S3 upload
+            url = self.s3_client.generate_presigned_url(
+                "put_object",
+                Params={"Bucket": self.bucket_name, "Key": key, "ContentType": content_type, "ContentLength": size},
+                ExpiresIn=self.url_expiry,
+            )
+        return {"url": url, "method": "PUT", "headers": headers, "expires_at": int(time.time()) + self.url_expiry}
+
+    def create_download_url(self, file_url: str) -> dict:
+        """
+        Short-lived URL a client can GET a stored file from directly.
+        """
+        key = self.file_key(file_url)
+        if self.is_local:
+            token = sign_token(self.signing_secret, {"key": key, "method": "GET"}, self.url_expiry)
+            url = f"{self.files_endpoint}/{token}"
+        else:
+            url = self.s3_client.generate_presigned_url(
+                "get_object", Params={"Bucket": self.bucket_name, "Key": key}, ExpiresIn=self.url_expiry,
+            )
+        return {"url": url, "method": "GET", "headers": {}, "expires_at": int(time.time()) + self.url_expiry}
+
+    @instrumented("s3")
+    async def get_file_size(self, key: str):
+        """
+        Size in bytes of a stored file, or None if it does not exist.
+        """
+        if self.is_local:
+            file_path = Path(self.local_storage_dir) / key
             try:
-                self.s3_client.upload_fileobj(file.file, self.bucket_name, key)
-                return f"https://{self.bucket_name}.s3.amazonaws.com/{key}"
-            except (BotoCoreError, ClientError) as e:
-                raise Exception(f"S3 upload failed: {str(e)}")
+                return (await run_in_threadpool(file_path.stat)).st_size
+            except FileNotFoundError:
+                return None
+        try:
+            response = await run_in_threadpool(self.s3_client.head_object, Bucket=self.bucket_name, Key=key)
+            return response["ContentLength"]
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    def verify_file_token(self, token: str, method: str) -> dict:
+        """
+        Check a local-storage token issued by `create_upload_url`/`create_download_url` for `method`.
+        """
+        payload = verify_token(self.signing_secret, token)
+        if payload.get("method") != method:
+            raise ErrorCode.Forbidden("Invalid file token.")
+        return payload
+
+    async def receive_upload(self, token: str, chunks) -> str:
+        """
+        Store a body PUT to a local upload URL, refusing it once it exceeds the size it was signed for.
+        """
+        payload = self.verify_file_token(token, "PUT")
+        await self._write_local(payload["key"], self._limited(chunks, min(payload["size"], self.max_upload_size)))
+        return payload["key"]
+
+    def local_path(self, token: str) -> Path:
+        """
+        Path of the locally stored file a download token grants access to.
+        """
+        file_path = Path(self.local_storage_dir) / self.verify_file_token(token, "GET")["key"]
+        if not file_path.is_file():
+            raise ErrorCode.NotFound("File", token)
+        return file_path
+
+    def _too_large(self):
+        return ErrorCode.PayloadTooLarge(f"File exceeds the maximum upload size of {self.max_upload_size} bytes.")
+
+    @staticmethod
+    async def _read_chunks(file: UploadFile, chunk_size: int):
+        """
+        Yield the content of an upload `chunk_size` bytes at a time.
+        """
+        while chunk := await file.read(chunk_size):
+            yield chunk
+
+    async def _limited(self, chunks, max_size: int = None):
+        """
+        Pass chunks through, failing with 413 as soon as they add up to more than `max_size` bytes
+        (`max_upload_size` by default).
+        """
+        max_size = self.max_upload_size if max_size is None else max_size
+        size = 0
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > max_size:
+                raise ErrorCode.PayloadTooLarge(f"File exceeds the maximum upload size of {max_size} bytes.")
+            yield chunk
+
+    async def _write_local(self, key: str, chunks):
+        # Write to a temporary name first so a failed or rejected upload never leaves a truncated file behind
+        file_path = Path(self.local_storage_dir) / key
+        partial_path = file_path.with_name(f"{file_path.name}.part")
+        await run_in_threadpool(file_path.parent.mkdir, parents=True, exist_ok=True)
+        f = await run_in_threadpool(open, partial_path, "wb")
+        try:
+            async for chunk in chunks:
+                await run_in_threadpool(f.write, chunk)
+        except BaseException:
+            await run_in_threadpool(f.close)
+            await run_in_threadpool(partial_path.unlink, missing_ok=True)
+            raise
+        await run_in_threadpool(f.close)
+        await run_in_threadpool(os.replace, partial_path, file_path)
+
+    async def _upload_s3(self, file: UploadFile, key: str):
+        chunks = self._limited(self._read_chunks(file, self.part_size))
+        first_part = await anext(chunks, b"")
+        second_part = await anext(chunks, None)
+        if second_part is None:
+            # Small enough for a single request
+            await run_in_threadpool(self.s3_client.put_object, Bucket=self.bucket_name, Key=key, Body=first_part)
+            return
+        await self._upload_multipart(key, first_part, second_part, chunks)
+
+    async def _upload_multipart(self, key: str, first_part: bytes, second_part: bytes, chunks):
+        """
+        Upload the parts of a large file concurrently. At most `multipart_concurrency` parts are read ahead,
+        which bounds memory use; the multipart upload is aborted if anything fails.
+        """
+        upload = {"Bucket": self.bucket_name, "Key": key}
+        upload_id = (await run_in_threadpool(self.s3_client.create_multipart_upload, **upload))["UploadId"]
+        slots = asyncio.Semaphore(self.multipart_concurrency)
+        tasks = []
+
+        async def upload_part(number: int, body: bytes):
+            try:
+                response = await run_in_threadpool(self.s3_client.upload_part, UploadId=upload_id, PartNumber=number,
+                                                   Body=body, **upload)
+                return {"PartNumber": number, "ETag": response["ETag"]}
+            finally:
+                slots.release()
+
+        async def parts():
+            yield first_part
+            yield second_part
+            async for chunk in chunks:
+                yield chunk
+
+        try:
+            body_parts = parts()
+            while True:
+                await slots.acquire()
+                body = await anext(body_parts, None)
+                if body is None:
+                    slots.release()
+                    break
+                if any(task.done() and task.exception() for task in tasks):
+                    break  # A part failed, gather below raises its error
+                tasks.append(asyncio.create_task(upload_part(len(tasks) + 1, body)))
+            uploaded = await asyncio.gather(*tasks)
+            await run_in_threadpool(self.s3_client.complete_multipart_upload, UploadId=upload_id,
+                                    MultipartUpload={"Parts": uploaded}, **upload)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            try:
+                await run_in_threadpool(self.s3_client.abort_multipart_upload, UploadId=upload_id, **upload)
+            except (BotoCoreError, ClientError):
+                pass
+            raise
+
+    @instrumented("s3", key=lambda self, file_url: self.file_key(file_url))
+    async def delete_file(self, file_url: str):
+        """
+        Delete file from S3 or local storage based on the provided URL, off the event loop.
+        """
+        return await run_in_threadpool(self._delete_file, file_url)
 
-    def delete_file(self, file_url: str):
+    def _delete_file(self, file_url: str):
         """
         Delete file from S3 or local storage based on the provided URL.
         If the URL is local (starts with static endpoint), delete it from local storage.
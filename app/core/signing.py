@@ -0,0 +1,42 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import time
+
+from app.core.exceptions import ErrorCode
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _b64decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+def sign_token(secret: str, payload: dict, expires_in: int) -> str:
+    """
+    Encode `payload` as a URL-safe token, signed with HMAC-SHA256 and valid for `expires_in` seconds.
+    """
+    body = _b64encode(json.dumps({**payload, "exp": int(time.time()) + expires_in}, separators=(",", ":")).encode())
+    signature = _b64encode(hmac.new(secret.encode(), body.encode(), hashlib.sha256).digest())
+    return f"{body}.{signature}"
+
+
+def verify_token(secret: str, token: str) -> dict:
+    """
+    Return the payload of a token produced by `sign_token`, raising 403 if it was tampered with or has expired.
+    """
+    body, _, signature = token.partition(".")
+    expected = _b64encode(hmac.new(secret.encode(), body.encode(), hashlib.sha256).digest())
+    if not hmac.compare_digest(signature, expected):
+        raise ErrorCode.Forbidden("Invalid file token.")
+    try:
+        payload = json.loads(_b64decode(body))
+    except (binascii.Error, ValueError):
+        raise ErrorCode.Forbidden("Invalid file token.")
+    if payload.get("exp", 0) < time.time():
+        raise ErrorCode.Forbidden("File token has expired.")
+    return payload
@@ -1,12 +1,28 @@
+import argparse
+
 import boto3
+from boto3.dynamodb.conditions import Attr, Key
 from botocore.exceptions import ClientError
 
+from app.utils.constant import ENTITY_TYPE_ATTRIBUTE, GSI_ENTITY_TYPE, TOMBSTONE_ATTRIBUTE
+
+# Entity types projected into the sparse entity-type GSI, keyed by their PK prefix
+INDEXED_ENTITY_TYPES = ["ORG"]
+
+ENTITY_TYPE_INDEX = {
+    "IndexName": GSI_ENTITY_TYPE,
+    "KeySchema": [
+        {"AttributeName": ENTITY_TYPE_ATTRIBUTE, "KeyType": "HASH"},
+        {"AttributeName": "PK", "KeyType": "RANGE"},
+    ],
+    "Projection": {"ProjectionType": "ALL"},
+}
+
 
-def initialize_dynamodb_table(dynamodb_resource):
+def initialize_dynamodb_table(dynamodb_resource, table_name: str = "ManagerTable"):
     """
     Initialize the DynamoDB table with the required schema.
     """
-    table_name = "ManagerTable"
     try:
         # Check if the table already exists
         existing_tables = dynamodb_resource.meta.client.list_tables()["TableNames"]
@@ -22,13 +38,131 @@ def initialize_dynamodb_table(dynamodb_resource):
                 AttributeDefinitions=[
                     {"AttributeName": "PK", "AttributeType": "S"},
                     {"AttributeName": "SK", "AttributeType": "S"},
+                    {"AttributeName": ENTITY_TYPE_ATTRIBUTE, "AttributeType": "S"},
                 ],
+                GlobalSecondaryIndexes=[ENTITY_TYPE_INDEX],
                 BillingMode="PAY_PER_REQUEST",  # Use on-demand billing
             )
             print(f"Table '{table_name}' created successfully.")
         else:
             print(f"Table '{table_name}' already exists.")
+            if not has_index(dynamodb_resource, table_name, GSI_ENTITY_TYPE):
+                print(f"Index '{GSI_ENTITY_TYPE}' is missing, run 'python -m app.init_table migrate'.")
     except ClientError as e:
         print(f"ClientError: {e.response['Error']['Message']}")
     except Exception as e:
         print(f"Error initializing table: {e}")
+
+
+def has_index(dynamodb_resource, table_name: str, index_name: str) -> bool:
+    """
+    Check whether the table already has the given global secondary index.
+    """
+    table = dynamodb_resource.Table(table_name)
+    return any(index["IndexName"] == index_name for index in table.global_secondary_indexes or [])
+
+
+def migrate_dynamodb_table(dynamodb_resource, table_name: str = "ManagerTable"):
+    """
+    Bring an existing table up to date: add the entity-type GSI if it is missing, backfill the EntityType
+    attribute on META rows and the inverted user-to-task rows written before they existed.
+    """
+    if not has_index(dynamodb_resource, table_name, GSI_ENTITY_TYPE):
+        dynamodb_resource.meta.client.update_table(
+            TableName=table_name,
+            # Every key attribute of the new index must be defined, including PK, its range key
+            AttributeDefinitions=[
+                {"AttributeName": "PK", "AttributeType": "S"},
+                {"AttributeName": ENTITY_TYPE_ATTRIBUTE, "AttributeType": "S"},
+            ],
+            GlobalSecondaryIndexUpdates=[{"Create": ENTITY_TYPE_INDEX}],
+        )
+        print(f"Index '{GSI_ENTITY_TYPE}' is being created on '{table_name}'.")
+
+    print(f"Backfilled {backfill_entity_types(dynamodb_resource, table_name)} items.")
+    print(f"Backfilled {backfill_user_task_index(dynamodb_resource, table_name)} user-to-task rows.")
+
+
+def _scan_all(table, **scan_kwargs):
+    while True:
+        response = table.scan(**scan_kwargs)
+        yield from response.get("Items", [])
+        if "LastEvaluatedKey" not in response:
+            return
+        scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def backfill_entity_types(dynamodb_resource, table_name: str = "ManagerTable") -> int:
+    """
+    Tag every live META row of an indexed entity type with its EntityType so it appears in the sparse GSI.
+    Tombstoned rows are skipped, including ones deleted while the migration runs, so deleted entities do not
+    reappear in the index. The scan is a one-off cost paid by the migration, never by the API.
+    """
+    table = dynamodb_resource.Table(table_name)
+    updated = 0
+    untagged = (Key("SK").eq("META") & Attr(ENTITY_TYPE_ATTRIBUTE).not_exists()
+                & Attr(TOMBSTONE_ATTRIBUTE).not_exists())
+    for item in _scan_all(table, FilterExpression=untagged, ProjectionExpression="PK, SK"):
+        entity_type = item["PK"].split("#", 1)[0]
+        if entity_type not in INDEXED_ENTITY_TYPES:
+            continue
+        try:
+            table.update_item(
+                Key={"PK": item["PK"], "SK": item["SK"]},
+                UpdateExpression="SET #type = :type",
+                ExpressionAttributeNames={"#type": ENTITY_TYPE_ATTRIBUTE},
+                ExpressionAttributeValues={":type": entity_type},
+                ConditionExpression=Attr("PK").exists() & Attr(TOMBSTONE_ATTRIBUTE).not_exists(),
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            continue
+        updated += 1
+    return updated
+
+
+def backfill_user_task_index(dynamodb_resource, table_name: str = "ManagerTable") -> int:
+    """
+    Write the inverted USER#<user>/TASK#<project>#<task> row for every TASK#<task>/USER#<user> assignment.
+    Task rows are scanned first to learn which project each task belongs to.
+    """
+    table = dynamodb_resource.Table(table_name)
+    task_projects = {
+        item["SK"].split("#", 1)[1]: item["PK"].split("#", 1)[1]
+        for item in _scan_all(table, FilterExpression=Key("PK").begins_with("PROJECT#")
+                              & Key("SK").begins_with("TASK#"), ProjectionExpression="PK, SK")
+    }
+    written = 0
+    with table.batch_writer() as batch:
+        task_users = _scan_all(table, FilterExpression=Key("PK").begins_with("TASK#") & Key("SK").begins_with("USER#"))
+        for item in task_users:
+            task_uuid = item["PK"].split("#", 1)[1]
+            user_uuid = item["SK"].split("#", 1)[1]
+            project_uuid = task_projects.get(task_uuid)
+            if not project_uuid:
+                continue
+            batch.put_item(Item={
+                "PK": f"USER#{user_uuid}",
+                "SK": f"TASK#{project_uuid}#{task_uuid}",
+                **({"AddedAt": item["AddedAt"]} if "AddedAt" in item else {}),
+            })
+            written += 1
+    return written
+
+
+if __name__ == "__main__":
+    from app.core.container import Container
+
+    parser = argparse.ArgumentParser(description="Manage the DynamoDB table schema.")
+    parser.add_argument("command", choices=["init", "migrate"],
+                        help="'init' creates the table, 'migrate' adds missing indexes and backfills them")
+    args = parser.parse_args()
+
+    container = Container()
+    resource = container.dynamodb_resource()
+    table_name = container.config.table_name()
+    if args.command == "init":
+        initialize_dynamodb_table(resource, table_name)
+    else:
+        migrate_dynamodb_table(resource, table_name)
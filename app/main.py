@@ -1,11 +1,18 @@
 import os
+import time
 
 from fastapi import FastAPI, Request, Response, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 
 from app.core.container import Container
+from app.core.metrics import STORAGE_CALLS_HEADER, metrics_scope, record_request
+from app.core.request_cache import REQUEST_CACHE_HITS_HEADER, request_scope
 from app.exceptions import StandardException
+from app.modules.v1.admin.router import router as admin_router
+from app.modules.v1.files.router import router as files_router
+from app.modules.v1.jobs.router import router as jobs_router
+from app.modules.v1.metrics.router import router as metrics_router
 from app.modules.v1.organizations.router import router as org_router
 from app.init_table import initialize_dynamodb_table
 
@@ -14,7 +21,8 @@ def create_app() -> FastAPI:
     """
     Create and configure the FastAPI application.
     """
-    app = FastAPI()
+    # orjson encodes response bodies several times faster than the json module
+    app = FastAPI(default_response_class=ORJSONResponse)
 
     # Ensure the 'uploads' directory exists
     local_storage_dir = "uploads"
@@ -30,26 +38,82 @@ def create_app() -> FastAPI:
             content={"message": exc.detail},
         )
 
+    @app.middleware("http")
+    async def request_cache_middleware(request: Request, call_next):
+        """
+        Serve repeated reads of the same item within a request from memory,
+        reporting how many DynamoDB reads were avoided.
+        """
+        with request_scope() as cache:
+            response = await call_next(request)
+        response.headers[REQUEST_CACHE_HITS_HEADER] = str(cache.hits)
+        return response
+
+    @app.middleware("http")
+    async def metrics_middleware(request: Request, call_next):
+        """
+        Account the storage operations of each request under its route template and organization,
+        reporting how many DynamoDB calls it made. A 404 is not attributed to the organization in its path, which
+        may not exist, so arbitrary UUIDs cannot grow the per-organization series.
+        """
+        start = time.perf_counter()
+        with metrics_scope() as metrics:
+            response = await call_next(request)
+        if response.status_code != 404:
+            metrics.organization = request.path_params.get("organization_uuid", metrics.organization)
+        route = request.scope.get("route")
+        record_request(route.path if route is not None else "unmatched", request.method, response.status_code,
+                       time.perf_counter() - start, metrics)
+        response.headers[STORAGE_CALLS_HEADER] = str(metrics.dynamodb_calls)
+        return response
+
     # Dependency Injection Container
     container = Container()
     container.config.region_name.from_env("AWS_REGION", default="us-east-1")
     container.config.table_name.from_env("DYNAMODB_TABLE", default="ManagerTable")
     container.wire(modules=[
         "app.modules.v1.organizations.router",
+        "app.modules.v1.jobs.router",
+        "app.modules.v1.files.router",
+        "app.modules.v1.metrics.router",
     ])
     app.container = container
 
     # Include Routers
     app.include_router(org_router, prefix="/organizations", tags=["Organizations"])
+    app.include_router(jobs_router, prefix="/jobs", tags=["Jobs"])
+    app.include_router(files_router, prefix="/files", tags=["Files"])
+    app.include_router(metrics_router, prefix="/metrics", tags=["Metrics"])
+    app.include_router(admin_router, prefix="/admin", tags=["Admin"])
 
     # Initialize DynamoDB Table on Startup
     @app.on_event("startup")
     async def on_startup():
         """
         Event triggered when the application starts.
-        Initializes the DynamoDB table with required structure and GSIs.
+        Initializes the DynamoDB table with required structure and GSIs (the in-memory backend creates its own).
+        """
+        if container.config.dynamodb_backend() != "memory":
+            initialize_dynamodb_table(container.dynamodb_resource(), container.config.table_name())
+        await container.log_service().start()
+        await container.entity_cache().start()
+        await container.job_runner().start()
+        if container.blob_collector() is not None:
+            await container.blob_collector().start()
+
+    @app.on_event("shutdown")
+    async def on_shutdown():
+        """
+        Event triggered when the application stops.
+        Stops the background job workers, leaves the cache invalidation bus, releases the shared DynamoDB
+        connection pool and flushes the queued log messages.
         """
-        initialize_dynamodb_table(container.dynamodb_resource())
+        await container.job_runner().stop()
+        if container.blob_collector() is not None:
+            await container.blob_collector().stop()
+        await container.entity_cache().stop()
+        await container.dynamodb_table().close()
+        await container.log_service().stop()
 
     return app
 
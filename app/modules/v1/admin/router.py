@@ -0,0 +1,26 @@
+from datetime import datetime
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Query
+
+from app.core.metrics import capacity_ledger
+from app.modules.v1.admin.schemas import CapacityReport
+
+router = APIRouter()
+
+
+@router.get("/capacity/", response_model=CapacityReport, status_code=200)
+async def get_capacity(
+        group_by: Literal["organization", "route"] = "organization",
+        organization_uuid: Optional[str] = None,
+        limit: Optional[int] = Query(None, ge=1),
+):
+    """
+    DynamoDB capacity units consumed since this process started, grouped by organization or route, most expensive
+    first. Pass `organization_uuid` to break down a single tenant's usage by route.
+    """
+    return {
+        "group_by": group_by,
+        "since": datetime.utcfromtimestamp(capacity_ledger.since),
+        "items": capacity_ledger.summary(group_by=group_by, organization=organization_uuid, limit=limit),
+    }
@@ -0,0 +1 @@
+from .capacity import CapacityReport
@@ -0,0 +1,19 @@
+from datetime import datetime
+from typing import Literal, Optional
+
+from pydantic import BaseModel
+
+
+class CapacityUsage(BaseModel):
+    organization: Optional[str] = None
+    route: Optional[str] = None
+    calls: int
+    read_units: float
+    write_units: float
+    capacity_units: float
+
+
+class CapacityReport(BaseModel):
+    group_by: Literal["organization", "route"]
+    since: datetime
+    items: list[CapacityUsage]
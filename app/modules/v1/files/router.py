@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import FileResponse
+from dependency_injector.wiring import Provide, inject
+from app.core.container import Container
+
+router = APIRouter()
+
+
+@router.put("/{token}", status_code=204)
+@inject
+async def upload_file(
+        token: str,
+        request: Request,
+        service=Depends(Provide[Container.file_storage]),
+):
+    """
+    Receive a file PUT to a local-storage upload URL, streaming the body to disk.
+    """
+    await service.receive_upload(token, request.stream())
+
+
+@router.get("/{token}", response_class=FileResponse)
+@inject
+async def download_file(
+        token: str,
+        service=Depends(Provide[Container.file_storage]),
+):
+    """
+    Serve a locally stored file through a signed download URL.
+    """
+    return FileResponse(service.local_path(token))
@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Depends
+from dependency_injector.wiring import Provide, inject
+from app.core.container import Container
+from app.modules.v1.jobs.schemas import JobResponse
+
+router = APIRouter()
+
+
+@router.get("/{job_uuid}/", response_model=JobResponse, status_code=200)
+@inject
+async def get_job(
+        job_uuid: str,
+        service=Depends(Provide[Container.job_service]),
+):
+    """
+    Get the status and progress of a background job.
+    """
+    return await service.get_job(job_uuid=job_uuid)
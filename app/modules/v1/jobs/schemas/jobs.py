@@ -0,0 +1,29 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from pydantic import BaseModel, Field, ConfigDict, model_validator
+
+
+class JobResponse(BaseModel):
+    # Set model configuration here using model_config (instead of Config)
+    model_config = ConfigDict(populate_by_name=True)
+
+    uuid: UUID
+    type: str = Field(..., validation_alias="Type")
+    target: str = Field(..., validation_alias="Target")
+    status: str = Field(..., validation_alias="Status")
+    progress: dict[str, int] = Field(default_factory=dict, validation_alias="Progress")
+    error: Optional[str] = Field(None, validation_alias="Error")
+    created_at: Optional[datetime] = Field(None, validation_alias="CreatedAt")
+    updated_at: Optional[datetime] = Field(None, validation_alias="UpdatedAt")
+
+    @model_validator(mode='before')
+    def extract_id(cls, values):
+        """
+        Extracts the actual 'uuid' from the 'PK' field (e.g., 'JOB#12345' -> '12345').
+        """
+        pk_value = values.get("PK")
+        if pk_value and pk_value.startswith("JOB#"):
+            values["uuid"] = pk_value.split("#", 1)[1]
+        return values
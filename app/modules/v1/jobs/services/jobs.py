@@ -0,0 +1,142 @@
+from datetime import datetime
+
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+from app.core.exceptions import ErrorCode
+from app.core.services import BaseService, LogService
+from app.utils.constant import ENTITY_TYPE_ATTRIBUTE, JOB_MAX_ATTEMPTS
+
+
+class JobService(BaseService):
+    """
+    Persists background jobs as JOB#<uuid>/META records so they survive restarts.
+    Unfinished jobs carry EntityType=JOB and therefore sit in the sparse entity-type index,
+    which is how workers find them again; the attribute is removed once a job is finished.
+    A job is processed by whichever worker holds its lease (LeaseOwner/LeaseExpiresAt).
+    """
+
+    def __init__(self, table, log_service: LogService):
+        super().__init__(table, pk_prefix="JOB", service_name="Job")
+        self.log_service = log_service
+
+    @staticmethod
+    def now() -> int:
+        return int(datetime.utcnow().timestamp())
+
+    async def create_job(self, job_uuid: str, job_type: str, target: str):
+        """
+        Register a pending job.
+        """
+        attributes = {
+            "Type": job_type,
+            "Target": target,
+            "Status": "PENDING",
+            "Progress": {},
+            "Attempts": 0,
+            "CreatedAt": self.now(),
+            "UpdatedAt": self.now(),
+            ENTITY_TYPE_ATTRIBUTE: self.pk_prefix,
+        }
+        return await self.create_item(identifier=job_uuid, sk="META", attributes=attributes)
+
+    async def get_job(self, job_uuid: str):
+        """
+        Get the status and progress of a job.
+        """
+        return await self.get_item(identifier=job_uuid, sk="META")
+
+    async def get_unfinished_jobs(self):
+        """
+        Retrieve every job that is pending or running.
+        """
+        return (await self.get_all_meta()).items
+
+    async def _update_job(self, job_uuid: str, attributes: dict, condition=None, remove: tuple = (),
+                          increment: dict = None):
+        attributes = {**attributes, "UpdatedAt": self.now()}
+        increment = increment or {}
+        update_expression = "SET " + ", ".join(f"#{k}=:{k}" for k in attributes)
+        if remove:
+            update_expression += " REMOVE " + ", ".join(f"#{k}" for k in remove)
+        if increment:
+            update_expression += " ADD " + ", ".join(f"#{k} :{k}" for k in increment)
+        kwargs = {
+            "Key": {"PK": f"{self.pk_prefix}#{job_uuid}", "SK": "META"},
+            "UpdateExpression": update_expression,
+            "ExpressionAttributeNames": {f"#{k}": k for k in (*attributes, *remove, *increment)},
+            "ExpressionAttributeValues": {f":{k}": v for k, v in {**attributes, **increment}.items()},
+            "ReturnValues": "ALL_NEW",
+        }
+        if condition is not None:
+            kwargs["ConditionExpression"] = condition
+        try:
+            response = await self.table.update_item(**kwargs)
+            return response["Attributes"]
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                return None
+            raise ErrorCode.BadRequest(str(e))
+        finally:
+            self.invalidate(kwargs["Key"]["PK"])
+
+    async def claim_job(self, job_uuid: str, owner: str, lease_seconds: int):
+        """
+        Take the lease of an unfinished job whose lease is free or expired.
+        Returns the job, or None if it is finished or its lease is held, even by `owner` itself: a live lease
+        means the job is already running, so a second copy of it must not start.
+        """
+        now = self.now()
+        lease_is_free = Attr("LeaseExpiresAt").not_exists() | Attr("LeaseExpiresAt").lt(now)
+        return await self._update_job(
+            job_uuid,
+            {"Status": "RUNNING", "LeaseOwner": owner, "LeaseExpiresAt": now + lease_seconds},
+            condition=Attr(ENTITY_TYPE_ATTRIBUTE).exists() & lease_is_free,
+            increment={"Attempts": 1},
+        )
+
+    async def _update_leased_job(self, job_uuid: str, owner: str, attributes: dict, remove: tuple = ()):
+        """
+        Update a job only while `owner` holds its lease.
+        Raises if the lease was lost, so a worker whose lease expired cannot overwrite the job of the worker
+        that took it over.
+        """
+        job = await self._update_job(job_uuid, attributes, condition=Attr("LeaseOwner").eq(owner), remove=remove)
+        if not job:
+            raise Exception(f"Lease on job {job_uuid} was lost")
+        return job
+
+    async def checkpoint_job(self, job_uuid: str, owner: str, lease_seconds: int, progress: dict, checkpoint: str):
+        """
+        Persist the progress of a running job and extend its lease.
+        Raises if the lease was lost, so the handler stops instead of racing another worker.
+        """
+        return await self._update_leased_job(
+            job_uuid, owner,
+            {"Progress": progress, "Checkpoint": checkpoint, "LeaseExpiresAt": self.now() + lease_seconds},
+        )
+
+    async def complete_job(self, job_uuid: str, owner: str, progress: dict):
+        """
+        Mark a job as completed and drop it from the unfinished-jobs index.
+        Raises if `owner` lost the lease in the meantime.
+        """
+        job = await self._update_leased_job(job_uuid, owner, {"Status": "COMPLETED", "Progress": progress},
+                                            remove=(ENTITY_TYPE_ATTRIBUTE, "LeaseOwner", "LeaseExpiresAt"))
+        self.log_service.log(f"Job {job_uuid} completed: {progress}")
+        return job
+
+    async def fail_job(self, job_uuid: str, owner: str, error: str):
+        """
+        Record a failed attempt. The job is released for a retry until it has used all its attempts.
+        Raises if `owner` lost the lease in the meantime.
+        """
+        job = await self.get_job(job_uuid)
+        if int(job.get("Attempts", 0)) < JOB_MAX_ATTEMPTS:
+            job = await self._update_leased_job(job_uuid, owner,
+                                                {"Status": "PENDING", "Error": error, "LeaseExpiresAt": 0})
+        else:
+            job = await self._update_leased_job(job_uuid, owner, {"Status": "FAILED", "Error": error},
+                                                remove=(ENTITY_TYPE_ATTRIBUTE, "LeaseOwner", "LeaseExpiresAt"))
+        self.log_service.log(f"Job {job_uuid} failed: {error}")
+        return job
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from dependency_injector.wiring import Provide, inject
+from app.core.container import Container
+from app.core.metrics import registry
+from app.core.request_cache import request_cache_stats
+
+router = APIRouter()
+
+
+@router.get("", response_class=PlainTextResponse, status_code=200)
+@inject
+async def get_metrics(
+        entity_cache=Depends(Provide[Container.entity_cache]),
+):
+    """
+    Expose this process's request, storage and cache metrics in the Prometheus text format.
+    """
+    gauges = {
+        "app_request_cache_total": {(("outcome", name),): value for name, value in request_cache_stats.items()},
+        "app_entity_cache_total": {
+            (("entity", entity), ("outcome", name)): value
+            for entity, stats in entity_cache.stats.items() for name, value in stats.items()
+        },
+    }
+    return PlainTextResponse(registry.render(gauges), media_type="text/plain; version=0.0.4")
@@ -1,20 +1,38 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from dependency_injector.wiring import Provide, inject
+from app.core.bulk import ndjson_lines, ndjson_stream, read_rows
 from app.core.container import Container
+from app.core.pagination import PageParams, paginated
+from app.core.routing import UploadRoute
+from app.core.serialization import FieldParams
+from app.modules.v1.jobs.schemas import JobResponse
 from app.modules.v1.organizations.schemas import (
+    BulkCreateResponse,
     OrganizationCreate,
     OrganizationResponse,
+    OrganizationImportResponse,
+    ORGANIZATION_SERIALIZER,
     TaskCreate,
+    TaskBulkCreate,
     TaskResponse,
     AddTaskUser,
+    TaskFileUpload,
+    TaskFileFinalize,
+    FileUrlResponse,
+    TASK_SERIALIZER,
     ProjectCreate,
     ProjectResponse,
     AddProjectUser,
+    PROJECT_SERIALIZER,
     UserCreate,
     UserResponse,
+    USER_SERIALIZER,
 )
 
 router = APIRouter()
+# Routes receiving a file in a multipart form, whose size is checked before the body is read
+upload_router = APIRouter(route_class=UploadRoute)
 
 
 # Organizations CRUD
@@ -35,24 +53,34 @@ async def create_organization(
 @router.get("/", response_model=list[OrganizationResponse], status_code=200)
 @inject
 async def get_all_organizations(
+        response: Response,
+        page: PageParams = Depends(),
+        fields: FieldParams = Depends(),
         service=Depends(Provide[Container.organization_service]),
 ):
     """
-    Get all organizations.
+    Get all organizations, optionally one page at a time.
     """
-    return await service.get_all_organizations()
+    serializer = ORGANIZATION_SERIALIZER.select(fields.fields)
+    organizations = await service.get_all_organizations(limit=page.limit, cursor=page.cursor,
+                                                        projection=serializer.projection)
+    return paginated(response, organizations, serializer)
 
 
 @router.get("/{organization_uuid}/", response_model=OrganizationResponse, status_code=200)
 @inject
 async def get_organization(
         organization_uuid: str,
+        fields: FieldParams = Depends(),
         service=Depends(Provide[Container.organization_service]),
 ):
     """
     Get organization details by UUID.
     """
-    return await service.get_organization(organization_uuid=organization_uuid)
+    serializer = ORGANIZATION_SERIALIZER.select(fields.fields)
+    return serializer.item_response(
+        await service.get_organization(organization_uuid=organization_uuid, projection=serializer.projection)
+    )
 
 
 @router.put("/{organization_uuid}/", response_model=OrganizationResponse, status_code=200)
@@ -70,16 +98,52 @@ async def update_organization(
     )
 
 
-@router.delete("/{organization_uuid}/", status_code=204)
+@router.delete("/{organization_uuid}/", response_model=JobResponse, status_code=202)
 @inject
 async def delete_organization(
         organization_uuid: str,
         service=Depends(Provide[Container.organization_service]),
+        job_runner=Depends(Provide[Container.job_runner]),
 ):
     """
     Delete an organization by UUID.
+    The organization disappears immediately; its data is removed by a background job whose
+    progress is available at /jobs/{job_uuid}/.
+    """
+    job = await service.delete_organization(organization_uuid=organization_uuid)
+    job_runner.submit(service.extract_uuid(job["PK"], prefix="JOB"))
+    return job
+
+
+# Export and import
+@router.get("/{organization_uuid}/export/", response_class=StreamingResponse, status_code=200)
+@inject
+async def export_organization(
+        organization_uuid: str,
+        gzip: bool = Query(False, description="Gzip the stream (Content-Encoding: gzip)"),
+        service=Depends(Provide[Container.organization_service]),
+):
+    """
+    Stream every row of an organization (META, users, projects, tasks and memberships) as NDJSON.
     """
-    await service.delete_organization(organization_uuid=organization_uuid)
+    rows = await service.export_organization(organization_uuid=organization_uuid)
+    headers = {"Content-Disposition": f'attachment; filename="organization-{organization_uuid}.ndjson"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(ndjson_stream(rows, gzip=gzip), media_type="application/x-ndjson", headers=headers)
+
+
+@router.post("/import/", response_model=OrganizationImportResponse, status_code=201)
+@inject
+async def import_organization(
+        request: Request,
+        service=Depends(Provide[Container.organization_service]),
+):
+    """
+    Create a new organization from the NDJSON stream of an export (gzipped with Content-Encoding: gzip).
+    All UUIDs are replaced; task attachments are not copied.
+    """
+    return await service.import_organization(ndjson_lines(request))
 
 
 # Users in Organization
@@ -98,16 +162,39 @@ async def create_user_in_organization(
     )
 
 
+@router.post("/{organization_uuid}/users/bulk/", response_model=BulkCreateResponse, status_code=200)
+@inject
+async def create_users_in_organization(
+        organization_uuid: str,
+        request: Request,
+        service=Depends(Provide[Container.organization_service]),
+):
+    """
+    Create many users in an organization by UUID.
+    The body is a JSON array of user objects, or an NDJSON stream of them (Content-Type application/x-ndjson).
+    Rows are validated and written independently; the response holds the result of every row.
+    """
+    return await service.create_users_in_organization(
+        organization_uuid=organization_uuid, rows=read_rows(request, UserCreate)
+    )
+
+
 @router.get("/{organization_uuid}/users/", response_model=list[UserResponse], status_code=200)
 @inject
 async def get_users_in_organization(
         organization_uuid: str,
+        response: Response,
+        page: PageParams = Depends(),
+        fields: FieldParams = Depends(),
         service=Depends(Provide[Container.organization_service]),
 ):
     """
-    Get all users in an organization by UUID.
+    Get all users in an organization by UUID, optionally one page at a time.
     """
-    return await service.get_organization_users(organization_uuid=organization_uuid)
+    serializer = USER_SERIALIZER.select(fields.fields)
+    return paginated(response, await service.get_organization_users(
+        organization_uuid=organization_uuid, limit=page.limit, cursor=page.cursor, projection=serializer.projection
+    ), serializer)
 
 
 @router.get("/{organization_uuid}/users/{user_uuid}/", response_model=UserResponse, status_code=200)
@@ -115,12 +202,16 @@ async def get_users_in_organization(
 async def get_user_in_organization(
         organization_uuid: str,
         user_uuid: str,
+        fields: FieldParams = Depends(),
         service=Depends(Provide[Container.organization_service]),
 ):
     """
     Get details of a specific user by UUID in an organization.
     """
-    return await service.get_user_in_organization(organization_uuid=organization_uuid, user_uuid=user_uuid)
+    serializer = USER_SERIALIZER.select(fields.fields)
+    return serializer.item_response(await service.get_user_in_organization(
+        organization_uuid=organization_uuid, user_uuid=user_uuid, projection=serializer.projection
+    ))
 
 
 @router.put("/{organization_uuid}/users/{user_uuid}/", response_model=UserResponse, status_code=200)
@@ -153,7 +244,30 @@ async def delete_user_in_organization(
     """
     Delete a user by UUID in an organization.
     """
-    await service.delete_user_in_odeleterganization(organization_uuid=organization_uuid, user_uuid=user_uuid)
+    await service.delete_user_in_organization(organization_uuid=organization_uuid, user_uuid=user_uuid)
+
+
+@router.get("/{organization_uuid}/users/{user_uuid}/tasks/", response_model=list[TaskResponse], status_code=200)
+@inject
+async def get_tasks_for_user_in_organization(
+        organization_uuid: str,
+        user_uuid: str,
+        response: Response,
+        page: PageParams = Depends(),
+        fields: FieldParams = Depends(),
+        service=Depends(Provide[Container.user_service]),
+):
+    """
+    Get all tasks assigned to a user across every project of an organization, optionally one page at a time.
+    """
+    serializer = TASK_SERIALIZER.select(fields.fields)
+    return paginated(response, await service.get_all_tasks_for_user_in_organization(
+        organization_uuid=organization_uuid,
+        user_uuid=user_uuid,
+        limit=page.limit,
+        cursor=page.cursor,
+        projection=serializer.projection,
+    ), serializer)
 
 
 # Projects in Organization
@@ -175,16 +289,39 @@ async def create_project_in_organization(
     )
 
 
+@router.post("/{organization_uuid}/projects/bulk/", response_model=BulkCreateResponse, status_code=200)
+@inject
+async def create_projects_in_organization(
+        organization_uuid: str,
+        request: Request,
+        service=Depends(Provide[Container.organization_service]),
+):
+    """
+    Create many projects in an organization by UUID.
+    The body is a JSON array of project objects, or an NDJSON stream of them (Content-Type application/x-ndjson).
+    Rows are validated and written independently; the response holds the result of every row.
+    """
+    return await service.create_projects_in_organization(
+        organization_uuid=organization_uuid, rows=read_rows(request, ProjectCreate)
+    )
+
+
 @router.get("/{organization_uuid}/projects/", response_model=list[ProjectResponse], status_code=200)
 @inject
 async def get_projects_in_organization(
         organization_uuid: str,
+        response: Response,
+        page: PageParams = Depends(),
+        fields: FieldParams = Depends(),
         service=Depends(Provide[Container.organization_service]),
 ):
     """
-    Get all projects in an organization by UUID.
+    Get all projects in an organization by UUID, optionally one page at a time.
     """
-    return await service.get_organization_projects(organization_uuid=organization_uuid)
+    serializer = PROJECT_SERIALIZER.select(fields.fields)
+    return paginated(response, await service.get_organization_projects(
+        organization_uuid=organization_uuid, limit=page.limit, cursor=page.cursor, projection=serializer.projection
+    ), serializer)
 
 
 @router.get("/{organization_uuid}/projects/{project_uuid}/", response_model=ProjectResponse, status_code=200)
@@ -192,12 +329,16 @@ async def get_projects_in_organization(
 async def get_project_in_organization(
         organization_uuid: str,
         project_uuid: str,
+        fields: FieldParams = Depends(),
         service=Depends(Provide[Container.organization_service]),
 ):
     """
     Get details of a specific project by UUID in an organization.
     """
-    return await service.get_project_in_organization(organization_uuid=organization_uuid, project_id=project_uuid)
+    serializer = PROJECT_SERIALIZER.select(fields.fields)
+    return serializer.item_response(await service.get_project_in_organization(
+        organization_uuid=organization_uuid, project_id=project_uuid, projection=serializer.projection
+    ))
 
 
 @router.put("/{organization_uuid}/projects/{project_uuid}/", response_model=ProjectResponse, status_code=200)
@@ -230,7 +371,7 @@ async def delete_project_in_organization(
     """
     Delete a project by UUID in an organization.
     """
-    await service.delete_project_in_organization(organization_uuid=organization_uuid, project_id=project_uuid)
+    await service.delete_project_in_organization(organization_uuid=organization_uuid, project_uuid=project_uuid)
 
 
 # Add User to Project
@@ -277,16 +418,23 @@ async def remove_user_from_project(
 async def get_users_in_project(
         organization_uuid: str,
         project_uuid: str,
+        response: Response,
+        page: PageParams = Depends(),
+        fields: FieldParams = Depends(),
         service=Depends(Provide[Container.project_service]),
 ):
     """
-    Get all users assigned to a project in an organization.
+    Get all users assigned to a project in an organization, optionally one page at a time.
     """
+    serializer = USER_SERIALIZER.select(fields.fields)
     users = await service.get_project_users(
         organization_uuid=organization_uuid,
-        project_uuid=project_uuid
+        project_uuid=project_uuid,
+        limit=page.limit,
+        cursor=page.cursor,
+        projection=serializer.projection,
     )
-    return users
+    return paginated(response, users, serializer)
 
 
 # Get all tasks in a project
@@ -295,19 +443,27 @@ async def get_users_in_project(
 async def get_tasks_in_project(
         organization_uuid: str,
         project_uuid: str,
+        response: Response,
+        page: PageParams = Depends(),
+        fields: FieldParams = Depends(),
         service=Depends(Provide[Container.project_service]),
 ):
     """
-    Get all tasks associated with a project in an organization.
+    Get all tasks associated with a project in an organization, optionally one page at a time.
     """
+    serializer = TASK_SERIALIZER.select(fields.fields)
     tasks = await service.get_project_tasks(
         organization_uuid=organization_uuid,
-        project_uuid=project_uuid
+        project_uuid=project_uuid,
+        limit=page.limit,
+        cursor=page.cursor,
+        projection=serializer.projection,
     )
-    return tasks
+    return paginated(response, tasks, serializer)
 
 
-@router.post("/{organization_uuid}/projects/{project_uuid}/tasks/", response_model=TaskResponse, status_code=201)
+@upload_router.post("/{organization_uuid}/projects/{project_uuid}/tasks/", response_model=TaskResponse,
+                    status_code=201)
 @inject
 async def create_task_in_project(
         organization_uuid: str,
@@ -329,6 +485,27 @@ async def create_task_in_project(
     )
 
 
+@router.post("/{organization_uuid}/projects/{project_uuid}/tasks/bulk/", response_model=BulkCreateResponse,
+             status_code=200)
+@inject
+async def create_tasks_in_project(
+        organization_uuid: str,
+        project_uuid: str,
+        request: Request,
+        service=Depends(Provide[Container.project_service]),
+):
+    """
+    Create many tasks under a project within an organization, without attachments.
+    The body is a JSON array of task objects, or an NDJSON stream of them (Content-Type application/x-ndjson).
+    Rows are validated and written independently; the response holds the result of every row.
+    """
+    return await service.create_tasks_in_project(
+        organization_uuid=organization_uuid,
+        project_uuid=project_uuid,
+        rows=read_rows(request, TaskBulkCreate),
+    )
+
+
 # Get details of a specific task in a project
 @router.get("/{organization_uuid}/projects/{project_uuid}/tasks/{task_uuid}/", response_model=TaskResponse,
             status_code=200)
@@ -337,12 +514,79 @@ async def get_task_in_project(
         organization_uuid: str,
         project_uuid: str,
         task_uuid: str,
+        fields: FieldParams = Depends(),
         service=Depends(Provide[Container.project_service]),
 ):
     """
     Get details of a specific task in a project under an organization.
     """
-    return await service.get_task_in_project(
+    serializer = TASK_SERIALIZER.select(fields.fields)
+    return serializer.item_response(await service.get_task_in_project(
+        organization_uuid=organization_uuid,
+        project_uuid=project_uuid,
+        task_uuid=task_uuid,
+        projection=serializer.projection,
+    ))
+
+
+@router.post("/{organization_uuid}/projects/{project_uuid}/tasks/{task_uuid}/file/upload-url/",
+             response_model=FileUrlResponse, status_code=200)
+@inject
+async def create_task_upload_url(
+        organization_uuid: str,
+        project_uuid: str,
+        task_uuid: str,
+        payload: TaskFileUpload,
+        service=Depends(Provide[Container.project_service]),
+):
+    """
+    Get a short-lived URL to upload a task attachment directly to storage.
+    Call the finalize route once the upload has completed.
+    """
+    return await service.create_task_upload_url(
+        organization_uuid=organization_uuid,
+        project_uuid=project_uuid,
+        task_uuid=task_uuid,
+        filename=payload.filename,
+        content_type=payload.content_type,
+        size=payload.size,
+    )
+
+
+@router.post("/{organization_uuid}/projects/{project_uuid}/tasks/{task_uuid}/file/", response_model=TaskResponse,
+             status_code=200)
+@inject
+async def finalize_task_file(
+        organization_uuid: str,
+        project_uuid: str,
+        task_uuid: str,
+        payload: TaskFileFinalize,
+        service=Depends(Provide[Container.project_service]),
+):
+    """
+    Attach a file uploaded through an upload URL to its task.
+    """
+    return await service.finalize_task_file(
+        organization_uuid=organization_uuid,
+        project_uuid=project_uuid,
+        task_uuid=task_uuid,
+        filename=payload.filename,
+    )
+
+
+@router.get("/{organization_uuid}/projects/{project_uuid}/tasks/{task_uuid}/file/download-url/",
+            response_model=FileUrlResponse, status_code=200)
+@inject
+async def create_task_download_url(
+        organization_uuid: str,
+        project_uuid: str,
+        task_uuid: str,
+        service=Depends(Provide[Container.project_service]),
+):
+    """
+    Get a short-lived URL to download a task attachment directly from storage.
+    """
+    return await service.create_task_download_url(
         organization_uuid=organization_uuid,
         project_uuid=project_uuid,
         task_uuid=task_uuid,
@@ -441,16 +685,23 @@ async def get_users_in_task(
         organization_uuid: str,
         project_uuid: str,
         task_uuid: str,
+        response: Response,
+        page: PageParams = Depends(),
+        fields: FieldParams = Depends(),
         service=Depends(Provide[Container.task_service]),
 ):
     """
-    Get all users assigned to a task in a project under an organization.
+    Get all users assigned to a task in a project under an organization, optionally one page at a time.
     """
-    return await service.get_users_in_task(
+    serializer = USER_SERIALIZER.select(fields.fields)
+    return paginated(response, await service.get_users_in_task(
         organization_uuid=organization_uuid,
         project_uuid=project_uuid,
-        task_uuid=task_uuid
-    )
+        task_uuid=task_uuid,
+        limit=page.limit,
+        cursor=page.cursor,
+        projection=serializer.projection,
+    ), serializer)
 
 
 @router.get("/{organization_uuid}/projects/{project_uuid}/users/{user_uuid}/tasks/", response_model=list[TaskResponse],
@@ -460,13 +711,23 @@ async def get_users_in_task(
         organization_uuid: str,
         project_uuid: str,
         user_uuid: str,
+        response: Response,
+        page: PageParams = Depends(),
+        fields: FieldParams = Depends(),
         service=Depends(Provide[Container.user_service]),
 ):
     """
-    Get all users assigned to a task in a project under an organization.
+    Get all tasks assigned to a user in a project under an organization, optionally one page at a time.
     """
-    return await service.get_all_tasks_for_user_in_project(
+    serializer = TASK_SERIALIZER.select(fields.fields)
+    return paginated(response, await service.get_all_tasks_for_user_in_project(
         organization_uuid=organization_uuid,
         project_uuid=project_uuid,
-        user_uuid=user_uuid
-    )
+        user_uuid=user_uuid,
+        limit=page.limit,
+        cursor=page.cursor,
+        projection=serializer.projection,
+    ), serializer)
+
+
+router.include_router(upload_router)
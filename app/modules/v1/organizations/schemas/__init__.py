@@ -1,4 +1,8 @@
-from .organizations import OrganizationCreate, OrganizationResponse
-from .tasks import TaskCreate, TaskResponse, AddTaskUser
-from .users import UserCreate, UserResponse
-from .projects import ProjectCreate, ProjectResponse, AddProjectUser
+from .bulk import BulkCreateResponse, BulkRowResult
+from .organizations import OrganizationCreate, OrganizationResponse, OrganizationImportResponse, ORGANIZATION_SERIALIZER
+from .tasks import (
+    TaskCreate, TaskBulkCreate, TaskResponse, AddTaskUser, TaskFileUpload, TaskFileFinalize, FileUrlResponse,
+    TASK_SERIALIZER,
+)
+from .users import UserCreate, UserResponse, USER_SERIALIZER
+from .projects import ProjectCreate, ProjectResponse, AddProjectUser, PROJECT_SERIALIZER
@@ -0,0 +1,17 @@
+from typing import Any, Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class BulkRowResult(BaseModel):
+    index: int  # Position of the row in the request
+    status: int  # 201 once created, otherwise the HTTP status of the row's error
+    uuid: Optional[UUID] = None
+    detail: Optional[Any] = None
+
+
+class BulkCreateResponse(BaseModel):
+    created: int
+    failed: int
+    results: list[BulkRowResult]
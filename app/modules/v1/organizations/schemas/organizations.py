@@ -3,6 +3,8 @@ from datetime import datetime
 from typing import Optional
 from uuid import UUID
 
+from app.core.serialization import ResponseSerializer
+
 
 class OrganizationCreate(BaseModel):
     name: str
@@ -13,7 +15,7 @@ class OrganizationResponse(BaseModel):
     # Set model configuration here using model_config (instead of Config)
     model_config = ConfigDict(populate_by_name=True)
 
-    uuid: UUID = Field(..., alivalidation_aliasas="PK")
+    uuid: UUID  # Extracted from the item's PK by the validator below
     name: str = Field(..., validation_alias="Name")
     description: str = Field(..., validation_alias="Description")
     create_at: Optional[datetime] = Field(None, validation_alias="CreatedAt")
@@ -27,3 +29,15 @@ class OrganizationResponse(BaseModel):
         if pk_value and pk_value.startswith("ORG#"):
             values["uuid"] = pk_value.split("#", 1)[1]
         return values
+
+
+# Serializes lists and sparse fieldsets of OrganizationResponse, see app.core.serialization
+ORGANIZATION_SERIALIZER = ResponseSerializer(OrganizationResponse, key_attribute="PK")
+
+
+class OrganizationImportResponse(BaseModel):
+    organization_uuid: UUID  # The new organization
+    imported: int
+    failed: int
+    dropped_attachments: int  # Task file URLs left out, attachments are not copied
+    errors: list[str]  # The first errors, by line of the export
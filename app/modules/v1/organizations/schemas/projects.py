@@ -4,6 +4,8 @@ from uuid import UUID
 
 from pydantic import BaseModel, Field, ConfigDict, model_validator
 
+from app.core.serialization import ResponseSerializer
+
 
 class ProjectCreate(BaseModel):
     title: str
@@ -15,7 +17,7 @@ class ProjectResponse(BaseModel):
     # Set model configuration here using model_config (instead of Config)
     model_config = ConfigDict(populate_by_name=True)
 
-    uuid: UUID = Field(..., alivalidation_aliasas="SK")
+    uuid: UUID  # Extracted from the item's SK by the validator below
     title: str = Field(..., validation_alias="Title")
     description: str = Field(..., validation_alias="Description")
     status: str = Field(..., validation_alias="Status")
@@ -36,5 +38,9 @@ class ProjectResponse(BaseModel):
         return values
 
 
+# Serializes lists and sparse fieldsets of ProjectResponse, see app.core.serialization
+PROJECT_SERIALIZER = ResponseSerializer(ProjectResponse)
+
+
 class AddProjectUser(BaseModel):
     uuid: UUID
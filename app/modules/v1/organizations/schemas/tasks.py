@@ -4,6 +4,8 @@ from typing import Optional
 from uuid import UUID
 from fastapi import UploadFile, Form, File
 
+from app.core.serialization import ResponseSerializer
+
 
 class TaskCreate(BaseModel):
     title: str
@@ -30,12 +32,20 @@ class TaskCreate(BaseModel):
         )
 
 
+class TaskBulkCreate(BaseModel):
+    # A row of a bulk task creation, which carries no attachment
+    title: str
+    description: str
+    priority: str
+    deadline: datetime
+
+
 class TaskResponse(BaseModel):
     # Set model configuration here using model_config (instead of Config)
     model_config = ConfigDict(populate_by_name=True)
 
-    uuid: UUID = Field(..., alivalidation_aliasas="SK")
-    title: str = Field(..., validation_alias="Description")
+    uuid: UUID  # Extracted from the item's SK by the validator below
+    title: str = Field(..., validation_alias="Title")
     description: str = Field(..., validation_alias="Description")
     deadline: Optional[datetime] = Field(None, validation_alias="Deadline")
     priority: Optional[str] = Field(None, validation_alias="Priority")
@@ -57,5 +67,26 @@ class TaskResponse(BaseModel):
         return values
 
 
+# Serializes lists and sparse fieldsets of TaskResponse, see app.core.serialization
+TASK_SERIALIZER = ResponseSerializer(TaskResponse)
+
+
 class AddTaskUser(BaseModel):
     uuid: UUID
+
+
+class TaskFileUpload(BaseModel):
+    filename: str = Field(..., min_length=1, max_length=255)
+    content_type: str = "application/octet-stream"
+    size: int = Field(..., ge=0, description="Exact size of the file in bytes")
+
+
+class TaskFileFinalize(BaseModel):
+    filename: str = Field(..., min_length=1, max_length=255)
+
+
+class FileUrlResponse(BaseModel):
+    url: str
+    method: str
+    headers: dict[str, str] = {}
+    expires_at: datetime
@@ -4,6 +4,8 @@ from uuid import UUID
 
 from pydantic import BaseModel, Field, ConfigDict, model_validator
 
+from app.core.serialization import ResponseSerializer
+
 
 class UserCreate(BaseModel):
     name: str
@@ -15,7 +17,7 @@ class UserResponse(BaseModel):
     # Set model configuration here using model_config (instead of Config)
     model_config = ConfigDict(populate_by_name=True)
 
-    uuid: UUID = Field(..., alivalidation_aliasas="SK")
+    uuid: UUID  # Extracted from the item's SK by the validator below
     name: str = Field(..., validation_alias="Name")
     email: str = Field(..., validation_alias="Email")
     role: str = Field(..., validation_alias="Role")
@@ -34,3 +36,7 @@ class UserResponse(BaseModel):
             values["uuid"] = sk_value.split("#", 1)[1]  # Extract the portion after "USER#"
 
         return values
+
+
+# Serializes lists and sparse fieldsets of UserResponse, see app.core.serialization
+USER_SERIALIZER = ResponseSerializer(UserResponse)
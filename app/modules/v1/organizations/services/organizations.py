@@ -1,17 +1,51 @@
+import json
+import uuid
 from datetime import datetime
+from decimal import Decimal
 
+from boto3.dynamodb.conditions import Attr
+
+from app.core.exceptions import ErrorCode
 from app.core.services import BaseService, FileService, LogService
 
+from app.modules.v1.jobs.services import JobService
 from app.modules.v1.organizations.services.projects import ProjectService
-from app.utils.constant import GSI_ORG_USERS
+from app.utils.constant import (
+    BULK_CREATE_WINDOW,
+    ENTITY_TYPE_ATTRIBUTE,
+    GSI_ORG_USERS,
+    IMPORT_MAX_ERRORS,
+    JOB_DELETE_ORGANIZATION,
+    ORG_DELETE_CHUNK_SIZE,
+    TOMBSTONE_ATTRIBUTE,
+)
+
+NUMBER = (int, Decimal)
+TIMESTAMP = {"type": NUMBER, "required": False}
+TEXT = {"type": str, "required": True}
+
+# Rows of an organization export, by (PK prefix, SK prefix, number of UUIDs in the SK), and the only attributes
+# an import keeps from each. Anything else (EntityType, tombstones, job leases, blob counters...) is dropped, so an
+# export cannot smuggle rows into an index or into another service's bookkeeping.
+EXPORT_ROWS = {
+    ("ORG", "META", 0): {"Name": TEXT, "Description": TEXT, "CreatedAt": TIMESTAMP},
+    ("ORG", "USER", 1): {"Name": TEXT, "Email": TEXT, "Role": TEXT, "CreatedAt": TIMESTAMP},
+    ("ORG", "PROJECT", 1): {"Title": TEXT, "Description": TEXT, "Status": TEXT, "CreatedAt": TIMESTAMP},
+    ("PROJECT", "TASK", 1): {"Title": TEXT, "Description": TEXT, "Priority": TEXT, "Deadline": TIMESTAMP},
+    ("PROJECT", "USER", 1): {"AddedAt": TIMESTAMP},  # Project members
+    ("TASK", "USER", 1): {"AddedAt": TIMESTAMP},  # Task assignments
+    ("USER", "TASK", 2): {"AddedAt": TIMESTAMP},  # Inverted user-to-task rows
+}
 
 
 class OrganizationService(BaseService):
-    def __init__(self, table, file_service: FileService, log_service: LogService, project_service: ProjectService):
+    def __init__(self, table, file_service: FileService, log_service: LogService, project_service: ProjectService,
+                 job_service: JobService):
         super().__init__(table, pk_prefix="ORG", service_name="Organization")
         self.file_service = file_service
         self.project_service = project_service
         self.log_service = log_service
+        self.job_service = job_service
 
     # Organizations CRUD
     async def create_organization(self, name: str, description: str):
@@ -19,20 +53,22 @@ class OrganizationService(BaseService):
         Add a new organization.
         """
         organization_uuid = self.generate_uuid()
-        attributes = {"Name": name, "Description": description, "CreatedAt": int(datetime.utcnow().timestamp())}
-        return await self.create_item(identifier=organization_uuid, sk="META", attributes=attributes)
+        attributes = {"Name": name, "Description": description, "CreatedAt": int(datetime.utcnow().timestamp()),
+                      ENTITY_TYPE_ATTRIBUTE: self.pk_prefix}
+        return await self.create_item(identifier=organization_uuid, sk="META", attributes=attributes,
+                                      condition=Attr("PK").not_exists())
 
-    async def get_all_organizations(self):
+    async def get_all_organizations(self, limit: int = None, cursor: str = None, projection: tuple = None):
         """
-        Retrieve all organizations.
+        Retrieve a page of organizations (all of them when no limit or cursor is given).
         """
-        return await self.get_all_meta()
+        return await self.get_all_meta(limit=limit, cursor=cursor, projection=projection)
 
-    async def get_organization(self, organization_uuid: str):
+    async def get_organization(self, organization_uuid: str, projection: tuple = None):
         """
         Get details of a specific organization.
         """
-        return await self.get_item(identifier=organization_uuid, sk="META")
+        return await self.get_item(identifier=organization_uuid, sk="META", projection=projection)
 
     async def update_organization(self, organization_uuid: str, name: str, description: str):
         """
@@ -43,51 +79,239 @@ class OrganizationService(BaseService):
 
     async def delete_organization(self, organization_uuid: str):
         """
-        Delete an organization and all associated data, including tasks, projects, and users.
+        Tombstone an organization and register the background job deleting its data.
+        From now on reads treat the organization as gone; the job removes projects, tasks and users in chunks.
         """
-        # Step 1: Verify the organization exists
-        await self.get_organization(organization_uuid)
+        job_uuid = self.generate_uuid()
+        job = await self.job_service.create_job(job_uuid, job_type=JOB_DELETE_ORGANIZATION, target=organization_uuid)
+        try:
+            await self.tombstone_item(identifier=organization_uuid, sk="META", attributes={"DeletionJob": job_uuid})
+        except Exception:
+            await self.job_service.delete_item(identifier=job_uuid, sk="META")
+            raise
+        return job
 
-        # Step 2: Fetch all projects related to the organization and deletion
-        projects = await self.get_organization_projects(organization_uuid)
-        for project in projects:
-            project_uuid = self.extract_uuid(key=project["SK"], prefix="PROJECT")  # Extract project UUID from SK
+    async def purge_organization(self, job: dict, checkpoint):
+        """
+        Job handler deleting a tombstoned organization chunk by chunk: project subtrees first, then users,
+        then the meta record. Processed rows are deleted, so re-running the job after a restart simply
+        continues with whatever is left; `checkpoint` records progress after every chunk.
+        """
+        organization_uuid = job["Target"]
+        job_uuid = self.extract_uuid(job["PK"], prefix="JOB")
+        progress = {"DeletedItems": 0, "DeletedFiles": 0}
+        progress.update({k: int(v) for k, v in (job.get("Progress") or {}).items()})
 
-            # Delete the project itself
-            await self.delete_project_in_organization(
-                organization_uuid=organization_uuid,
-                project_uuid=project_uuid
-            )
+        meta = await self.get_keys(identifier=organization_uuid, sk_prefix="META", attributes=("DeletionJob",))
+        if not meta:
+            return progress  # Deleted by an earlier run
+        if meta[0].get("DeletionJob") != job_uuid:
+            raise Exception(f"Organization {organization_uuid} is not tombstoned by job {job_uuid}")
 
-        # Step 3: Remove all users directly under the organization
-        organization_users = await self.get_organization_users(organization_uuid)
-        for user in organization_users:
-            user_uuid = self.extract_uuid(key=user["SK"], prefix="USER")  # Extract user UUID from SK
-            await self.delete_user_in_organization(organization_uuid, user_uuid)
+        for sk_prefix in ("PROJECT#", "USER#"):
+            while True:
+                rows = (await self.get_page(identifier=organization_uuid, sk_prefix=sk_prefix,
+                                            limit=ORG_DELETE_CHUNK_SIZE, projection=())).items
+                if not rows:
+                    break
+                keys, file_urls = [], []
+                if sk_prefix == "PROJECT#":
+                    for project_keys, project_file_urls in await self.gather_limited(
+                            self.project_service.collect_project_keys(self.extract_uuid(row["SK"], prefix="PROJECT"))
+                            for row in rows
+                    ):
+                        keys.extend(project_keys)
+                        file_urls.extend(project_file_urls)
+                progress["DeletedItems"] += await self.batch_delete_items(keys)
+                await self.gather_limited(self.file_service.delete_file(file_url) for file_url in file_urls)
+                progress["DeletedFiles"] += len(file_urls)
+                progress["DeletedItems"] += await self.batch_delete_items(rows)
+                await checkpoint(progress, sk_prefix)
 
-        # Step 4: Delete the organization's meta record
         await self.delete_item(identifier=organization_uuid, sk="META")
+        progress["DeletedItems"] += 1
+        self.log_service.log(f"Deleted organization {organization_uuid}: {progress}")
+        return progress
+
+    # Export and import
+    async def export_organization(self, organization_uuid: str):
+        """
+        Check the organization exists and return an async iterator over all of its rows, read one DynamoDB page
+        at a time: the META record, each user with the user's task rows, then each project with its tasks,
+        members and task assignments.
+        """
+        meta = await self.get_item(identifier=organization_uuid, sk="META")
+        return self._export_rows(meta)
+
+    async def _export_rows(self, meta: dict):
+        organization_uuid = self.extract_uuid(meta["PK"], prefix="ORG")
+        yield meta
+        async for user in self.iter_items(organization_uuid, sk_prefix="USER#"):
+            yield user
+            user_uuid = self.extract_uuid(user["SK"], prefix="USER")
+            async for user_task in self.iter_items(user_uuid, sk_prefix="TASK#", pk_prefix="USER"):
+                yield user_task
+        async for project in self.iter_items(organization_uuid, sk_prefix="PROJECT#"):
+            yield project
+            project_uuid = self.extract_uuid(project["SK"], prefix="PROJECT")
+            async for member in self.iter_items(project_uuid, sk_prefix="USER#", pk_prefix="PROJECT"):
+                yield member
+            async for task in self.iter_items(project_uuid, sk_prefix="TASK#", pk_prefix="PROJECT"):
+                yield task
+                task_uuid = self.extract_uuid(task["SK"], prefix="TASK")
+                async for assignment in self.iter_items(task_uuid, sk_prefix="USER#", pk_prefix="TASK"):
+                    yield assignment
+
+    async def import_organization(self, lines):
+        """
+        Create a new organization from the NDJSON lines of an export, starting with its META record.
+        Every UUID is replaced by one derived from the new organization's UUID (uuid5), so rows can be remapped one
+        at a time without keeping a mapping in memory. Rows are written in windows with `batch_put_items` and the
+        META record last, so the organization only appears once the rest is in place.
+        Only the data attributes of each row kind (EXPORT_ROWS) are kept, so an edited export cannot set reserved
+        attributes (EntityType, DeletedAt, leases, ...) on the rows it writes. Attachments are not copied: task
+        file URLs are dropped.
+        """
+        lines = aiter(lines)
+        try:
+            meta = self._parse_export_row(await anext(lines))
+            if meta["SK"] != "META" or not meta["PK"].startswith("ORG#"):
+                raise ValueError("an export starts with the organization's META record")
+            attributes = self._import_attributes(meta)
+        except StopAsyncIteration:
+            raise ErrorCode.BadRequest("The export is empty.")
+        except ValueError as e:
+            raise ErrorCode.BadRequest(f"Line 1: {e}")
+
+        source_uuid = self.extract_uuid(meta["PK"], prefix="ORG")
+        organization_uuid = self.generate_uuid()
+        namespace = uuid.UUID(organization_uuid)
+        summary = {"organization_uuid": organization_uuid, "imported": 0, "failed": 0, "dropped_attachments": 0,
+                   "errors": []}
+
+        def fail(message: str, count: int = 1):
+            summary["failed"] += count
+            if len(summary["errors"]) < IMPORT_MAX_ERRORS:
+                summary["errors"].append(message)
+
+        def remap(key: str) -> str:
+            prefix, *uuids = key.split("#")
+            if prefix == "ORG":
+                if uuids != [source_uuid]:
+                    raise ValueError(f"row of another organization: {key}")
+                return f"ORG#{organization_uuid}"
+            return "#".join([prefix, *(str(uuid.uuid5(namespace, value)) for value in uuids)])
+
+        async def flush():
+            errors = await self.batch_put_items([item for _, item in window])
+            for (number, _), error in zip(window, errors):
+                if error is None:
+                    summary["imported"] += 1
+                else:
+                    fail(f"Line {number}: {error}")
+            window.clear()
+
+        window = []
+        number = 1
+        async for line in lines:
+            number += 1
+            try:
+                row = self._parse_export_row(line)
+                item = {"PK": remap(row["PK"]), "SK": remap(row["SK"]), **self._import_attributes(row)}
+            except ValueError as e:
+                fail(f"Line {number}: {e}")
+                continue
+            if row.get("FileUrl"):
+                summary["dropped_attachments"] += 1
+            window.append((number, item))
+            if len(window) >= BULK_CREATE_WINDOW:
+                await flush()
+        if window:
+            await flush()
+
+        await self.create_item(identifier=organization_uuid, sk="META", condition=Attr("PK").not_exists(),
+                               attributes={**attributes, ENTITY_TYPE_ATTRIBUTE: self.pk_prefix})
+        summary["imported"] += 1
+        return summary
+
+    @staticmethod
+    def _parse_export_row(line: bytes) -> dict:
+        """
+        Item of one export line, with numbers as Decimals like DynamoDB expects. Tombstoned rows are refused.
+        """
+        try:
+            item = json.loads(line, parse_float=Decimal)
+        except ValueError:
+            raise ValueError("invalid JSON")
+        if not isinstance(item, dict) or not isinstance(item.get("PK"), str) or not isinstance(item.get("SK"), str):
+            raise ValueError("a row is a JSON object with string PK and SK attributes")
+        if TOMBSTONE_ATTRIBUTE in item:
+            raise ValueError(f"deleted row {item['PK']} / {item['SK']}")
+        return item
+
+    @staticmethod
+    def _import_attributes(row: dict) -> dict:
+        """
+        The attributes of an export row an import writes (see EXPORT_ROWS), checking their types.
+        """
+        pk_prefix, sk_prefix = row["PK"].split("#", 1)[0], row["SK"].split("#", 1)[0]
+        allowed = EXPORT_ROWS.get((pk_prefix, sk_prefix, row["SK"].count("#")))
+        if allowed is None:
+            raise ValueError(f"unexpected row {row['PK']} / {row['SK']}")
+        attributes = {}
+        for name, rule in allowed.items():
+            value = row.get(name)
+            if value is None:
+                if rule["required"]:
+                    raise ValueError(f"{name} is missing from {row['PK']} / {row['SK']}")
+                continue
+            if not isinstance(value, rule["type"]) or isinstance(value, bool):
+                raise ValueError(f"{name} of {row['PK']} / {row['SK']} has the wrong type")
+            attributes[name] = value
+        return attributes
 
     # Users in Organizations
-    async def get_organization_users(self, organization_uuid: str):
+    async def get_organization_users(self, organization_uuid: str, limit: int = None, cursor: str = None,
+                                     projection: tuple = None):
         """
-        Retrieve all users in an organization.
+        Retrieve a page of users in an organization (all of them when no limit or cursor is given).
         """
-        return await self.get_items(identifier=organization_uuid, sk_prefix="USER#")
+        await self.verify_organization(organization_uuid)
+        return await self.get_page(identifier=organization_uuid, sk_prefix="USER#", limit=limit, cursor=cursor,
+                                   projection=projection)
 
     async def create_user_in_organization(self, organization_uuid: str, name: str, email: str, role: str):
         """
         Add a user to an organization.
         """
         user_uuid = self.generate_uuid()
-        attributes = {"Name": name, "Email": email, "Role": role, "CreatedAt": int(datetime.utcnow().timestamp())}
-        return await self.create_item(identifier=organization_uuid, sk=f"USER#{user_uuid}", attributes=attributes)
+        item = {"PK": f"ORG#{organization_uuid}", "SK": f"USER#{user_uuid}", "Name": name, "Email": email,
+                "Role": role, "CreatedAt": int(datetime.utcnow().timestamp())}
+        # Write the user only if the organization exists, in a single transaction
+        await self.transact_write([
+            *self.parent_checks(organization_uuid),
+            self.transact_put(item, error=ErrorCode.Conflict("User", user_uuid)),
+        ])
+        return item
 
-    async def get_user_in_organization(self, organization_uuid: str, user_uuid: str):
+    async def create_users_in_organization(self, organization_uuid: str, rows):
+        """
+        Add a user to an organization for every valid row of a bulk request (see app.core.bulk.read_rows).
+        """
+        # Verify the organization once for the whole request, then write the users in batches
+        await self.verify_organization(organization_uuid)
+        created_at = int(datetime.utcnow().timestamp())
+        return await self.bulk_create(rows, lambda user: {
+            "PK": f"ORG#{organization_uuid}", "SK": f"USER#{self.generate_uuid()}", "Name": user.name,
+            "Email": user.email, "Role": user.role, "CreatedAt": created_at,
+        })
+
+    async def get_user_in_organization(self, organization_uuid: str, user_uuid: str, projection: tuple = None):
         """
         Get details of a specific user in an organization.
         """
-        return await self.get_item(identifier=organization_uuid, sk=f"USER#{user_uuid}")
+        parents = await self.get_parents(organization_uuid, user_uuid=user_uuid, projections={"user": projection})
+        return parents["user"]
 
     async def update_user_in_organization(self, organization_uuid: str, user_uuid: str, name: str, email: str,
                                           role: str):
@@ -95,7 +319,9 @@ class OrganizationService(BaseService):
         Update a user's details in an organization.
         """
         attributes = {"Name": name, "Email": email, "Role": role}
-        return await self.update_item(identifier=organization_uuid, sk=f"USER#{user_uuid}", attributes=attributes)
+        return await self.update_item(identifier=organization_uuid, sk=f"USER#{user_uuid}", attributes=attributes,
+                                      checks=self.parent_checks(organization_uuid),
+                                      error=ErrorCode.NotFound("User", user_uuid))
 
     async def delete_user_in_organization(self, organization_uuid: str, user_uuid: str):
         """
@@ -104,25 +330,33 @@ class OrganizationService(BaseService):
         user_sk = f"USER#{user_uuid}"
 
         # Verify the organization and user exist
-        await self.get_item(identifier=organization_uuid, sk=user_sk)
+        await self.get_parents(organization_uuid, user_uuid=user_uuid)
 
-        # Step 1: Fetch all projects in the organization
-        project_items = await self.get_items(identifier=organization_uuid, sk_prefix="PROJECT")
+        # Step 1: Look up the user's project memberships with one batched read over the organization's projects
+        project_keys = await self.get_keys(identifier=organization_uuid, sk_prefix="PROJECT#")
+        project_memberships = await self.batch_get_items([
+            {"PK": f"PROJECT#{self.extract_uuid(project['SK'], prefix='PROJECT')}", "SK": user_sk}
+            for project in project_keys
+        ])
 
-        # Step 2: For each project, remove the user from tasks and the project itself
-        for project in project_items:
-            project_uuid = project["SK"].split("#")[1]  # Extract project UUID from SK
-            await self.project_service.remove_user_from_project(organization_uuid, project_uuid, user_uuid)
+        # Step 2: Find the user's task assignments through the inverted user-to-task rows
+        user_tasks = await self.get_keys(identifier=user_uuid, sk_prefix="TASK#", pk_prefix="USER")
+        task_assignments = [{"PK": f"TASK#{user_task['SK'].rsplit('#', 1)[1]}", "SK": user_sk}
+                            for user_task in user_tasks]
 
-        # Step 3: Remove the user from the organization
+        # Step 3: Remove the memberships and assignments in batches, then the user itself
+        await self.batch_delete_items(project_memberships + user_tasks + task_assignments)
         return await self.delete_item(identifier=organization_uuid, sk=user_sk)
 
     # Projects in Organizations
-    async def get_organization_projects(self, organization_uuid: str):
+    async def get_organization_projects(self, organization_uuid: str, limit: int = None, cursor: str = None,
+                                        projection: tuple = None):
         """
-        Retrieve all projects in an organization.
+        Retrieve a page of projects in an organization (all of them when no limit or cursor is given).
         """
-        return await self.get_items(identifier=organization_uuid, sk_prefix="PROJECT#")
+        await self.verify_organization(organization_uuid)
+        return await self.get_page(identifier=organization_uuid, sk_prefix="PROJECT#", limit=limit, cursor=cursor,
+                                   projection=projection)
 
     async def create_project_in_organization(self, organization_uuid: str, title: str, description: str,
                                              status: str):
@@ -130,15 +364,32 @@ class OrganizationService(BaseService):
         Add a project to an organization.
         """
         project_id = self.generate_uuid()
-        attributes = {"Title": title, "Description": description, "Status": status,
-                      "CreatedAt": int(datetime.utcnow().timestamp())}
-        return await self.create_item(identifier=organization_uuid, sk=f"PROJECT#{project_id}", attributes=attributes)
+        item = {"PK": f"ORG#{organization_uuid}", "SK": f"PROJECT#{project_id}", "Title": title,
+                "Description": description, "Status": status, "CreatedAt": int(datetime.utcnow().timestamp())}
+        # Write the project only if the organization exists, in a single transaction
+        await self.transact_write([
+            *self.parent_checks(organization_uuid),
+            self.transact_put(item, error=ErrorCode.Conflict("Project", project_id)),
+        ])
+        return item
+
+    async def create_projects_in_organization(self, organization_uuid: str, rows):
+        """
+        Add a project to an organization for every valid row of a bulk request (see app.core.bulk.read_rows).
+        """
+        # Verify the organization once for the whole request, then write the projects in batches
+        await self.verify_organization(organization_uuid)
+        created_at = int(datetime.utcnow().timestamp())
+        return await self.bulk_create(rows, lambda project: {
+            "PK": f"ORG#{organization_uuid}", "SK": f"PROJECT#{self.generate_uuid()}", "Title": project.title,
+            "Description": project.description, "Status": project.status, "CreatedAt": created_at,
+        })
 
-    async def get_project_in_organization(self, organization_uuid: str, project_id: str):
+    async def get_project_in_organization(self, organization_uuid: str, project_id: str, projection: tuple = None):
         """
         Get details of a specific project in an organization.
         """
-        return await self.get_item(identifier=organization_uuid, sk=f"PROJECT#{project_id}")
+        return await self.verify_project(organization_uuid, project_id, projection=projection)
 
     async def update_project_in_organization(self, organization_uuid: str, project_id: str, title: str,
                                              description: str,
@@ -147,32 +398,24 @@ class OrganizationService(BaseService):
         Update a project's details in an organization.
         """
         attributes = {"Title": title, "Description": description, "Status": status}
-        return await self.update_item(identifier=organization_uuid, sk=f"PROJECT#{project_id}", attributes=attributes)
+        return await self.update_item(identifier=organization_uuid, sk=f"PROJECT#{project_id}", attributes=attributes,
+                                      checks=self.parent_checks(organization_uuid),
+                                      error=ErrorCode.NotFound("Project", project_id))
 
     async def delete_project_in_organization(self, organization_uuid: str, project_uuid: str):
         """
         Delete a project from an organization and all related data (tasks and task-user relationships).
         """
         # Step 1: Verify the organization and project exist
-        await self.get_project_in_organization(organization_uuid, project_uuid)
-
-        # Step 2: Fetch all tasks in the project and delegate deletion
-        tasks = await self.project_service.get_project_tasks(organization_uuid=organization_uuid,
-                                                             project_uuid=project_uuid)
-        for task in tasks:
-            task_uuid = self.extract_uuid(task["SK"], prefix="TASK")
-
-            await self.project_service.delete_task_in_project(organization_uuid=organization_uuid,
-                                                              project_uuid=project_uuid,
-                                                              task_uuid=task_uuid)
-
-        # Step 3: Fetch and delete all users associated with the project
-        project_users = await self.project_service.get_project_users(organization_uuid=organization_uuid,
-                                                                     project_uuid=project_uuid)
-        for user in project_users:
-            user_uuid = self.extract_uuid(user["SK"], prefix="USER")
-            await self.project_service.remove_user_from_project(organization_uuid=organization_uuid,
-                                                                project_uuid=project_uuid, user_uuid=user_uuid)
+        await self.verify_project(organization_uuid, project_uuid)
+
+        # Step 2: Collect and batch-delete every row below the project
+        keys, file_urls = await self.project_service.collect_project_keys(project_uuid)
+        deleted = await self.batch_delete_items(keys)
+
+        # Step 3: Remove the task attachments
+        await self.gather_limited(self.file_service.delete_file(file_url) for file_url in file_urls)
 
         # Step 4: Delete the project itself
-        return await self.delete_item(identifier=organization_uuid, sk=f"PROJECT#{project_uuid}")
+        await self.delete_item(identifier=organization_uuid, sk=f"PROJECT#{project_uuid}")
+        return {"deleted_items": deleted + 1, "deleted_files": len(file_urls)}
@@ -1,4 +1,8 @@
+import asyncio
 from datetime import datetime
+from pathlib import PurePosixPath
+
+from fastapi import HTTPException
 
 from app.core.exceptions import ErrorCode
 from app.core.services import BaseService, FileService, LogService
@@ -18,7 +22,7 @@ class ProjectService(BaseService):
         Create a new task under a specific project and organization.
         """
         # Step 1: Verify if the organization and project exist
-        await self.get_item(identifier=organization_uuid, sk=f"PROJECT#{project_uuid}", pk_prefix="ORG")
+        await self.verify_project(organization_uuid, project_uuid)
 
         # Step 2: Generate a unique task UUID
         task_uuid = self.generate_uuid()
@@ -33,154 +37,234 @@ class ProjectService(BaseService):
 
         # Step 4: Handle optional file upload
         if file:
-            file_key = f"organizations/{organization_uuid}/projects/{project_uuid}/tasks/{task_uuid}/{file.filename}"
+            file_key = self.task_file_key(organization_uuid, project_uuid, task_uuid, file.filename)
             try:
-                file_url = self.file_service.upload_file(file, file_key)  # Upload file using FileService
+                file_url = await self.file_service.upload_file(file, file_key)  # Stream the file using FileService
                 attributes["FileUrl"] = file_url  # Add file URL to the task attributes
+            except HTTPException:
+                raise  # e.g. the file exceeds the upload size limit
             except Exception as e:
                 raise ErrorCode.BadRequest(f"File upload failed: {str(e)}")
 
-        # Step 5: Create the task in the database
-        return await self.create_item(
-            identifier=project_uuid,  # Use PROJECT# as PK for tasks
-            sk=f"TASK#{task_uuid}",
-            attributes=attributes
-        )
-
-    async def get_tasks_in_project(self, organization_uuid: str, project_uuid: str):
+        # Step 5: Create the task in the database, releasing the uploaded file if that fails
+        try:
+            return await self.create_item(
+                identifier=project_uuid,  # Use PROJECT# as PK for tasks
+                sk=f"TASK#{task_uuid}",
+                attributes=attributes
+            )
+        except Exception:
+            if attributes.get("FileUrl"):
+                await self.file_service.delete_file(attributes["FileUrl"])
+            raise
+
+    async def create_tasks_in_project(self, organization_uuid: str, project_uuid: str, rows):
         """
-        Get all tasks associated with a specific project in an organization.
+        Create a task under a project for every valid row of a bulk request (see app.core.bulk.read_rows).
         """
-        # Verify the organization and project exist
-        await self.get_item(identifier=organization_uuid, sk=f"PROJECT#{project_uuid}", pk_prefix="ORG")
+        # Verify the organization and project once for the whole request, then write the tasks in batches
+        await self.verify_project(organization_uuid, project_uuid)
+        return await self.bulk_create(rows, lambda task: {
+            "PK": f"PROJECT#{project_uuid}", "SK": f"TASK#{self.generate_uuid()}", "Title": task.title,
+            "Description": task.description, "Priority": task.priority,
+            "Deadline": int(task.deadline.timestamp()),  # Convert to UNIX timestamp
+        })
+
+    @staticmethod
+    def task_file_key(organization_uuid: str, project_uuid: str, task_uuid: str, filename: str) -> str:
+        """
+        Storage key of a task attachment. Only the base name of `filename` is kept.
+        """
+        name = PurePosixPath(filename.replace("\\", "/")).name
+        if name in ("", ".", ".."):
+            raise ErrorCode.BadRequest("Invalid file name.")
+        return f"organizations/{organization_uuid}/projects/{project_uuid}/tasks/{task_uuid}/{name}"
 
-        return await self.get_items(identifier=project_uuid, sk_prefix="TASK#")
+    async def create_task_upload_url(self, organization_uuid: str, project_uuid: str, task_uuid: str, filename: str,
+                                     content_type: str, size: int):
+        """
+        Issue a URL the client uploads a task attachment to directly, followed by `finalize_task_file`.
+        """
+        await self.get_parents(organization_uuid, project_uuid=project_uuid, task_uuid=task_uuid)
+        file_key = self.task_file_key(organization_uuid, project_uuid, task_uuid, filename)
+        return self.file_service.create_upload_url(file_key, content_type, size)
 
-    async def get_task_in_project(self, organization_uuid: str, project_uuid: str, task_uuid: str):
+    async def finalize_task_file(self, organization_uuid: str, project_uuid: str, task_uuid: str, filename: str):
+        """
+        Record a directly uploaded attachment on its task, replacing (and deleting) any previous one.
+        """
+        # Step 1: Verify the task exists and the file was uploaded (its size was bound by the upload URL)
+        parents = await self.get_parents(organization_uuid, project_uuid=project_uuid, task_uuid=task_uuid,
+                                         projections={"task": None})
+        task = parents["task"]
+        file_key = self.task_file_key(organization_uuid, project_uuid, task_uuid, filename)
+        if await self.file_service.get_file_size(file_key) is None:
+            raise ErrorCode.BadRequest("File has not been uploaded.")
+        file_url = self.file_service.file_url(file_key)
+
+        # Step 2: Record the file on the task
+        await self.update_item(identifier=project_uuid, sk=f"TASK#{task_uuid}", attributes={"FileUrl": file_url},
+                               checks=self.parent_checks(organization_uuid, project_uuid=project_uuid),
+                               error=ErrorCode.NotFound("Task", task_uuid))
+
+        # Step 3: Delete the file it replaces
+        previous_url = task.get("FileUrl")
+        if previous_url and previous_url != file_url:
+            await self.file_service.delete_file(previous_url)
+        return {**task, "FileUrl": file_url}
+
+    async def create_task_download_url(self, organization_uuid: str, project_uuid: str, task_uuid: str):
+        """
+        Issue a short-lived URL the client downloads a task attachment from directly.
+        """
+        parents = await self.get_parents(organization_uuid, project_uuid=project_uuid, task_uuid=task_uuid,
+                                         projections={"task": ("FileUrl",)})
+        task = parents["task"]
+        if not task.get("FileUrl"):
+            raise ErrorCode.NotFound("File for task", task_uuid)
+        return self.file_service.create_download_url(task["FileUrl"])
+
+    async def get_task_in_project(self, organization_uuid: str, project_uuid: str, task_uuid: str,
+                                  projection: tuple = None):
         """
         Get details of a specific task in a project under an organization.
         """
-        # Verify the organization and project exist
-        await self.get_item(identifier=organization_uuid, sk=f"PROJECT#{project_uuid}", pk_prefix="ORG")
-
-        return await self.get_item(identifier=project_uuid, sk=f"TASK#{task_uuid}")
+        # Verify the organization and project exist while fetching the task
+        parents = await self.get_parents(organization_uuid, project_uuid=project_uuid, task_uuid=task_uuid,
+                                         projections={"task": projection})
+        return parents["task"]
 
     async def update_task_in_project(self, organization_uuid: str, project_uuid: str, task_uuid: str, title: str,
                                      description: str, priority: str, deadline: str):
         """
         Update a task's details in a specific project under an organization.
         """
-        # Verify the organization and project exist
-        await self.get_item(identifier=organization_uuid, sk=f"PROJECT#{project_uuid}", pk_prefix="ORG")
-
-        # Update task details
+        # Update task details, provided the organization and project still exist
         attributes = {
             "Title": title,
             "Description": description,
             "Priority": priority,
-            "Deadline": deadline,
+            "Deadline": int(deadline.timestamp()),  # Convert to UNIX timestamp
         }
-        return await self.update_item(identifier=project_uuid, sk=f"TASK#{task_uuid}", attributes=attributes)
+        return await self.update_item(identifier=project_uuid, sk=f"TASK#{task_uuid}", attributes=attributes,
+                                      checks=self.parent_checks(organization_uuid, project_uuid=project_uuid),
+                                      error=ErrorCode.NotFound("Task", task_uuid))
 
     async def delete_task_in_project(self, organization_uuid: str, project_uuid: str, task_uuid: str):
         """
         Delete a task in a project under an organization, including all user-task relationships.
         """
         # Verify the organization, project, and task exist
-        await self.get_item(identifier=organization_uuid, sk=f"PROJECT#{project_uuid}", pk_prefix="ORG")
-        await self.get_item(identifier=project_uuid, sk=f"TASK#{task_uuid}")
+        parents = await self.get_parents(organization_uuid, project_uuid=project_uuid, task_uuid=task_uuid,
+                                         projections={"task": ("FileUrl",)})
+        task = parents["task"]
 
-        # Step 1: Fetch and delete all user-task relationships
-        user_task_items = await self.task_service.get_items(identifier=task_uuid, sk_prefix="USER")
-        for user_task in user_task_items:
-            user_sk = user_task["SK"]  # Extract the user SK
-            await self.task_service.delete_item(identifier=task_uuid, sk=user_sk)
+        # Step 1: Delete all user-task relationships in batches
+        await self.batch_delete_items(await self.collect_task_keys(project_uuid, task_uuid))
 
         # Step 2: If the task has an associated file, delete it
-        task = await self.get_item(identifier=project_uuid, sk=f"TASK#{task_uuid}")
         file_url = task.get("FileUrl")
         if file_url:
-            self.file_service.delete_file(file_url)
+            await self.file_service.delete_file(file_url)
 
         # Step 3: Delete the task itself
         return await self.delete_item(identifier=project_uuid, sk=f"TASK#{task_uuid}")
 
-    async def get_project_tasks(self, organization_uuid: str, project_uuid: str):
+    async def collect_task_keys(self, project_uuid: str, task_uuid: str):
+        """
+        Collect the keys of the rows hanging off a task: its user assignments and their inverted user-to-task rows.
+        The task row itself is not included.
+        """
+        keys = await self.task_service.get_keys(identifier=task_uuid, sk_prefix="USER#")
+        inverted_keys = [
+            {"PK": f"USER#{self.extract_uuid(key['SK'], prefix='USER')}", "SK": f"TASK#{project_uuid}#{task_uuid}"}
+            for key in keys
+        ]
+        return keys + inverted_keys
+
+    async def collect_project_keys(self, project_uuid: str):
+        """
+        Collect the keys of every row below a project (tasks, members, task assignments and inverted
+        user-to-task rows) and the URLs of the task attachments. The project row itself is not included.
+        """
+        keys = await self.get_keys(identifier=project_uuid, attributes=("FileUrl",))
+        task_uuids = [self.extract_uuid(key["SK"], prefix="TASK") for key in keys if key["SK"].startswith("TASK#")]
+        file_urls = [key["FileUrl"] for key in keys if key.get("FileUrl")]
+
+        for task_keys in await self.gather_limited(
+                self.collect_task_keys(project_uuid, task_uuid) for task_uuid in task_uuids
+        ):
+            keys.extend(task_keys)
+        return keys, file_urls
+
+    async def get_project_tasks(self, organization_uuid: str, project_uuid: str, limit: int = None,
+                                cursor: str = None, projection: tuple = None):
         """
-        Retrieve all tasks in a project.
+        Retrieve a page of tasks in a project (all of them when no limit or cursor is given).
         """
         # Verify the organization and project exist
-        await self.get_item(identifier=organization_uuid, sk=f"PROJECT#{project_uuid}", pk_prefix="ORG")
+        await self.verify_project(organization_uuid, project_uuid)
 
-        return await self.get_items(identifier=project_uuid, sk_prefix="TASK#")
+        return await self.get_page(identifier=project_uuid, sk_prefix="TASK#", limit=limit, cursor=cursor,
+                                   projection=projection)
 
-    async def get_project_users(self, organization_uuid: str, project_uuid: str):
+    async def get_project_users(self, organization_uuid: str, project_uuid: str, limit: int = None,
+                                cursor: str = None, projection: tuple = None):
         """
-        Retrieve all users assigned to a project.
+        Retrieve a page of users assigned to a project (all of them when no limit or cursor is given).
         """
         # Verify the organization and project exist
-        await self.get_item(identifier=organization_uuid, sk=f"PROJECT#{project_uuid}", pk_prefix="ORG")
+        await self.verify_project(organization_uuid, project_uuid)
 
         # Query for users assigned to this project
-        project_users = await self.get_items(identifier=project_uuid, sk_prefix="USER#")
+        page = await self.get_page(identifier=project_uuid, sk_prefix="USER#", limit=limit, cursor=cursor,
+                                   projection=())
 
-        users = []
-        for user_item in project_users:
-            user_uuid = user_item['SK']  # Extract user UUID from the SK field
-
-            # Fetch the user details (assuming you have a method to get user info by UUID)
-            user_data = await self.get_item(identifier=organization_uuid, sk=user_uuid, pk_prefix="ORG")
-
-            # Add the user data to the list (customize this as per your response structure)
-            users.append(user_data)
-
-        return users
+        # Hydrate the user records in batches instead of one request per member
+        page.items = await self.batch_get_items(
+            [{"PK": f"ORG#{organization_uuid}", "SK": user_item["SK"]} for user_item in page.items],
+            projection=projection,
+        )
+        return page
 
     async def add_user_to_project(self, organization_uuid: str, project_uuid: str, user_uuid: str):
         """
         Add a user to a project.
         """
-        # Verify the organization and project exist
-        await self.get_item(identifier=organization_uuid, sk=f"PROJECT#{project_uuid}", pk_prefix="ORG")
-        user_item = await self.get_item(identifier=organization_uuid, sk=f"USER#{user_uuid}", pk_prefix="ORG")
-
-        # Check if the user is already in the project
-        project_user_item = await self.get_item(identifier=project_uuid, sk=f"USER#{user_uuid}", ignore_error=True)
-        if project_user_item:
-            raise ErrorCode.Conflict("User", user_uuid)  # Raise Conflict if the user is already assigned
-
-        user_project_sk = f"USER#{user_uuid}"
-        await self.create_item(identifier=project_uuid, sk=user_project_sk,
-                               attributes={"AddedAt": int(datetime.utcnow().timestamp())})
-
+        # Add the membership in one transaction that also checks the organization, project and user exist,
+        # while the user record returned to the caller is read concurrently
+        user_item, _ = await asyncio.gather(
+            self.get_item(identifier=organization_uuid, sk=f"USER#{user_uuid}", pk_prefix="ORG", ignore_error=True),
+            self.transact_write([
+                *self.parent_checks(organization_uuid, project_uuid=project_uuid, user_uuid=user_uuid),
+                self.transact_put(
+                    {"PK": f"PROJECT#{project_uuid}", "SK": f"USER#{user_uuid}",
+                     "AddedAt": int(datetime.utcnow().timestamp())},
+                    error=ErrorCode.Conflict("User", user_uuid),  # The user is already in the project
+                ),
+            ]),
+        )
         return user_item
 
     async def remove_user_from_project(self, organization_uuid: str, project_uuid: str, user_uuid: str):
         """
         Remove a user from a project and all associated tasks.
         """
-        # Step 1: Verify the organization, project, and user exist
-        await self.get_item(identifier=organization_uuid, sk=f"PROJECT#{project_uuid}", pk_prefix="ORG")
-        await self.get_item(identifier=organization_uuid, sk=f"USER#{user_uuid}", pk_prefix="ORG")
-
-        # Step 2: Check if the user is in the project
-        project_user_item = await self.get_item(identifier=project_uuid, sk=f"USER#{user_uuid}",
-                                                ignore_error=True)
-        if not project_user_item:
-            raise ErrorCode.NotFound("User", user_uuid)
+        # Step 1: Verify the organization, project, and user exist and that the user is in the project
+        await self.get_parents(organization_uuid, project_uuid=project_uuid, user_uuid=user_uuid,
+                               project_member=True)
 
-        # Step 3: Fetch all tasks in the project
-        task_items = await self.get_items(identifier=project_uuid, sk_prefix="TASK")
+        # Step 2: Fetch the user's tasks in the project from the inverted user-to-task rows
+        user_task_items = await self.get_items(identifier=user_uuid, sk_prefix=f"TASK#{project_uuid}#",
+                                               pk_prefix="USER", projection=())
 
-        # Step 4: Remove the user from all tasks in the project
-        for task in task_items:
-            task_uuid = task["SK"].split("#")[1]  # Extract task UUID from SK
-
-            # Check if the user exists in the task
-            task_user_item = await self.get_item(identifier=task_uuid, sk=f"USER#{user_uuid}", pk_prefix="TASK",
-                                                 ignore_error=True)
-            if task_user_item:
-                await self.delete_item(identifier=task_uuid, sk=f"USER#{user_uuid}", pk_prefix="TASK")
+        # Step 3: Remove the user from those tasks, both rows of every assignment in batches
+        keys = []
+        for user_task in user_task_items:
+            task_uuid = user_task["SK"].rsplit("#", 1)[1]  # Extract task UUID from TASK#<project>#<task>
+            keys.append({"PK": f"TASK#{task_uuid}", "SK": f"USER#{user_uuid}"})
+            keys.append({"PK": user_task["PK"], "SK": user_task["SK"]})
+        await self.batch_delete_items(keys)
 
-        # Step 5: Remove the user from the project itself
+        # Step 4: Remove the user from the project itself
         return await self.delete_item(identifier=project_uuid, sk=f"USER#{user_uuid}")
@@ -1,3 +1,4 @@
+import asyncio
 from datetime import datetime
 
 from app.core.exceptions import ErrorCode
@@ -18,35 +19,25 @@ class TaskService(BaseService):
         Assign a user to a task in a project.
         If the user is not already in the project, they will be added to the project as well.
         """
-        # Step 1: Verify the organization and project exist
-        await self.get_item(identifier=organization_uuid, sk=f"PROJECT#{project_uuid}", pk_prefix="ORG")
-        user_item = await self.get_item(identifier=organization_uuid, sk=f"USER#{user_uuid}", pk_prefix="ORG")
-        await self.get_item(identifier=project_uuid, sk=f"TASK#{task_uuid}", pk_prefix="PROJECT")
-
-        # Step 2: Check if the user is already assigned to the task
-        task_user_item = await self.get_item(identifier=task_uuid, sk=f"USER#{user_uuid}", ignore_error=True)
-        if task_user_item:
-            raise ErrorCode.Conflict("User", user_uuid)  # Raise Conflict if the user is already assigned
-
-        # Step 3: Check if the user is already in the project
-        project_user_item = await self.get_item(identifier=project_uuid, sk=f"USER#{user_uuid}", pk_prefix="PROJECT",
-                                                ignore_error=True)
-        if not project_user_item:
-            # Add the user to the project if they are not already part of it
-            await self.create_item(
-                identifier=project_uuid,
-                sk=f"USER#{user_uuid}",
-                attributes={"AddedAt": int(datetime.utcnow().timestamp())},
-                pk_prefix="PROJECT"
-            )
-
-        # Step 4: Assign the user to the task
-        await self.create_item(
-            identifier=task_uuid,
-            sk=f"USER#{user_uuid}",
-            attributes={"AddedAt": int(datetime.utcnow().timestamp())}
+        added_at = int(datetime.utcnow().timestamp())
+        # Step 1: Verify the organization, project, task and user exist, assign the user to the task, add them
+        # to the project unless they are a member already and write the inverted user-to-task row, all in a
+        # single transaction. The user record returned to the caller is read concurrently.
+        user_item, _ = await asyncio.gather(
+            self.get_item(identifier=organization_uuid, sk=f"USER#{user_uuid}", pk_prefix="ORG", ignore_error=True),
+            self.transact_write([
+                *self.parent_checks(organization_uuid, project_uuid=project_uuid, task_uuid=task_uuid,
+                                    user_uuid=user_uuid),
+                self.transact_put(
+                    {"PK": f"TASK#{task_uuid}", "SK": f"USER#{user_uuid}", "AddedAt": added_at},
+                    error=ErrorCode.Conflict("User", user_uuid),  # The user is already assigned
+                ),
+                self.transact_ensure({"PK": f"PROJECT#{project_uuid}", "SK": f"USER#{user_uuid}"},
+                                     {"AddedAt": added_at}),
+                self.transact_put({"PK": f"USER#{user_uuid}", "SK": f"TASK#{project_uuid}#{task_uuid}",
+                                   "AddedAt": added_at}),
+            ]),
         )
-
         return user_item
 
     # Remove User from Task
@@ -54,35 +45,32 @@ class TaskService(BaseService):
         """
         Remove a user from a task in a project.
         """
-        # Verify the organization and project exist
-        await self.get_item(identifier=organization_uuid, sk=f"PROJECT#{project_uuid}", pk_prefix="ORG")
-        await self.get_item(identifier=organization_uuid, sk=f"USER#{user_uuid}", pk_prefix="ORG")
-        await self.get_item(identifier=project_uuid, sk=f"TASK#{task_uuid}", pk_prefix="PROJECT")
-        await self.get_item(identifier=task_uuid, sk=f"USER#{user_uuid}", pk_prefix="TASK")
-
-        # Delete the item that maps user to task
-        return await self.delete_item(identifier=task_uuid, sk=f"USER#{user_uuid}")
+        # Verify the organization, project, task and user exist and delete the assignment and its inverted
+        # user-to-task row in one transaction, failing with NotFound if the user is not assigned
+        await self.transact_write([
+            *self.parent_checks(organization_uuid, project_uuid=project_uuid, task_uuid=task_uuid,
+                                user_uuid=user_uuid),
+            self.transact_delete({"PK": f"TASK#{task_uuid}", "SK": f"USER#{user_uuid}"},
+                                 error=ErrorCode.NotFound("User", user_uuid)),
+            self.transact_delete({"PK": f"USER#{user_uuid}", "SK": f"TASK#{project_uuid}#{task_uuid}"}),
+        ])
 
     # Get Users in Task
-    async def get_users_in_task(self, organization_uuid: str, project_uuid: str, task_uuid: str):
+    async def get_users_in_task(self, organization_uuid: str, project_uuid: str, task_uuid: str, limit: int = None,
+                                cursor: str = None, projection: tuple = None):
         """
-        Retrieve all users assigned to a specific task under a project.
+        Retrieve a page of users assigned to a specific task under a project
+        (all of them when no limit or cursor is given).
         """
-        # Verify the organization and project exist
-        await self.get_item(identifier=organization_uuid, sk=f"PROJECT#{project_uuid}", pk_prefix="ORG")
-        await self.get_item(identifier=project_uuid, sk=f"TASK#{task_uuid}", pk_prefix="PROJECT")
+        # Verify the organization, project and task exist
+        await self.get_parents(organization_uuid, project_uuid=project_uuid, task_uuid=task_uuid)
 
         # Query for users assigned to this task
-        task_users = await self.get_items(identifier=task_uuid, sk_prefix="USER#")
+        page = await self.get_page(identifier=task_uuid, sk_prefix="USER#", limit=limit, cursor=cursor, projection=())
 
-        users = []
-        for user_item in task_users:
-            user_uuid = user_item['SK']  # Extract user UUID from the SK field
-
-            # Fetch the user details (assuming you have a method to get user info by UUID)
-            user_data = await self.get_item(identifier=organization_uuid, sk=user_uuid, pk_prefix="ORG")
-
-            # Add the user data to the list (customize this as per your response structure)
-            users.append(user_data)
-
-        return users
+        # Hydrate the user records in batches instead of one request per member
+        page.items = await self.batch_get_items(
+            [{"PK": f"ORG#{organization_uuid}", "SK": user_item["SK"]} for user_item in page.items],
+            projection=projection,
+        )
+        return page
@@ -6,26 +6,38 @@ class UserService(BaseService):
         super().__init__(table, pk_prefix="", service_name="User")
         self.log_service = log_service
 
-    async def get_all_tasks_for_user_in_project(self, organization_uuid: str, project_uuid: str, user_uuid: str):
+    async def get_all_tasks_for_user_in_project(self, organization_uuid: str, project_uuid: str, user_uuid: str,
+                                                limit: int = None, cursor: str = None, projection: tuple = None):
         """
-        Retrieve all tasks assigned to a specific user in a project under an organization.
+        Retrieve tasks assigned to a specific user in a project under an organization.
         """
         # Verify that the organization and project exist
-        await self.get_item(identifier=organization_uuid, sk=f"PROJECT#{project_uuid}", pk_prefix="ORG")
+        await self.verify_project(organization_uuid, project_uuid)
 
-        # Retrieve all tasks in the project
-        tasks = await self.get_items(identifier=project_uuid, sk_prefix="TASK", pk_prefix="PROJECT")
+        # A single query on the inverted USER#<user>/TASK#<project>#<task> rows finds the user's tasks
+        page = await self.get_page(identifier=user_uuid, sk_prefix=f"TASK#{project_uuid}#", pk_prefix="USER",
+                                   limit=limit, cursor=cursor, projection=())
+        return await self._hydrate_tasks(page, projection)
 
-        # Now, for each task, check if the user is assigned to it (USER#<UserID> relationship)
-        task_user_associations = []
-        for task in tasks:
-            task_id = task['SK'].split("#")[1]  # Extract Task ID from SK
-            user_assigned = await self.get_items(identifier=task_id, sk_prefix="USER", pk_prefix="TASK")
+    async def get_all_tasks_for_user_in_organization(self, organization_uuid: str, user_uuid: str,
+                                                     limit: int = None, cursor: str = None, projection: tuple = None):
+        """
+        Retrieve tasks assigned to a specific user across all projects of an organization.
+        """
+        # Verify that the organization exists and the user belongs to it
+        await self.get_parents(organization_uuid, user_uuid=user_uuid)
 
-            # Check if the user_uuid is associated with the task
-            for user in user_assigned:
-                if user['SK'] == f"USER#{user_uuid}":  # If user is assigned to this task
-                    task_user_associations.append(task)
-                    break
+        page = await self.get_page(identifier=user_uuid, sk_prefix="TASK#", pk_prefix="USER",
+                                   limit=limit, cursor=cursor, projection=())
+        return await self._hydrate_tasks(page, projection)
 
-        return task_user_associations
+    async def _hydrate_tasks(self, page, projection: tuple = None):
+        """
+        Replace the user-to-task rows of `page` with the task items they point at (their `projection` only).
+        """
+        keys = []
+        for user_task in page.items:
+            _, project_uuid, task_uuid = user_task["SK"].split("#")  # TASK#<project>#<task>
+            keys.append({"PK": f"PROJECT#{project_uuid}", "SK": f"TASK#{task_uuid}"})
+        page.items = await self.batch_get_items(keys, projection=projection)
+        return page
@@ -1 +1,67 @@
 GSI_ORG_USERS = "GSI_OrgUsers"
+
+# Sparse index over META rows: only items carrying an EntityType attribute (e.g. "ORG") are projected into it
+GSI_ENTITY_TYPE = "GSI_EntityType"
+ENTITY_TYPE_ATTRIBUTE = "EntityType"
+
+# Items carrying this attribute are being deleted in the background and are treated as gone by every read
+TOMBSTONE_ATTRIBUTE = "DeletedAt"
+
+# Process-wide cache of hot entity rows, per entity type: seconds a found row is kept, seconds a missing row
+# is remembered as missing and the maximum number of cached rows. Rows written by other processes are seen
+# once their entry expires.
+ENTITY_CACHE_POLICIES = {
+    "ORG": {"ttl": 30, "negative_ttl": 5, "max_size": 10_000},
+    "PROJECT": {"ttl": 30, "negative_ttl": 5, "max_size": 50_000},
+    "USER": {"ttl": 30, "negative_ttl": 5, "max_size": 50_000},
+}
+
+# DynamoDB request limits
+BATCH_GET_MAX_KEYS = 100
+BATCH_WRITE_MAX_ITEMS = 25
+BATCH_WRITE_CONCURRENCY = 8
+BATCH_MAX_RETRIES = 5
+BATCH_RETRY_BASE_DELAY = 0.05
+
+# Bulk creation: rows accepted per request, and valid rows written (in BatchWriteItem chunks) while the rest of the
+# request is still being read and validated
+BULK_CREATE_MAX_ROWS = 10_000
+BULK_CREATE_WINDOW = 1000
+IMPORT_MAX_ERRORS = 100  # Row errors reported back by an organization import, the rest are only counted
+
+# Background jobs
+JOB_DELETE_ORGANIZATION = "DELETE_ORGANIZATION"
+JOB_WORKERS = 2
+JOB_LEASE_SECONDS = 60
+JOB_POLL_INTERVAL = 30
+JOB_MAX_ATTEMPTS = 3
+ORG_DELETE_CHUNK_SIZE = 25
+
+# Task attachments
+UPLOAD_MAX_SIZE = 1024 ** 3  # 1 GiB
+UPLOAD_CHUNK_SIZE = 1024 ** 2  # Bytes copied per chunk when streaming to local storage
+UPLOAD_PART_SIZE = 8 * 1024 ** 2  # S3 multipart part size, files up to one part are sent with a single PutObject
+UPLOAD_FORM_OVERHEAD = 64 * 1024  # Bytes allowed on top of the file in a multipart body (boundaries, form fields)
+S3_MIN_PART_SIZE = 5 * 1024 ** 2
+FILE_URL_EXPIRY = 900  # Seconds a presigned or signed direct upload/download URL stays valid
+
+# Content-addressed attachment store: unreferenced blobs are kept this long before being deleted,
+# so a file attached again shortly after being released is not uploaded twice
+BLOB_GC_GRACE_SECONDS = 3600
+BLOB_GC_INTERVAL = 300
+
+# Background log shipping: queued messages are sent every LOG_FLUSH_INTERVAL seconds or as soon as a batch fills up.
+# Batches follow the PutLogEvents limits (events, bytes counted with a per-event overhead, time span)
+LOG_QUEUE_SIZE = 50_000
+LOG_FLUSH_INTERVAL = 2
+LOG_BATCH_MAX_EVENTS = 10_000
+LOG_BATCH_MAX_BYTES = 1_048_576
+LOG_BATCH_MAX_SPAN_MS = 24 * 3600 * 1000
+LOG_EVENT_OVERHEAD = 26
+LOG_EVENT_MAX_BYTES = 256 * 1024 - LOG_EVENT_OVERHEAD
+
+# Prometheus histogram bounds: storage call and request latencies in seconds, storage calls per request
+METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+METRICS_PER_REQUEST_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250)
+# (organization, route) totals kept by the capacity ledger; the least recently used are folded into "*"
+CAPACITY_LEDGER_MAX_ENTRIES = 10_000
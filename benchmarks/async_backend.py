@@ -0,0 +1,70 @@
+"""
+Throughput comparison of the "sync" and "aio" DynamoDB backends of BaseService.
+
+Runs the same number of concurrent ``BaseService.get_item`` calls through each backend against a local
+stand-in (or any endpoint passed with ``--endpoint-url``, e.g. the dynamodb-local container) and reports
+requests per second.
+
+    python -m benchmarks.async_backend --requests 500 --concurrency 50 --latency 0.005
+"""
+import argparse
+import asyncio
+import time
+
+import boto3
+
+from app.core.services import BaseService
+from app.core.services.dynamodb import AioTable, SyncTable, client_config
+from benchmarks.stub_dynamodb import StubDynamoDB
+
+TABLE_NAME = "ManagerTable"
+CREDENTIALS = {"region_name": "us-east-1", "aws_access_key_id": "DUMMY", "aws_secret_access_key": "DUMMY"}
+
+
+async def run(service: BaseService, identifier: str, requests: int, concurrency: int) -> float:
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            await service.get_item(identifier=identifier, sk="META")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - started
+
+
+async def main(args):
+    stub = None
+    endpoint_url = args.endpoint_url
+    if not endpoint_url:
+        stub = StubDynamoDB(latency=args.latency).start()
+        endpoint_url = stub.endpoint_url
+
+    resource = boto3.resource("dynamodb", endpoint_url=endpoint_url, **CREDENTIALS)
+    identifier = BaseService.generate_uuid()
+    resource.Table(TABLE_NAME).put_item(Item={"PK": f"ORG#{identifier}", "SK": "META", "Name": "Benchmark"})
+
+    backends = {
+        "sync": SyncTable(resource.Table(TABLE_NAME)),
+        "aio": AioTable(TABLE_NAME, endpoint_url=endpoint_url,
+                        config=client_config(max_pool_connections=args.concurrency), **CREDENTIALS),
+    }
+    print(f"{'backend':<8}{'requests':>10}{'seconds':>10}{'req/s':>10}")
+    for name, table in backends.items():
+        service = BaseService(table, pk_prefix="ORG", service_name="Organization")
+        await run(service, identifier, args.concurrency, args.concurrency)  # warm up connections
+        elapsed = await run(service, identifier, args.requests, args.concurrency)
+        print(f"{name:<8}{args.requests:>10}{elapsed:>10.2f}{args.requests / elapsed:>10.0f}")
+        await table.close()
+
+    if stub:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.005, help="Stand-in round-trip latency in seconds")
+    parser.add_argument("--endpoint-url", default=None, help="Use an existing DynamoDB endpoint instead")
+    asyncio.run(main(parser.parse_args()))
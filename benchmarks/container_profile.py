@@ -0,0 +1,118 @@
+"""
+Per-request cost of the service graph before and after it became a set of long-lived singletons.
+
+"per-request" is the Container with SERVICE_SCOPE=request: it rebuilds the Table wrapper and the
+OrganizationService -> ProjectService -> TaskService -> UserService chain on every resolution, and uses botocore's
+default client settings (10 pooled connections, legacy retries). "singleton" is the default configuration: one
+instance of each, sharing clients tuned by ``client_config``. For each profile the benchmark reports the memory allocated by one resolution of
+``organization_service`` and the latency of requests that resolve it and verify a project (two GetItems),
+with the entity cache disabled so every request reaches DynamoDB.
+
+    python -m benchmarks.container_profile --requests 500 --concurrency 50 --backend aio
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import tracemalloc
+
+import boto3
+from botocore.config import Config
+from dependency_injector import providers
+
+from app.core.container import Container
+from app.core.services import BaseService
+from benchmarks.stub_dynamodb import StubDynamoDB
+
+TABLE_NAME = "ManagerTable"
+CREDENTIALS = {"region_name": "us-east-1", "aws_access_key_id": "DUMMY", "aws_secret_access_key": "DUMMY"}
+SERVICE_SCOPES = {"per-request": "request", "singleton": "singleton"}
+
+
+def build_container(profile: str, backend: str, endpoint_url: str) -> Container:
+    container = Container()
+    container.config.from_dict({
+        "dynamodb_backend": backend,
+        "endpoint_url": endpoint_url,
+        "table_name": TABLE_NAME,
+        "aws_access_key_id": CREDENTIALS["aws_access_key_id"],
+        "aws_secret_access_key": CREDENTIALS["aws_secret_access_key"],
+        "entity_cache": {entity: {"ttl": 0} for entity in ("ORG", "PROJECT", "USER")},
+        "service_scope": SERVICE_SCOPES[profile],
+    })
+    if profile == "per-request":
+        container.aws_client_config.override(providers.Object(Config()))
+    return container
+
+
+def allocation_per_resolution(container: Container, resolutions: int = 200) -> float:
+    container.organization_service()  # resolve the singletons once, like the first request would
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    services = [container.organization_service() for _ in range(resolutions)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del services
+    return (after - before) / resolutions
+
+
+async def run(container: Container, organization_uuid: str, project_uuid: str, requests: int,
+              concurrency: int) -> tuple[list[float], float]:
+    remaining = iter(range(requests))
+    latencies = []
+
+    async def worker():
+        for _ in remaining:
+            started = time.perf_counter()
+            service = container.organization_service()
+            await service.verify_project(organization_uuid, project_uuid)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - started
+
+
+async def main(args):
+    stub = None
+    endpoint_url = args.endpoint_url
+    if not endpoint_url:
+        stub = StubDynamoDB(latency=args.latency).start()
+        endpoint_url = stub.endpoint_url
+
+    table = boto3.resource("dynamodb", endpoint_url=endpoint_url, **CREDENTIALS).Table(TABLE_NAME)
+    organization_uuid, project_uuid = BaseService.generate_uuid(), BaseService.generate_uuid()
+    table.put_item(Item={"PK": f"ORG#{organization_uuid}", "SK": "META", "Name": "Benchmark"})
+    table.put_item(Item={"PK": f"ORG#{organization_uuid}", "SK": f"PROJECT#{project_uuid}", "Title": "Benchmark"})
+
+    print(f"{'profile':<12}{'bytes/resolve':>14}{'req/s':>8}{'mean ms':>9}{'p50 ms':>8}{'p95 ms':>8}")
+    results = {}
+    for profile in SERVICE_SCOPES:
+        container = build_container(profile, args.backend, endpoint_url)
+        allocated = allocation_per_resolution(container)
+        await run(container, organization_uuid, project_uuid, args.concurrency, args.concurrency)  # warm up
+        latencies, elapsed = await run(container, organization_uuid, project_uuid, args.requests, args.concurrency)
+        latencies = sorted(latency * 1000 for latency in latencies)
+        results[profile] = (allocated, args.requests / elapsed, statistics.mean(latencies),
+                            latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.95)])
+        print(f"{profile:<12}{results[profile][0]:>14.0f}{results[profile][1]:>8.0f}"
+              + "".join(f"{value:>{width}.1f}" for value, width in zip(results[profile][2:], (9, 8, 8))))
+        await container.dynamodb_backend_table().close()
+
+    # Change from the per-request graph (before) to the singleton graph (after), in percent
+    before, after = results["per-request"], results["singleton"]
+    print(f"{'change %':<12}" + "".join(f"{(new - old) / old * 100:>+{width}.0f}"
+                                         for old, new, width in zip(before, after, (14, 8, 9, 8, 8))))
+
+    if stub:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--backend", choices=("sync", "aio"), default="aio")
+    parser.add_argument("--latency", type=float, default=0.005, help="Stand-in round-trip latency in seconds")
+    parser.add_argument("--endpoint-url", default=None, help="Use an existing DynamoDB endpoint instead")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,556 @@
+"""
+End-to-end load test of every organization route.
+
+Seeds a dataset of organizations, users, projects, tasks and memberships into a local DynamoDB (the
+dynamodb-local container by default, see ``--endpoint-url``), then drives each route of
+``app/modules/v1/organizations/router.py`` in turn through the full FastAPI application (middlewares,
+dependency injection, validation and serialization), in process and without a network hop. For every route it
+reports throughput, p50/p95/p99 latency and the mean number of DynamoDB calls per request (from the
+``X-DynamoDB-Calls`` header). Routes that delete or detach something are run against rows created for the
+purpose before their timed request. ``--backend memory`` runs everything against the in-process table of
+``app/core/services/memory.py`` instead, which needs no DynamoDB at all.
+
+    python -m benchmarks.load_test --organizations 4 --projects 250 --tasks 10 --requests 200 --concurrency 20
+    python -m benchmarks.load_test --save-baseline benchmarks/baseline.json
+    python -m benchmarks.load_test --compare benchmarks/baseline.json
+    python -m benchmarks.load_test --backend memory --organizations 10 --projects 1000 --tasks 10
+
+With ``--compare`` each route's results are printed next to the baseline's, with the relative change.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
+from urllib.parse import urlencode
+
+CREDENTIALS = {"AWS_ACCESS_KEY_ID": "DUMMY", "AWS_SECRET_ACCESS_KEY": "DUMMY", "AWS_REGION": "us-east-1"}
+DEFAULT_ENDPOINT_URL = "http://localhost:8010"
+TABLE_NAME = "LoadTestTable"
+DEADLINE = (datetime.utcnow() + timedelta(days=30)).isoformat()
+ATTACHMENT = {"filename": "spec.pdf", "content_type": "application/pdf", "size": 1024}
+BULK_ROWS = 100  # Rows per request of the bulk creation routes
+
+
+class ASGIClient:
+    """
+    Sends requests straight to an ASGI application, so the measured latency is the application's own.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def request(self, method: str, path: str, json_body=None, form: dict = None,
+                      content: bytes = None) -> tuple[int, dict, bytes]:
+        path, _, query = path.partition("?")
+        headers = [(b"host", b"load-test")]
+        body = content or b""
+        if json_body is not None:
+            body = json.dumps(json_body).encode()
+            headers.append((b"content-type", b"application/json"))
+        elif form is not None:
+            body = urlencode(form).encode()
+            headers.append((b"content-type", b"application/x-www-form-urlencoded"))
+        headers.append((b"content-length", str(len(body)).encode()))
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method, "scheme": "http",
+            "path": path, "raw_path": path.encode(), "query_string": query.encode(), "root_path": "",
+            "headers": headers, "client": ("127.0.0.1", 0), "server": ("load-test", 80),
+        }
+        sent = False
+        complete = asyncio.Event()
+        response = {"status": 0, "headers": {}, "body": bytearray()}
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await complete.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = {k.decode().lower(): v.decode() for k, v in message.get("headers", [])}
+            elif message["type"] == "http.response.body":
+                response["body"] += message.get("body", b"")
+                if not message.get("more_body"):
+                    complete.set()
+
+        await self.app(scope, receive, send)
+        return response["status"], response["headers"], bytes(response["body"])
+
+    async def json(self, method: str, path: str, json_body=None, form: dict = None, expected: int = None):
+        status, _, body = await self.request(method, path, json_body=json_body, form=form)
+        if expected is not None and status != expected:
+            raise RuntimeError(f"{method} {path} answered {status}: {body[:200]!r}")
+        return json.loads(body) if body else None
+
+
+@dataclass
+class Organization:
+    uuid: str
+    users: list
+    projects: list  # (project_uuid, [task_uuid, ...], [member user_uuid, ...])
+
+
+async def seed(container, args) -> list[Organization]:
+    """
+    Create the dataset through the services, so rows have exactly the shape the routes write.
+    """
+    organization_service = container.organization_service()
+    project_service = container.project_service()
+    task_service = container.task_service()
+    limit = organization_service.gather_limited
+    rng = random.Random(args.seed)
+    organizations = []
+    for o in range(args.organizations):
+        organization = await organization_service.create_organization(f"Organization {o}", "Load test")
+        organization_uuid = organization_service.extract_uuid(organization["PK"], "ORG")
+        users = await limit(
+            organization_service.create_user_in_organization(
+                organization_uuid, f"User {u}", f"user{u}@org{o}.example.com", rng.choice(("admin", "member")),
+            )
+            for u in range(args.users)
+        )
+        user_uuids = [organization_service.extract_uuid(user["SK"], "USER") for user in users]
+        projects = await limit(
+            organization_service.create_project_in_organization(organization_uuid, f"Project {p}", "Load test",
+                                                                "active")
+            for p in range(args.projects)
+        )
+        project_entries = []
+        for project in projects:
+            project_uuid = organization_service.extract_uuid(project["SK"], "PROJECT")
+            members = rng.sample(user_uuids, min(args.members, len(user_uuids)))
+            await limit(project_service.add_user_to_project(organization_uuid, project_uuid, user) for user in members)
+            tasks = await limit(
+                project_service.create_task_in_project(organization_uuid, project_uuid, f"Task {t}", "Load test",
+                                                       rng.choice(("low", "medium", "high")),
+                                                       datetime.fromisoformat(DEADLINE))
+                for t in range(args.tasks)
+            )
+            task_uuids = [project_service.extract_uuid(task["SK"], "TASK") for task in tasks]
+            await limit(
+                task_service.add_user_to_task(organization_uuid, project_uuid, task_uuid, user)
+                for task_uuid in task_uuids
+                for user in rng.sample(members, min(args.task_members, len(members)))
+            )
+            project_entries.append((project_uuid, task_uuids, members))
+        organizations.append(Organization(organization_uuid, user_uuids, project_entries))
+    return organizations
+
+
+class Dataset:
+    """
+    Random picks from the seeded data, plus throwaway rows for the routes that delete them.
+    """
+
+    def __init__(self, client: ASGIClient, organizations: list[Organization], seed: int):
+        self.client = client
+        self.organizations = organizations
+        self.rng = random.Random(seed)
+
+    def organization(self) -> Organization:
+        return self.rng.choice(self.organizations)
+
+    def project(self):
+        organization = self.organization()
+        project_uuid, tasks, members = self.rng.choice(organization.projects)
+        return organization, project_uuid, tasks, members
+
+    def task(self):
+        organization, project_uuid, tasks, members = self.project()
+        return organization, project_uuid, self.rng.choice(tasks), members
+
+    async def new_organization(self) -> str:
+        organization = await self.client.json("POST", "/organizations/", {"name": "Disposable", "description": "-"},
+                                              expected=201)
+        return organization["uuid"]
+
+    async def new_user(self, organization_uuid: str) -> str:
+        user = await self.client.json("POST", f"/organizations/{organization_uuid}/users/",
+                                      {"name": "Disposable", "email": "disposable@example.com", "role": "member"},
+                                      expected=201)
+        return user["uuid"]
+
+    async def new_project(self, organization_uuid: str) -> str:
+        project = await self.client.json("POST", f"/organizations/{organization_uuid}/projects/",
+                                         {"title": "Disposable", "description": "-", "status": "active"},
+                                         expected=201)
+        return project["uuid"]
+
+    async def new_task(self, organization_uuid: str, project_uuid: str) -> str:
+        task = await self.client.json("POST", f"/organizations/{organization_uuid}/projects/{project_uuid}/tasks/",
+                                      form=task_form(), expected=201)
+        return task["uuid"]
+
+    async def upload_file(self, organization_uuid: str, project_uuid: str, task_uuid: str):
+        """
+        Upload an attachment through a (local storage) upload URL, without recording it on the task.
+        """
+        path = f"/organizations/{organization_uuid}/projects/{project_uuid}/tasks/{task_uuid}/file/upload-url/"
+        upload = await self.client.json("POST", path, ATTACHMENT, expected=200)
+        status, _, body = await self.client.request("PUT", upload["url"], content=b"x" * ATTACHMENT["size"])
+        if status != 204:
+            raise RuntimeError(f"Upload answered {status}: {body[:200]!r}")
+
+    async def attach_file(self, organization_uuid: str, project_uuid: str, task_uuid: str):
+        await self.upload_file(organization_uuid, project_uuid, task_uuid)
+        path = f"/organizations/{organization_uuid}/projects/{project_uuid}/tasks/{task_uuid}/file/"
+        await self.client.json("POST", path, {"filename": ATTACHMENT["filename"]}, expected=200)
+
+
+def task_form() -> dict:
+    return {"title": "Load test", "description": "Load test", "priority": "medium", "deadline": DEADLINE}
+
+
+# Each scenario prepares whatever it needs (untimed) and returns the timed request: (method, path, json, form)
+Scenario = Callable[[Dataset], Awaitable[tuple]]
+
+
+async def create_organization(d):
+    return "POST", "/organizations/", {"name": "Load test", "description": "-"}, None
+
+
+async def list_organizations(d):
+    return "GET", "/organizations/?limit=50", None, None
+
+
+async def get_organization(d):
+    return "GET", f"/organizations/{d.organization().uuid}/", None, None
+
+
+async def update_organization(d):
+    return "PUT", f"/organizations/{d.organization().uuid}/", {"name": "Renamed", "description": "-"}, None
+
+
+async def delete_organization(d):
+    return "DELETE", f"/organizations/{await d.new_organization()}/", None, None
+
+
+async def create_user(d):
+    body = {"name": "Load test", "email": "load@example.com", "role": "member"}
+    return "POST", f"/organizations/{d.organization().uuid}/users/", body, None
+
+
+async def create_users_bulk(d):
+    body = [{"name": "Load test", "email": "load@example.com", "role": "member"}] * BULK_ROWS
+    return "POST", f"/organizations/{d.organization().uuid}/users/bulk/", body, None
+
+
+async def list_users(d):
+    return "GET", f"/organizations/{d.organization().uuid}/users/?limit=50", None, None
+
+
+async def get_user(d):
+    organization = d.organization()
+    return "GET", f"/organizations/{organization.uuid}/users/{d.rng.choice(organization.users)}/", None, None
+
+
+async def update_user(d):
+    organization = d.organization()
+    body = {"name": "Renamed", "email": "renamed@example.com", "role": "member"}
+    return "PUT", f"/organizations/{organization.uuid}/users/{d.rng.choice(organization.users)}/", body, None
+
+
+async def delete_user(d):
+    organization_uuid = d.organization().uuid
+    return "DELETE", f"/organizations/{organization_uuid}/users/{await d.new_user(organization_uuid)}/", None, None
+
+
+async def list_user_tasks(d):
+    organization = d.organization()
+    return "GET", f"/organizations/{organization.uuid}/users/{d.rng.choice(organization.users)}/tasks/", None, None
+
+
+async def create_project(d):
+    body = {"title": "Load test", "description": "-", "status": "active"}
+    return "POST", f"/organizations/{d.organization().uuid}/projects/", body, None
+
+
+async def create_projects_bulk(d):
+    body = [{"title": "Load test", "description": "-", "status": "active"}] * BULK_ROWS
+    return "POST", f"/organizations/{d.organization().uuid}/projects/bulk/", body, None
+
+
+async def list_projects(d):
+    return "GET", f"/organizations/{d.organization().uuid}/projects/?limit=50", None, None
+
+
+async def get_project(d):
+    organization, project_uuid, _, _ = d.project()
+    return "GET", f"/organizations/{organization.uuid}/projects/{project_uuid}/", None, None
+
+
+async def update_project(d):
+    organization, project_uuid, _, _ = d.project()
+    body = {"title": "Renamed", "description": "-", "status": "active"}
+    return "PUT", f"/organizations/{organization.uuid}/projects/{project_uuid}/", body, None
+
+
+async def delete_project(d):
+    organization_uuid = d.organization().uuid
+    project_uuid = await d.new_project(organization_uuid)
+    return "DELETE", f"/organizations/{organization_uuid}/projects/{project_uuid}/", None, None
+
+
+async def add_project_user(d):
+    organization, project_uuid, _, _ = d.project()
+    body = {"uuid": d.rng.choice(organization.users)}
+    return "POST", f"/organizations/{organization.uuid}/projects/{project_uuid}/users/", body, None
+
+
+async def remove_project_user(d):
+    organization, project_uuid, _, _ = d.project()
+    user_uuid = await d.new_user(organization.uuid)
+    await d.client.json("POST", f"/organizations/{organization.uuid}/projects/{project_uuid}/users/",
+                        {"uuid": user_uuid}, expected=200)
+    return "DELETE", f"/organizations/{organization.uuid}/projects/{project_uuid}/users/{user_uuid}", None, None
+
+
+async def list_project_users(d):
+    organization, project_uuid, _, _ = d.project()
+    return "GET", f"/organizations/{organization.uuid}/projects/{project_uuid}/users", None, None
+
+
+async def list_tasks(d):
+    organization, project_uuid, _, _ = d.project()
+    return "GET", f"/organizations/{organization.uuid}/projects/{project_uuid}/tasks/?limit=50", None, None
+
+
+async def create_task(d):
+    organization, project_uuid, _, _ = d.project()
+    return "POST", f"/organizations/{organization.uuid}/projects/{project_uuid}/tasks/", None, task_form()
+
+
+async def create_tasks_bulk(d):
+    organization, project_uuid, _, _ = d.project()
+    path = f"/organizations/{organization.uuid}/projects/{project_uuid}/tasks/bulk/"
+    return "POST", path, [task_form()] * BULK_ROWS, None
+
+
+async def get_task(d):
+    organization, project_uuid, task_uuid, _ = d.task()
+    return "GET", f"/organizations/{organization.uuid}/projects/{project_uuid}/tasks/{task_uuid}/", None, None
+
+
+async def create_task_upload_url(d):
+    organization, project_uuid, task_uuid, _ = d.task()
+    path = f"/organizations/{organization.uuid}/projects/{project_uuid}/tasks/{task_uuid}/file/upload-url/"
+    return "POST", path, ATTACHMENT, None
+
+
+async def finalize_task_file(d):
+    organization, project_uuid, _, _ = d.project()
+    task_uuid = await d.new_task(organization.uuid, project_uuid)
+    await d.upload_file(organization.uuid, project_uuid, task_uuid)
+    path = f"/organizations/{organization.uuid}/projects/{project_uuid}/tasks/{task_uuid}/file/"
+    return "POST", path, {"filename": ATTACHMENT["filename"]}, None
+
+
+async def create_task_download_url(d):
+    organization, project_uuid, _, _ = d.project()
+    task_uuid = await d.new_task(organization.uuid, project_uuid)
+    await d.attach_file(organization.uuid, project_uuid, task_uuid)
+    path = f"/organizations/{organization.uuid}/projects/{project_uuid}/tasks/{task_uuid}/file/download-url/"
+    return "GET", path, None, None
+
+
+async def update_task(d):
+    organization, project_uuid, task_uuid, _ = d.task()
+    body = {**task_form(), "file": None}
+    return "PUT", f"/organizations/{organization.uuid}/projects/{project_uuid}/tasks/{task_uuid}/", body, None
+
+
+async def delete_task(d):
+    organization, project_uuid, _, _ = d.project()
+    task_uuid = await d.new_task(organization.uuid, project_uuid)
+    return "DELETE", f"/organizations/{organization.uuid}/projects/{project_uuid}/tasks/{task_uuid}/", None, None
+
+
+async def add_task_user(d):
+    organization, project_uuid, task_uuid, members = d.task()
+    path = f"/organizations/{organization.uuid}/projects/{project_uuid}/tasks/{task_uuid}/users/"
+    return "POST", path, {"uuid": d.rng.choice(members)}, None
+
+
+async def remove_task_user(d):
+    organization, project_uuid, _, members = d.project()
+    task_uuid = await d.new_task(organization.uuid, project_uuid)
+    user_uuid = d.rng.choice(members)
+    path = f"/organizations/{organization.uuid}/projects/{project_uuid}/tasks/{task_uuid}/users/"
+    await d.client.json("POST", path, {"uuid": user_uuid}, expected=201)
+    return "DELETE", f"{path}{user_uuid}/", None, None
+
+
+async def list_task_users(d):
+    organization, project_uuid, task_uuid, _ = d.task()
+    return "GET", f"/organizations/{organization.uuid}/projects/{project_uuid}/tasks/{task_uuid}/users/", None, None
+
+
+async def list_project_user_tasks(d):
+    organization, project_uuid, _, members = d.project()
+    path = f"/organizations/{organization.uuid}/projects/{project_uuid}/users/{d.rng.choice(members)}/tasks/"
+    return "GET", path, None, None
+
+
+SCENARIOS: dict[str, Scenario] = {
+    "create_organization": create_organization,
+    "list_organizations": list_organizations,
+    "get_organization": get_organization,
+    "update_organization": update_organization,
+    "delete_organization": delete_organization,
+    "create_user": create_user,
+    "create_users_bulk": create_users_bulk,
+    "list_users": list_users,
+    "get_user": get_user,
+    "update_user": update_user,
+    "delete_user": delete_user,
+    "list_user_tasks": list_user_tasks,
+    "create_project": create_project,
+    "create_projects_bulk": create_projects_bulk,
+    "list_projects": list_projects,
+    "get_project": get_project,
+    "update_project": update_project,
+    "delete_project": delete_project,
+    "add_project_user": add_project_user,
+    "remove_project_user": remove_project_user,
+    "list_project_users": list_project_users,
+    "list_tasks": list_tasks,
+    "create_task": create_task,
+    "create_tasks_bulk": create_tasks_bulk,
+    "get_task": get_task,
+    "create_task_upload_url": create_task_upload_url,
+    "finalize_task_file": finalize_task_file,
+    "create_task_download_url": create_task_download_url,
+    "update_task": update_task,
+    "delete_task": delete_task,
+    "add_task_user": add_task_user,
+    "remove_task_user": remove_task_user,
+    "list_task_users": list_task_users,
+    "list_project_user_tasks": list_project_user_tasks,
+}
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def run_scenario(dataset: Dataset, scenario: Scenario, requests: int, concurrency: int) -> dict:
+    remaining = iter(range(requests))
+    latencies, calls, errors = [], [], {}
+
+    async def worker():
+        for _ in remaining:
+            method, path, json_body, form = await scenario(dataset)
+            started = time.perf_counter()
+            status, headers, _ = await dataset.client.request(method, path, json_body=json_body, form=form)
+            latencies.append(time.perf_counter() - started)
+            calls.append(int(headers.get("x-dynamodb-calls", 0)))
+            if status >= 400:
+                errors[status] = errors.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies = sorted(latency * 1000 for latency in latencies)
+    return {
+        "requests": requests,
+        "rps": requests / elapsed,  # Includes the untimed preparation of destructive scenarios
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "mean_ms": statistics.mean(latencies),
+        "dynamodb_calls": statistics.mean(calls),
+        "errors": errors,
+    }
+
+
+def report(results: dict, baseline: dict = None):
+    columns = ("rps", "p50_ms", "p95_ms", "p99_ms", "dynamodb_calls")
+    print(f"{'route':<26}" + "".join(f"{column:>16}" for column in columns) + "  errors")
+    for name, result in results.items():
+        cells = []
+        for column in columns:
+            cell = f"{result[column]:.1f}"
+            previous = (baseline or {}).get(name, {}).get(column)
+            if previous:
+                cell += f" ({(result[column] - previous) / previous:+.0%})"
+            cells.append(f"{cell:>16}")
+        errors = ", ".join(f"{count}x{status}" for status, count in result["errors"].items())
+        print(f"{name:<26}" + "".join(cells) + f"  {errors}")
+
+
+def configure_environment(args):
+    os.environ.update(CREDENTIALS)
+    os.environ.update({
+        "ENV": "development",
+        "DYNAMODB_ENDPOINT_URL": args.endpoint_url,
+        "DYNAMODB_TABLE": args.table,
+        "DYNAMODB_BACKEND": args.backend,
+        "LOCAL_STORAGE_DIR": tempfile.mkdtemp(prefix="load-test-"),
+    })
+
+
+async def main(args):
+    configure_environment(args)
+    from app.main import create_app  # Imported once the environment points the Container at the test table
+
+    app = create_app()
+    await app.router.startup()
+    try:
+        started = time.perf_counter()
+        organizations = await seed(app.container, args)
+        print(f"Seeded {args.organizations} organizations, {args.organizations * args.projects} projects and "
+              f"{args.organizations * args.projects * args.tasks} tasks in {time.perf_counter() - started:.1f}s")
+
+        dataset = Dataset(ASGIClient(app), organizations, args.seed)
+        names = args.routes or list(SCENARIOS)
+        results = {}
+        for name in names:
+            if args.warmup:
+                await run_scenario(dataset, SCENARIOS[name], args.warmup, min(args.warmup, args.concurrency))
+            results[name] = await run_scenario(dataset, SCENARIOS[name], args.requests, args.concurrency)
+
+        baseline = None
+        if args.compare:
+            with open(args.compare) as f:
+                baseline = json.load(f)["results"]
+        report(results, baseline)
+        if args.save_baseline:
+            with open(args.save_baseline, "w") as f:
+                json.dump({"arguments": {k: v for k, v in vars(args).items() if k not in ("compare", "save_baseline")},
+                           "results": results}, f, indent=2)
+            print(f"Saved baseline to {args.save_baseline}")
+    finally:
+        await app.router.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--organizations", type=int, default=4)
+    parser.add_argument("--users", type=int, default=100, help="Users per organization")
+    parser.add_argument("--projects", type=int, default=250, help="Projects per organization")
+    parser.add_argument("--tasks", type=int, default=10, help="Tasks per project")
+    parser.add_argument("--members", type=int, default=5, help="Users added to each project")
+    parser.add_argument("--task-members", type=int, default=2, help="Project members assigned to each task")
+    parser.add_argument("--requests", type=int, default=200, help="Timed requests per route")
+    parser.add_argument("--warmup", type=int, default=10, help="Untimed requests per route")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--backend", choices=("sync", "aio", "memory"), default="aio",
+                        help="\"memory\" runs against the in-process table instead of --endpoint-url")
+    parser.add_argument("--endpoint-url", default=DEFAULT_ENDPOINT_URL, help="DynamoDB endpoint to seed and query")
+    parser.add_argument("--table", default=TABLE_NAME)
+    parser.add_argument("--routes", nargs="*", choices=list(SCENARIOS), help="Only run these routes")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed of the dataset and request mix")
+    parser.add_argument("--save-baseline", default=None, help="Write the results to this JSON file")
+    parser.add_argument("--compare", default=None, help="Compare against a baseline written by --save-baseline")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,102 @@
+"""
+Per-item CPU cost of serializing list responses, FastAPI's way and through ResponseSerializer.
+
+"fastapi" is what a list route used to do: validate the DynamoDB items one by one against ``list[<Model>]``
+(running the model's ``model_validator`` that splits the UUID out of the key), turn the models into JSON-ready
+Python data with ``jsonable_encoder`` and encode it with ``JSONResponse``. "fastapi+orjson" is the same with
+``ORJSONResponse``, the application's default response class, doing the encoding. "bulk" is
+``app.core.serialization.ResponseSerializer``: UUIDs extracted for the whole list, then one validate-and-dump
+pass in pydantic-core. Every path is checked to produce the same JSON before it is timed.
+
+    python -m benchmarks.serialization --items 10000 --rounds 5
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from decimal import Decimal
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.modules.v1.organizations.schemas import (
+    ORGANIZATION_SERIALIZER,
+    PROJECT_SERIALIZER,
+    TASK_SERIALIZER,
+    USER_SERIALIZER,
+    OrganizationResponse,
+    ProjectResponse,
+    TaskResponse,
+    UserResponse,
+)
+
+CREATED_AT = Decimal(1735689600)  # Numbers come back from DynamoDB as Decimals
+
+
+def organization(i: int) -> dict:
+    return {"PK": f"ORG#{uuid.uuid4()}", "SK": "META", "Name": f"Organization {i}",
+            "Description": "An organization", "CreatedAt": CREATED_AT, "EntityType": "ORG"}
+
+
+def user(i: int) -> dict:
+    return {"PK": "ORG#0", "SK": f"USER#{uuid.uuid4()}", "Name": f"User {i}", "Email": f"user{i}@example.com",
+            "Role": "member", "CreatedAt": CREATED_AT}
+
+
+def project(i: int) -> dict:
+    return {"PK": "ORG#0", "SK": f"PROJECT#{uuid.uuid4()}", "Title": f"Project {i}", "Description": "A project",
+            "Status": "active", "CreatedAt": CREATED_AT}
+
+
+def task(i: int) -> dict:
+    return {"PK": "PROJECT#0", "SK": f"TASK#{uuid.uuid4()}", "Title": f"Task {i}", "Description": "A task",
+            "Priority": "high", "Deadline": CREATED_AT + i, "FileUrl": None}
+
+
+MODELS = {
+    "organizations": (OrganizationResponse, ORGANIZATION_SERIALIZER, organization),
+    "users": (UserResponse, USER_SERIALIZER, user),
+    "projects": (ProjectResponse, PROJECT_SERIALIZER, project),
+    "tasks": (TaskResponse, TASK_SERIALIZER, task),
+}
+
+
+async def fastapi_body(field, items: list[dict], response_class) -> bytes:
+    # The validators write the UUID into the items, as they did to the items the services returned
+    content = await serialize_response(field=field, response_content=[dict(item) for item in items])
+    return response_class(content).body
+
+
+def per_item_microseconds(function, items: list[dict], rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        function(items)
+    return (time.perf_counter() - started) / rounds / len(items) * 1e6
+
+
+def main(args):
+    paths = ("fastapi", "fastapi+orjson", "bulk")
+    print(f"{'model':<16}" + "".join(f"{path + ' us/item':>24}" for path in paths) + f"{'speedup':>10}")
+    for name, (model, serializer, factory) in MODELS.items():
+        items = [factory(i) for i in range(args.items)]
+        field = create_model_field(name="Response_" + name, type_=list[model], mode="serialization")
+        functions = {
+            "fastapi": lambda rows: asyncio.run(fastapi_body(field, rows, JSONResponse)),
+            "fastapi+orjson": lambda rows: asyncio.run(fastapi_body(field, rows, ORJSONResponse)),
+            "bulk": lambda rows: serializer.response(rows).body,
+        }
+        bodies = {path: json.loads(function(items)) for path, function in functions.items()}
+        if any(body != bodies["fastapi"] for body in bodies.values()):
+            raise SystemExit(f"{name}: the serialization paths disagree")
+        costs = {path: per_item_microseconds(function, items, args.rounds) for path, function in functions.items()}
+        print(f"{name:<16}" + "".join(f"{costs[path]:>24.2f}" for path in paths)
+              + f"{costs['fastapi'] / costs['bulk']:>9.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=10000, help="Items per list")
+    parser.add_argument("--rounds", type=int, default=5, help="Serializations timed per path and model")
+    main(parser.parse_args())
@@ -0,0 +1,73 @@
+"""
+Minimal stand-in for the DynamoDB JSON API, used by the benchmarks when no dynamodb-local is reachable.
+
+It keeps items in memory, understands ``PutItem`` and ``GetItem`` and sleeps for a fixed
+``latency`` before answering each call to emulate the network round trip to DynamoDB.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubDynamoDB:
+    def __init__(self, latency: float = 0.005, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.items = {}
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def endpoint_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    @staticmethod
+    def _key(key: dict) -> tuple:
+        return json.dumps(key["PK"], sort_keys=True), json.dumps(key["SK"], sort_keys=True)
+
+    def handle(self, operation: str, body: dict) -> dict:
+        if operation == "PutItem":
+            self.items[self._key(body["Item"])] = body["Item"]
+            return {}
+        if operation == "GetItem":
+            item = self.items.get(self._key(body["Key"]))
+            return {"Item": item} if item else {}
+        raise NotImplementedError(operation)
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])) or b"{}")
+                operation = self.headers["X-Amz-Target"].split(".", 1)[1]
+                time.sleep(stub.latency)
+                try:
+                    status, payload = 200, stub.handle(operation, body)
+                except NotImplementedError:
+                    status, payload = 400, {"__type": "com.amazon.coral.validate#ValidationException",
+                                            "message": f"Unsupported operation {operation}"}
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/x-amz-json-1.0")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,105 @@
+"""
+Tests run the whole application against the in-memory table backend (app/core/services/memory.py), so they need
+neither DynamoDB nor AWS. The container reads its configuration when it is imported, hence the environment is set
+before anything from `app` is.
+"""
+import json
+import os
+import tempfile
+
+os.environ.update({
+    "ENV": "development",
+    "DYNAMODB_BACKEND": "memory",
+    "CACHE_BUS": "none",
+    "LOCAL_STORAGE_DIR": tempfile.mkdtemp(prefix="tests-"),
+    "LOCAL_LOG_DIR": tempfile.mkdtemp(prefix="tests-logs-"),
+})
+
+import pytest  # noqa: E402
+
+from app.main import create_app  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+class ASGIClient:
+    """
+    Sends requests straight to the application, without a network hop.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def request(self, method: str, path: str, json_body=None, content: bytes = b"", headers: dict = None):
+        path, _, query = path.partition("?")
+        if json_body is not None:
+            content = json.dumps(json_body).encode()
+            headers = {"content-type": "application/json", **(headers or {})}
+        headers = {"host": "test", "content-length": str(len(content)),
+                   **{name.lower(): value for name, value in (headers or {}).items()}}
+        raw_headers = [(name.encode(), value.encode()) for name, value in headers.items()]
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method, "scheme": "http",
+            "path": path, "raw_path": path.encode(), "query_string": query.encode(), "root_path": "",
+            "headers": raw_headers, "client": ("127.0.0.1", 0), "server": ("test", 80),
+        }
+        messages = [{"type": "http.request", "body": content, "more_body": False}]
+        response = {"status": 0, "headers": {}, "body": b""}
+
+        async def receive():
+            return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = {k.decode().lower(): v.decode() for k, v in message.get("headers", [])}
+            elif message["type"] == "http.response.body":
+                response["body"] += message.get("body", b"")
+
+        await self.app(scope, receive, send)
+        return Response(**response)
+
+    async def get(self, path: str, **kwargs):
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path: str, json_body=None, **kwargs):
+        return await self.request("POST", path, json_body=json_body, **kwargs)
+
+    async def put(self, path: str, json_body=None, **kwargs):
+        return await self.request("PUT", path, json_body=json_body, **kwargs)
+
+    async def delete(self, path: str, **kwargs):
+        return await self.request("DELETE", path, **kwargs)
+
+
+class Response:
+    def __init__(self, status: int, headers: dict, body: bytes):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body)
+
+
+@pytest.fixture
+async def app():
+    application = create_app()
+    await application.router.startup()
+    yield application
+    await application.router.shutdown()
+
+
+@pytest.fixture
+async def client(app):
+    return ASGIClient(app)
+
+
+@pytest.fixture
+async def organization(client) -> str:
+    response = await client.post("/organizations/", {"name": "Acme", "description": "Test organization"})
+    assert response.status == 201
+    return response.json()["uuid"]
@@ -0,0 +1,136 @@
+import asyncio
+import hashlib
+
+import pytest
+
+from app.core.jobs import PeriodicTask
+from app.main import create_app
+from test_uploads import TASK, create_task, multipart
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def app():
+    application = create_app()
+    application.container.config.file_storage_mode.from_value("content")
+    await application.router.startup()
+    yield application
+    await application.router.shutdown()
+
+
+@pytest.fixture
+async def project(client, organization) -> str:
+    response = await client.post(f"/organizations/{organization}/projects/",
+                                 {"title": "Apollo", "description": "Moon", "status": "active"})
+    return response.json()["uuid"]
+
+
+async def blob_row(app, content: bytes):
+    digest = hashlib.sha256(content).hexdigest()
+    response = await app.container.dynamodb_backend_table().get_item(Key={"PK": f"BLOB#{digest}", "SK": "META"})
+    return response.get("Item")
+
+
+async def upload(client, organization, project, content: bytes) -> dict:
+    response = await create_task(client, organization, project, multipart(TASK, content))
+    assert response.status == 201
+    return response.json()
+
+
+async def release(app, client, organization, project, content: bytes):
+    task = await upload(client, organization, project, content)
+    response = await client.delete(f"/organizations/{organization}/projects/{project}/tasks/{task['uuid']}/")
+    assert response.status == 204
+    return task
+
+
+async def test_same_content_is_stored_once(app, client, organization, project):
+    first = await upload(client, organization, project, b"hello")
+    second = await upload(client, organization, project, b"hello")
+
+    assert first["file_url"] == second["file_url"]
+    assert (await blob_row(app, b"hello"))["RefCount"] == 2
+
+
+async def test_deleting_a_task_releases_its_blob(app, client, organization, project):
+    await upload(client, organization, project, b"hello")
+    task = await upload(client, organization, project, b"hello")
+
+    await client.delete(f"/organizations/{organization}/projects/{project}/tasks/{task['uuid']}/")
+    row = await blob_row(app, b"hello")
+    assert row["RefCount"] == 1
+    assert "GcAfter" not in row
+
+    await release(app, client, organization, project, b"other")
+    row = await blob_row(app, b"other")
+    assert row["RefCount"] == 0
+    assert row["GcAfter"] and row["EntityType"] == "BLOB"
+
+
+async def test_garbage_collection_skips_blobs_within_the_grace_period(app, client, organization, project):
+    await release(app, client, organization, project, b"hello")
+    service = app.container.file_service()
+
+    assert await service.collect_garbage() == 0
+    row = await blob_row(app, b"hello")
+    assert await service.get_file_size(row["Key"]) == 5
+
+
+async def test_garbage_collection_deletes_expired_blobs(app, client, organization, project):
+    service = app.container.file_service()
+    service.gc_grace_seconds = -10
+    await release(app, client, organization, project, b"hello")
+    key = (await blob_row(app, b"hello"))["Key"]
+
+    assert await service.collect_garbage() == 1
+    assert await blob_row(app, b"hello") is None
+    assert await service.get_file_size(key) is None
+
+
+async def test_failed_blob_deletion_does_not_block_uploads(app, client, organization, project, monkeypatch):
+    service = app.container.file_service()
+    service.gc_grace_seconds = -10
+    await release(app, client, organization, project, b"hello")
+
+    async def fail(file_url):
+        raise OSError("Storage unavailable")
+
+    monkeypatch.setattr(service.file_service, "delete_file", fail)
+    assert await service.collect_garbage() == 0
+    assert "Collecting" not in await blob_row(app, b"hello")
+
+    # The blob is referenced again right away instead of waiting for the next collection
+    monkeypatch.setattr("app.core.services.attachments.BATCH_MAX_RETRIES", 0)
+    await upload(client, organization, project, b"hello")
+    assert (await blob_row(app, b"hello"))["RefCount"] == 1
+
+
+async def test_blob_being_collected_cannot_be_referenced(app, client, organization, project, monkeypatch):
+    await release(app, client, organization, project, b"hello")
+    digest = hashlib.sha256(b"hello").hexdigest()
+    await app.container.dynamodb_backend_table().update_item(
+        Key={"PK": f"BLOB#{digest}", "SK": "META"}, UpdateExpression="SET Collecting = :now",
+        ExpressionAttributeValues={":now": 1},
+    )
+    monkeypatch.setattr("app.core.services.attachments.BATCH_MAX_RETRIES", 0)
+    monkeypatch.setattr("app.core.services.attachments.BATCH_RETRY_BASE_DELAY", 0)
+
+    response = await create_task(client, organization, project, multipart(TASK, b"hello"))
+    assert response.status == 400
+    assert b"being deleted" in response.body
+
+
+async def test_collector_logs_errors_and_keeps_running(caplog):
+    calls = []
+
+    async def collect():
+        calls.append(True)
+        raise RuntimeError("Table unavailable")
+
+    task = PeriodicTask(collect, interval=0)
+    await task.start()
+    while len(calls) < 2:
+        await asyncio.sleep(0)
+    await task.stop()
+    assert [record.getMessage() for record in caplog.records][:2] == ["Error running periodic task"] * 2
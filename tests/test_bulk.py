@@ -0,0 +1,65 @@
+import gzip
+import json
+
+import pytest
+
+from app.core import bulk
+
+pytestmark = pytest.mark.anyio
+
+MISSING = "00000000-0000-0000-0000-000000000000"
+
+
+def user(i: int) -> dict:
+    return {"name": f"User {i}", "email": f"user{i}@example.com", "role": "member"}
+
+
+def ndjson(rows: list) -> bytes:
+    return b"".join(json.dumps(row).encode() + b"\n" for row in rows)
+
+
+async def test_bulk_create_from_a_json_array(client, organization):
+    rows = [user(0), {"name": "No email"}, user(2)]
+    response = await client.post(f"/organizations/{organization}/users/bulk/", rows)
+    assert response.status == 200
+    body = response.json()
+    assert (body["created"], body["failed"]) == (2, 1)
+    assert [result["status"] for result in body["results"]] == [201, 422, 201]
+    assert body["results"][1]["index"] == 1 and body["results"][1]["uuid"] is None
+
+    users = (await client.get(f"/organizations/{organization}/users/")).json()
+    assert sorted(u["uuid"] for u in users) == sorted(body["results"][i]["uuid"] for i in (0, 2))
+
+
+@pytest.mark.parametrize("compressed", [False, True])
+async def test_bulk_create_from_an_ndjson_stream(client, organization, compressed):
+    content = ndjson([user(i) for i in range(50)]) + b"\n{not json\n"
+    headers = {"content-type": "application/x-ndjson"}
+    if compressed:
+        content, headers["content-encoding"] = gzip.compress(content), "gzip"
+    response = await client.post(f"/organizations/{organization}/users/bulk/", content=content, headers=headers)
+    assert response.status == 200
+    body = response.json()
+    assert (body["created"], body["failed"]) == (50, 1)
+    assert body["results"][-1]["status"] == 422
+    assert len((await client.get(f"/organizations/{organization}/users/")).json()) == 50
+
+
+async def test_bulk_create_row_limit(client, organization, monkeypatch):
+    monkeypatch.setattr(bulk, "BULK_CREATE_MAX_ROWS", 3)
+    path = f"/organizations/{organization}/users/bulk/"
+    assert (await client.post(path, [user(i) for i in range(4)])).status == 413
+
+    response = await client.post(path, content=ndjson([user(i) for i in range(4)]),
+                                 headers={"content-type": "application/x-ndjson"})
+    body = response.json()
+    assert (body["created"], body["failed"]) == (3, 1)
+    assert body["results"][-1]["status"] == 413
+
+
+async def test_bulk_create_checks_the_parents(client, organization):
+    assert (await client.post(f"/organizations/{MISSING}/users/bulk/", [user(0)])).status == 404
+    tasks = [{"title": "Launch", "description": "-", "priority": "high", "deadline": "2030-01-01T00:00:00"}]
+    response = await client.post(f"/organizations/{organization}/projects/{MISSING}/tasks/bulk/", tasks)
+    assert response.status == 404
+    assert (await client.post(f"/organizations/{organization}/users/bulk/", {"not": "a list"})).status == 400
@@ -0,0 +1,31 @@
+import asyncio
+import logging
+import socket
+
+import pytest
+
+from app.core.cache_bus import UnixSocketBus
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_unix_socket_bus_delivers_invalidations_and_logs_malformed_ones(tmp_path, caplog):
+    received = []
+    first, second = UnixSocketBus(str(tmp_path)), UnixSocketBus(str(tmp_path))
+    await first.start(received.extend)
+    await second.start(lambda keys: None)
+    try:
+        second.publish([("ORG#1", "META")])
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sender:
+            sender.sendto(b"not json", first.path)
+        with caplog.at_level(logging.WARNING, logger="app.core.cache_bus"):
+            for _ in range(100):
+                await asyncio.sleep(0.01)
+                if received and caplog.records:
+                    break
+    finally:
+        await first.stop()
+        await second.stop()
+
+    assert received == [("ORG#1", "META")]
+    assert "Ignoring malformed cache invalidation" in caplog.records[0].getMessage()
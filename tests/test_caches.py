@@ -0,0 +1,175 @@
+import asyncio
+
+import pytest
+
+from app.core.entity_cache import EntityCache
+from app.core.request_cache import request_scope
+from app.core.services import BaseService
+from app.core.services.dynamodb import CachedTable
+from app.core.services.memory import MemoryTable
+
+pytestmark = pytest.mark.anyio
+
+ORGANIZATION = {"PK": "ORG#o1", "SK": "META", "Name": "Acme"}
+
+
+class CountingTable:
+    """
+    Passes every call to an in-memory table, counting the GetItems that reach it.
+    """
+
+    def __init__(self):
+        self.table = MemoryTable()
+        self.name = self.table.name
+        self.reads = 0
+
+    async def get_item(self, **kwargs):
+        self.reads += 1
+        return await self.table.get_item(**kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.table, name)
+
+
+@pytest.fixture
+async def table():
+    table = CountingTable()
+    await table.put_item(Item=ORGANIZATION)
+    return table
+
+
+@pytest.fixture
+def service(table):
+    return BaseService(table, pk_prefix="ORG", service_name="Organization")
+
+
+async def test_request_reads_an_item_once(table, service):
+    with request_scope() as cache:
+        first = await service.get_item("o1", "META")
+        second = await service.get_item("o1", "META")
+    assert first == second == ORGANIZATION
+    assert table.reads == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+async def test_concurrent_reads_share_one_call(table, service):
+    with request_scope():
+        items = await asyncio.gather(*(service.get_item("o1", "META") for _ in range(5)))
+    assert all(item == ORGANIZATION for item in items)
+    assert table.reads == 1
+
+
+async def test_reads_are_not_shared_between_requests(table, service):
+    for _ in range(2):
+        with request_scope():
+            await service.get_item("o1", "META")
+    await service.get_item("o1", "META")  # Outside of a request nothing is memoized
+    assert table.reads == 3
+
+
+async def test_request_reads_its_own_writes(table, service):
+    with request_scope():
+        await service.get_item("o1", "META")
+        await service.update_item("o1", "META", {"Name": "Acme Corp"})
+        assert (await service.get_item("o1", "META"))["Name"] == "Acme Corp"
+    assert table.reads == 2
+
+
+async def test_mutating_a_read_item_does_not_change_the_memoized_one(table, service):
+    with request_scope():
+        (await service.get_item("o1", "META"))["Name"] = "Changed"
+        assert (await service.get_item("o1", "META"))["Name"] == "Acme"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.core.entity_cache.time.monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def cached(table):
+    cache = EntityCache({"ORG": {"ttl": 30, "negative_ttl": 5, "max_size": 2}})
+    return CachedTable(table, cache)
+
+
+async def test_entity_cache_serves_repeated_reads(table, cached):
+    for _ in range(3):
+        assert (await cached.get_item(Key={"PK": "ORG#o1", "SK": "META"}))["Item"] == ORGANIZATION
+    assert table.reads == 1
+    assert cached.cache.stats["ORG"]["hits"] == 2
+
+
+async def test_entity_cache_serves_projections_from_the_cached_row(table, cached):
+    key = {"PK": "ORG#o1", "SK": "META"}
+    await cached.get_item(Key=key)
+    response = await cached.get_item(Key=key, ProjectionExpression="#name", ExpressionAttributeNames={"#name": "Name"})
+    assert response["Item"] == {"Name": "Acme"}
+    assert table.reads == 1
+
+
+async def test_entity_cache_does_not_cache_other_entities(table, cached):
+    await table.put_item(Item={"PK": "PROJECT#p1", "SK": "USER#u1"})
+    for _ in range(2):
+        await cached.get_item(Key={"PK": "PROJECT#p1", "SK": "USER#u1"})
+    assert table.reads == 2
+
+
+async def test_update_is_visible_on_the_next_read(table, cached):
+    key = {"PK": "ORG#o1", "SK": "META"}
+    await cached.get_item(Key=key)
+    await cached.update_item(Key=key, UpdateExpression="SET #name = :name", ExpressionAttributeNames={"#name": "Name"},
+                             ExpressionAttributeValues={":name": "Acme Corp"})
+    assert (await cached.get_item(Key=key))["Item"]["Name"] == "Acme Corp"
+    assert table.reads == 2
+
+
+async def test_entry_expires_after_its_ttl(table, cached, clock):
+    key = {"PK": "ORG#o1", "SK": "META"}
+    await cached.get_item(Key=key)
+    # Written by another process, so this one is not told about it
+    await table.put_item(Item={**ORGANIZATION, "Name": "Acme Corp"})
+
+    clock[0] += 29
+    assert (await cached.get_item(Key=key))["Item"]["Name"] == "Acme"
+    clock[0] += 2
+    assert (await cached.get_item(Key=key))["Item"]["Name"] == "Acme Corp"
+    assert table.reads == 2
+
+
+async def test_least_recently_used_entry_is_evicted(table, cached):
+    for uuid in ("o2", "o3"):
+        await table.put_item(Item={"PK": f"ORG#{uuid}", "SK": "META"})
+    keys = [{"PK": f"ORG#{uuid}", "SK": "META"} for uuid in ("o1", "o2", "o3")]
+
+    await cached.get_item(Key=keys[0])
+    await cached.get_item(Key=keys[1])
+    await cached.get_item(Key=keys[0])  # o2 is now the least recently used
+    await cached.get_item(Key=keys[2])
+    assert cached.cache.stats["ORG"]["evictions"] == 1
+    assert table.reads == 3
+
+    await cached.get_item(Key=keys[0])
+    assert table.reads == 3
+    await cached.get_item(Key=keys[1])
+    assert table.reads == 4
+
+
+async def test_missing_item_is_cached_for_the_negative_ttl(table, cached, clock):
+    key = {"PK": "ORG#missing", "SK": "META"}
+    assert await cached.get_item(Key=key) == {}
+    assert await cached.get_item(Key=key) == {}
+    assert table.reads == 1
+    assert cached.cache.stats["ORG"]["negative_hits"] == 1
+
+    clock[0] += 6
+    assert await cached.get_item(Key=key) == {}
+    assert table.reads == 2
+
+
+async def test_creating_a_missing_item_replaces_its_negative_entry(table, cached):
+    key = {"PK": "ORG#o2", "SK": "META"}
+    assert await cached.get_item(Key=key) == {}
+    await cached.put_item(Item={**key, "Name": "Initech"})
+    assert (await cached.get_item(Key=key))["Item"]["Name"] == "Initech"
@@ -0,0 +1,31 @@
+import pytest
+
+from app.main import create_app
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def app():
+    application = create_app()
+    application.container.config.service_scope.from_value("request")
+    await application.router.startup()
+    yield application
+    await application.router.shutdown()
+
+
+async def test_request_scope_rebuilds_the_services(app, client, organization):
+    container = app.container
+    assert container.organization_service() is not container.organization_service()
+    assert container.dynamodb_table() is not container.dynamodb_table()
+    # The clients and the backend table are shared by every service graph
+    assert container.organization_service().table.table is container.project_service().table.table
+
+    response = await client.get(f"/organizations/{organization}/")
+    assert response.status == 200
+
+
+async def test_singleton_scope_shares_the_services():
+    container = create_app().container
+    assert container.organization_service() is container.organization_service()
+    assert container.organization_service().project_service is container.project_service()
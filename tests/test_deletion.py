@@ -0,0 +1,49 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def tree(client, organization) -> dict:
+    base = f"/organizations/{organization}"
+    user = (await client.post(f"{base}/users/", {"name": "Ada", "email": "ada@example.com",
+                                                 "role": "admin"})).json()["uuid"]
+    project = (await client.post(f"{base}/projects/",
+                                 {"title": "Apollo", "description": "Moon", "status": "active"})).json()["uuid"]
+    tasks = [{"title": "Launch", "description": "-", "priority": "high", "deadline": "2030-01-01T00:00:00"}]
+    task = (await client.post(f"{base}/projects/{project}/tasks/bulk/", tasks)).json()["results"][0]["uuid"]
+    await client.post(f"{base}/projects/{project}/users/", {"uuid": user})
+    await client.post(f"{base}/projects/{project}/tasks/{task}/users/", {"uuid": user})
+    return {"user": user, "project": project, "task": task}
+
+
+async def test_deleted_organization_is_gone_before_it_is_purged(app, client, organization, tree):
+    runner = app.container.job_runner()
+    await runner.stop()  # Keep the rows in place behind the tombstone
+    response = await client.delete(f"/organizations/{organization}/")
+    assert response.status == 202
+    assert response.json()["status"] == "PENDING"
+
+    base = f"/organizations/{organization}"
+    project = f"{base}/projects/{tree['project']}"
+    for path in (f"{base}/", f"{base}/users/", f"{base}/users/{tree['user']}/", f"{base}/projects/", f"{project}/",
+                 f"{project}/tasks/", f"{project}/tasks/{tree['task']}/", f"{project}/users",
+                 f"{base}/users/{tree['user']}/tasks/", f"{base}/export/"):
+        assert (await client.get(path)).status == 404, path
+    assert (await client.get("/organizations/")).json() == []
+    response = await client.post(f"{base}/users/", {"name": "Bob", "email": "bob@example.com", "role": "member"})
+    assert response.status == 404
+    assert (await client.delete(f"{base}/")).status == 404
+
+
+async def test_deletion_job_purges_every_row(app, client, organization, tree):
+    runner = app.container.job_runner()
+    await runner.stop()
+    job_uuid = (await client.delete(f"/organizations/{organization}/")).json()["uuid"]
+    table = app.container.dynamodb_backend_table()
+    assert len(table) > 1
+
+    await runner.run(job_uuid)
+    job = (await client.get(f"/jobs/{job_uuid}/")).json()
+    assert job["status"] == "COMPLETED"
+    assert len(table) == 1  # Only the job record is left
@@ -0,0 +1,69 @@
+import gzip
+import json
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+def ndjson(rows: list[dict]) -> bytes:
+    return b"".join(json.dumps(row).encode() + b"\n" for row in rows)
+
+
+async def test_export_import_round_trip(client, organization):
+    await client.post(f"/organizations/{organization}/users/", {"name": "Ada", "email": "ada@example.com",
+                                                                "role": "admin"})
+    project = (await client.post(f"/organizations/{organization}/projects/",
+                                 {"title": "Apollo", "description": "Moon", "status": "active"})).json()["uuid"]
+
+    export = await client.get(f"/organizations/{organization}/export/?gzip=true")
+    assert export.status == 200
+    rows = [json.loads(line) for line in gzip.decompress(export.body).splitlines()]
+    assert rows[0]["SK"] == "META"
+
+    response = await client.post("/organizations/import/", content=gzip.compress(ndjson(rows)),
+                                 headers={"content-type": "application/x-ndjson", "content-encoding": "gzip"})
+    assert response.status == 201
+    summary = response.json()
+    assert (summary["imported"], summary["failed"]) == (len(rows), 0)
+
+    imported = summary["organization_uuid"]
+    users = (await client.get(f"/organizations/{imported}/users/")).json()
+    assert [user["name"] for user in users] == ["Ada"]
+    projects = (await client.get(f"/organizations/{imported}/projects/")).json()
+    assert [p["title"] for p in projects] == ["Apollo"] and projects[0]["uuid"] != project
+
+
+async def test_import_ignores_reserved_attributes(client, organization):
+    rows = [
+        {"PK": f"ORG#{organization}", "SK": "META", "Name": "Acme", "Description": "Imported"},
+        # An edited export trying to index a user as an organization
+        {"PK": f"ORG#{organization}", "SK": "USER#1b9f4f55-3f0e-4b0b-a0b7-6f1c1c8c1f00", "Name": "Mallory",
+         "Email": "mallory@example.com", "Role": "member", "EntityType": "ORG", "LeaseOwner": "x", "RefCount": 3},
+    ]
+    response = await client.post("/organizations/import/", content=ndjson(rows),
+                                  headers={"content-type": "application/x-ndjson"})
+    assert response.status == 201
+    assert (response.json()["imported"], response.json()["failed"]) == (2, 0)
+
+    response = await client.get("/organizations/")
+    assert response.status == 200
+    assert sorted(o["description"] for o in response.json()) == ["Imported", "Test organization"]
+
+    imported = (await client.post("/organizations/import/", content=ndjson(rows[:1]))).json()
+    users = (await client.get(f"/organizations/{imported['organization_uuid']}/users/")).json()
+    assert users == []
+
+
+async def test_import_rejects_unexpected_rows(client, organization):
+    rows = [
+        {"PK": f"ORG#{organization}", "SK": "META", "Name": "Acme", "Description": "Imported"},
+        {"PK": "JOB#1", "SK": "META", "Status": "running"},
+        {"PK": f"ORG#{organization}", "SK": "USER#2", "Name": "Bob", "Email": "bob@example.com", "Role": 1},
+    ]
+    response = await client.post("/organizations/import/", content=ndjson(rows))
+    assert response.status == 201
+    summary = response.json()
+    assert (summary["imported"], summary["failed"]) == (1, 2)
+    assert summary["errors"][0].startswith("Line 2: unexpected row")
+    assert summary["errors"][1].startswith("Line 3: Role")
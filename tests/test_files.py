@@ -0,0 +1,104 @@
+import pytest
+from fastapi import HTTPException
+
+from app.core.signing import sign_token, verify_token
+from test_uploads import TASK, create_task, multipart
+
+pytestmark = pytest.mark.anyio
+
+SECRET = "test-secret"
+
+
+def test_token_round_trip():
+    payload = verify_token(SECRET, sign_token(SECRET, {"key": "a.txt", "method": "GET"}, 60))
+    assert payload["key"] == "a.txt" and payload["method"] == "GET"
+
+
+def test_tampered_token_is_refused():
+    body, _, signature = sign_token(SECRET, {"key": "a.txt", "method": "GET"}, 60).partition(".")
+    other, _, _ = sign_token(SECRET, {"key": "b.txt", "method": "GET"}, 60).partition(".")
+    for token in (f"{other}.{signature}", f"{body}.{signature[:-1]}x", f"{body}.", "garbage"):
+        with pytest.raises(HTTPException, match="Invalid file token"):
+            verify_token(SECRET, token)
+    with pytest.raises(HTTPException, match="Invalid file token"):
+        verify_token("other-secret", f"{body}.{signature}")
+
+
+def test_expired_token_is_refused():
+    token = sign_token(SECRET, {"key": "a.txt", "method": "GET"}, -1)
+    with pytest.raises(HTTPException, match="expired"):
+        verify_token(SECRET, token)
+
+
+@pytest.fixture
+async def task(client, organization) -> tuple[str, str, str]:
+    response = await client.post(f"/organizations/{organization}/projects/",
+                                 {"title": "Apollo", "description": "Moon", "status": "active"})
+    project = response.json()["uuid"]
+    response = await create_task(client, organization, project, multipart(TASK, b"first"))
+    return organization, project, response.json()["uuid"]
+
+
+def task_path(task) -> str:
+    organization, project, task_uuid = task
+    return f"/organizations/{organization}/projects/{project}/tasks/{task_uuid}/"
+
+
+async def upload_url(client, task, filename: str, size: int) -> dict:
+    response = await client.post(f"{task_path(task)}file/upload-url/", {"filename": filename, "size": size})
+    assert response.status == 200
+    return response.json()
+
+
+async def test_direct_upload_and_download(client, task):
+    upload = await upload_url(client, task, "report.txt", 5)
+    assert (await client.put(upload["url"], content=b"hello")).status == 204
+    response = await client.post(f"{task_path(task)}file/", {"filename": "report.txt"})
+    assert response.status == 200
+
+    download = (await client.get(f"{task_path(task)}file/download-url/")).json()
+    response = await client.get(download["url"])
+    assert response.status == 200
+    assert response.body == b"hello"
+
+
+async def test_tampered_upload_url_is_refused(client, task):
+    upload = await upload_url(client, task, "report.txt", 5)
+    assert (await client.put(upload["url"][:-2] + "xx", content=b"hello")).status == 403
+
+
+async def test_expired_upload_url_is_refused(app, client, task):
+    app.container.file_storage().url_expiry = -1
+    upload = await upload_url(client, task, "report.txt", 5)
+    response = await client.put(upload["url"], content=b"hello")
+    assert response.status == 403
+    assert b"expired" in response.body
+
+
+async def test_download_token_cannot_upload(client, task):
+    download = (await client.get(f"{task_path(task)}file/download-url/")).json()
+    assert (await client.put(download["url"], content=b"hello")).status == 403
+
+    upload = await upload_url(client, task, "report.txt", 5)
+    assert (await client.get(upload["url"])).status == 403
+
+
+async def test_body_larger_than_signed_size_is_refused(client, task):
+    upload = await upload_url(client, task, "report.txt", 5)
+    assert (await client.put(upload["url"], content=b"hello world")).status == 413
+    # Nothing was stored, so the file cannot be finalized
+    assert (await client.post(f"{task_path(task)}file/", {"filename": "report.txt"})).status == 400
+
+
+async def test_finalize_replaces_the_previous_attachment(app, client, task):
+    storage = app.container.file_storage()
+    previous_url = (await client.get(task_path(task))).json()["file_url"]
+    assert await storage.get_file_size(storage.file_key(previous_url)) == 5
+
+    upload = await upload_url(client, task, "report.txt", 6)
+    await client.put(upload["url"], content=b"second")
+    response = await client.post(f"{task_path(task)}file/", {"filename": "report.txt"})
+
+    assert response.json()["file_url"] != previous_url
+    assert (await client.get(task_path(task))).json()["file_url"] == response.json()["file_url"]
+    assert await storage.get_file_size(storage.file_key(previous_url)) is None
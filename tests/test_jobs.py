@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+
+from app.utils.constant import JOB_DELETE_ORGANIZATION, JOB_MAX_ATTEMPTS
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def job_service(app):
+    return app.container.job_service()
+
+
+async def create_job(job_service) -> str:
+    job_uuid = job_service.generate_uuid()
+    await job_service.create_job(job_uuid, JOB_DELETE_ORGANIZATION, "-")
+    return job_uuid
+
+
+async def test_claim_is_exclusive_until_the_lease_expires(job_service):
+    job_uuid = await create_job(job_service)
+    assert await job_service.claim_job(job_uuid, "a", lease_seconds=60)
+    assert await job_service.claim_job(job_uuid, "b", lease_seconds=60) is None
+
+    # Not even by the worker holding the lease, e.g. when the job was queued twice
+    assert await job_service.claim_job(job_uuid, "a", lease_seconds=60) is None
+    assert (await job_service.get_job(job_uuid))["Attempts"] == 1
+
+    await job_service.checkpoint_job(job_uuid, "a", lease_seconds=-10, progress={}, checkpoint="x")
+    job = await job_service.claim_job(job_uuid, "b", lease_seconds=60)
+    assert job["LeaseOwner"] == "b" and job["Checkpoint"] == "x" and job["Attempts"] == 2
+
+
+async def test_worker_that_lost_its_lease_cannot_finish_the_job(job_service):
+    job_uuid = await create_job(job_service)
+    await job_service.claim_job(job_uuid, "a", lease_seconds=-10)
+    await job_service.claim_job(job_uuid, "b", lease_seconds=60)
+
+    for finish in (job_service.complete_job(job_uuid, "a", {"done": 1}), job_service.fail_job(job_uuid, "a", "x"),
+                   job_service.checkpoint_job(job_uuid, "a", 60, {}, "y")):
+        with pytest.raises(Exception, match="was lost"):
+            await finish
+    job = await job_service.get_job(job_uuid)
+    assert (job["Status"], job["LeaseOwner"]) == ("RUNNING", "b")
+    assert job["EntityType"] == "JOB"
+
+    job = await job_service.complete_job(job_uuid, "b", {"done": 1})
+    assert job["Status"] == "COMPLETED" and "EntityType" not in job and "LeaseOwner" not in job
+
+
+async def test_failed_attempts_are_retried_then_given_up(job_service):
+    job_uuid = await create_job(job_service)
+    for attempt in range(1, JOB_MAX_ATTEMPTS + 1):
+        assert await job_service.claim_job(job_uuid, "a", lease_seconds=60)
+        job = await job_service.fail_job(job_uuid, "a", f"attempt {attempt}")
+    assert job["Status"] == "FAILED" and job["Error"] == f"attempt {JOB_MAX_ATTEMPTS}"
+    assert await job_service.claim_job(job_uuid, "a", lease_seconds=60) is None
+    assert await job_service.get_unfinished_jobs() == []
+
+
+async def test_organization_deletion_job_runs_to_completion(client, organization):
+    await client.post(f"/organizations/{organization}/users/", {"name": "Ada", "email": "ada@example.com",
+                                                                "role": "admin"})
+    response = await client.delete(f"/organizations/{organization}/")
+    assert response.status in (200, 202)
+    job_uuid = response.json()["uuid"]
+
+    for _ in range(100):
+        job = (await client.get(f"/jobs/{job_uuid}/")).json()
+        if job["status"] == "COMPLETED":
+            break
+        await asyncio.sleep(0.01)
+    assert job["status"] == "COMPLETED"
+    assert (await client.get(f"/organizations/{organization}/")).status == 404
+
+
+async def test_runner_does_not_queue_a_job_twice(app, job_service):
+    runner = app.container.job_runner()
+    await runner.stop()
+    job_uuid = await create_job(job_service)
+    runner.submit(job_uuid)
+    runner.submit(job_uuid)  # e.g. re-queued by the poller before a worker picked it up
+    assert runner.queue.qsize() == 1
+
+    started = asyncio.Event()
+    release = asyncio.Event()
+    calls = []
+
+    async def handler(job, checkpoint):
+        calls.append(job)
+        started.set()
+        await release.wait()
+        return {}
+
+    runner.handlers = {JOB_DELETE_ORGANIZATION: handler}
+    await runner.start()
+    runner.submit(job_uuid)
+    try:
+        await asyncio.wait_for(started.wait(), 1)
+        runner.submit(job_uuid)  # Still running
+        assert runner.queue.qsize() == 0
+        release.set()
+        await asyncio.wait_for(runner.queue.join(), 1)
+    finally:
+        await runner.stop()
+    assert len(calls) == 1
+    assert (await job_service.get_job(job_uuid))["Status"] == "COMPLETED"
+    assert runner.in_flight == set()
+
+
+async def test_runner_logs_unexpected_errors(app, caplog):
+    runner = app.container.job_runner()
+
+    async def run(job_uuid):
+        raise RuntimeError("Table unavailable")
+
+    runner.run = run
+    runner.submit("job-1")
+    await asyncio.wait_for(runner.queue.join(), 1)
+    record, = [record for record in caplog.records if record.name == "app.core.jobs"]
+    assert record.getMessage() == "Error running job job-1"
+    assert record.exc_info[1].args == ("Table unavailable",)
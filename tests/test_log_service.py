@@ -0,0 +1,38 @@
+import pytest
+from botocore.exceptions import ClientError
+
+from app.core.services.cloudwatch import CloudWatchService
+
+
+class FailingLogsClient:
+    def __init__(self, code: str):
+        self.code = code
+        self.calls = 0
+
+    def put_log_events(self, **kwargs):
+        self.calls += 1
+        raise ClientError({"Error": {"Code": self.code, "Message": f"{self.code} message"}}, "PutLogEvents")
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr("app.core.services.cloudwatch.BATCH_RETRY_BASE_DELAY", 0)
+    return CloudWatchService()
+
+
+def test_rejected_batch_is_logged(service, caplog):
+    service.client = FailingLogsClient("InvalidParameterException")
+    service._put_log_events([{"timestamp": 0, "message": "hello"}])
+    assert service.client.calls == 1
+    record, = caplog.records
+    assert record.getMessage() == "Error logging to CloudWatch: InvalidParameterException message"
+    assert record.exc_info is not None
+
+
+def test_batch_dropped_after_throttling_is_logged(service, caplog):
+    service.client = FailingLogsClient("ThrottlingException")
+    service._put_log_events([{"timestamp": 0, "message": "hello"}, {"timestamp": 0, "message": "world"}])
+    assert service.client.calls > 1
+    assert [record.getMessage() for record in caplog.records] == [
+        "Dropped 2 log messages, CloudWatch kept throttling",
+    ]
@@ -0,0 +1,29 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_removing_a_project_member_unassigns_their_tasks(client, organization):
+    user = (await client.post(f"/organizations/{organization}/users/", {"name": "Ada", "email": "ada@example.com",
+                                                                        "role": "admin"})).json()["uuid"]
+    project = (await client.post(f"/organizations/{organization}/projects/",
+                                 {"title": "Apollo", "description": "Moon", "status": "active"})).json()["uuid"]
+    base = f"/organizations/{organization}/projects/{project}"
+    tasks = [{"title": f"Task {i}", "description": "-", "priority": "low", "deadline": "2030-01-01T00:00:00"}
+             for i in range(30)]
+    results = (await client.post(f"{base}/tasks/bulk/", tasks)).json()["results"]
+    task_uuids = [result["uuid"] for result in results]
+
+    assert (await client.post(f"{base}/users/", {"uuid": user})).status == 200
+    for task in task_uuids:
+        assert (await client.post(f"{base}/tasks/{task}/users/", {"uuid": user})).status == 201
+    assert len((await client.get(f"{base}/users/{user}/tasks/")).json()) == 30
+
+    response = await client.delete(f"{base}/users/{user}")
+    assert response.status == 204
+    assert int(response.headers["x-dynamodb-calls"]) < len(task_uuids)
+
+    assert (await client.get(f"{base}/users")).json() == []
+    assert (await client.get(f"/organizations/{organization}/users/{user}/tasks/")).json() == []
+    for task in task_uuids[:3]:
+        assert (await client.get(f"{base}/tasks/{task}/users/")).json() == []
@@ -0,0 +1,153 @@
+import pytest
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import ClientError
+
+from app.core.services.memory import MAX_PAGE_SIZE, MemoryTable
+
+pytestmark = pytest.mark.anyio
+
+INDEX = {
+    "IndexName": "GSI1",
+    "KeySchema": [{"AttributeName": "GSI1PK", "KeyType": "HASH"}, {"AttributeName": "GSI1SK", "KeyType": "RANGE"}],
+    "Projection": {"ProjectionType": "ALL"},
+}
+
+
+@pytest.fixture
+async def table():
+    table = MemoryTable(indexes=[INDEX])
+    for sk in ("META", "TASK#a", "TASK#b", "TASK#c", "USER#a"):
+        await table.put_item(Item={"PK": "PROJECT#p", "SK": sk})
+    return table
+
+
+def sort_keys(response) -> list:
+    return [item["SK"] for item in response["Items"]]
+
+
+async def test_begins_with(table):
+    response = await table.query(KeyConditionExpression=Key("PK").eq("PROJECT#p") & Key("SK").begins_with("TASK#"))
+    assert sort_keys(response) == ["TASK#a", "TASK#b", "TASK#c"]
+
+    response = await table.query(KeyConditionExpression="PK = :pk AND begins_with(SK, :prefix)",
+                                 ExpressionAttributeValues={":pk": "PROJECT#p", ":prefix": "TASK#"},
+                                 ScanIndexForward=False)
+    assert sort_keys(response) == ["TASK#c", "TASK#b", "TASK#a"]
+
+
+async def test_between_is_inclusive(table):
+    condition = Key("PK").eq("PROJECT#p") & Key("SK").between("TASK#b", "USER#a")
+    response = await table.query(KeyConditionExpression=condition)
+    assert sort_keys(response) == ["TASK#b", "TASK#c", "USER#a"]
+
+
+async def test_limit_pages_with_last_evaluated_key(table):
+    condition = Key("PK").eq("PROJECT#p") & Key("SK").begins_with("TASK#")
+    first = await table.query(KeyConditionExpression=condition, Limit=2)
+    assert sort_keys(first) == ["TASK#a", "TASK#b"]
+    assert first["LastEvaluatedKey"] == {"PK": "PROJECT#p", "SK": "TASK#b"}
+
+    second = await table.query(KeyConditionExpression=condition, Limit=2, ExclusiveStartKey=first["LastEvaluatedKey"])
+    assert sort_keys(second) == ["TASK#c"]
+    assert "LastEvaluatedKey" not in second
+
+
+async def test_page_stops_after_one_megabyte():
+    table = MemoryTable()
+    payload = "x" * (100 * 1024)
+    for number in range(15):
+        await table.put_item(Item={"PK": "ORG#o", "SK": f"ROW#{number:02}", "Payload": payload})
+
+    pages, keys = 0, []
+    kwargs = {"KeyConditionExpression": Key("PK").eq("ORG#o")}
+    while True:
+        response = await table.query(**kwargs)
+        pages += 1
+        keys += sort_keys(response)
+        assert sum(len(item["Payload"]) for item in response["Items"]) <= MAX_PAGE_SIZE + len(payload)
+        if "LastEvaluatedKey" not in response:
+            break
+        assert response["LastEvaluatedKey"] == {"PK": "ORG#o", "SK": keys[-1]}
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+    assert pages == 2
+    assert keys == [f"ROW#{number:02}" for number in range(15)]
+
+
+async def test_page_size_counts_items_removed_by_the_filter():
+    table = MemoryTable()
+    for number in range(15):
+        await table.put_item(Item={"PK": "ORG#o", "SK": f"ROW#{number:02}", "Payload": "x" * (100 * 1024)})
+    response = await table.query(KeyConditionExpression=Key("PK").eq("ORG#o"),
+                                 FilterExpression=Attr("Missing").exists())
+    assert response["Count"] == 0
+    assert response["ScannedCount"] < 15
+    assert "LastEvaluatedKey" in response
+
+
+async def test_cancelled_transaction_applies_nothing(table):
+    with pytest.raises(ClientError) as error:
+        await table.transact_write_items(TransactItems=[
+            {"Put": {"TableName": table.name, "Item": {"PK": "PROJECT#q", "SK": "META"}}},
+            {"Delete": {"TableName": table.name, "Key": {"PK": "PROJECT#p", "SK": "TASK#a"}}},
+            {"ConditionCheck": {"TableName": table.name, "Key": {"PK": "PROJECT#p", "SK": "MISSING"},
+                                "ConditionExpression": Attr("PK").exists()}},
+        ])
+    assert error.value.response["Error"]["Code"] == "TransactionCanceledException"
+    assert [reason["Code"] for reason in error.value.response["CancellationReasons"]] == [
+        "None", "None", "ConditionalCheckFailed",
+    ]
+    assert "Item" not in await table.get_item(Key={"PK": "PROJECT#q", "SK": "META"})
+    assert "Item" in await table.get_item(Key={"PK": "PROJECT#p", "SK": "TASK#a"})
+
+
+async def test_transaction_refuses_two_operations_on_one_item(table):
+    with pytest.raises(ClientError) as error:
+        await table.transact_write_items(TransactItems=[
+            {"Put": {"TableName": table.name, "Item": {"PK": "PROJECT#p", "SK": "TASK#a", "Title": "A"}}},
+            {"Delete": {"TableName": table.name, "Key": {"PK": "PROJECT#p", "SK": "TASK#a"}}},
+        ])
+    assert error.value.response["Error"]["Code"] == "ValidationException"
+
+
+async def index_keys(table, hash_value: str) -> list:
+    response = await table.query(IndexName="GSI1", KeyConditionExpression=Key("GSI1PK").eq(hash_value))
+    return [(item["PK"], item["SK"]) for item in response["Items"]]
+
+
+async def test_index_skips_items_missing_a_key_attribute(table):
+    await table.put_item(Item={"PK": "ORG#o", "SK": "A", "GSI1PK": "TYPE", "GSI1SK": "1"})
+    await table.put_item(Item={"PK": "ORG#o", "SK": "B", "GSI1PK": "TYPE"})
+    await table.put_item(Item={"PK": "ORG#o", "SK": "C", "GSI1SK": "2"})
+    await table.put_item(Item={"PK": "ORG#o", "SK": "D", "GSI1PK": "TYPE", "GSI1SK": 3})  # Not a string key
+    assert await index_keys(table, "TYPE") == [("ORG#o", "A")]
+
+
+async def test_index_follows_updates_and_deletes(table):
+    key = {"PK": "ORG#o", "SK": "A"}
+    await table.put_item(Item={**key, "GSI1PK": "TYPE", "GSI1SK": "1"})
+
+    await table.update_item(Key=key, UpdateExpression="REMOVE GSI1SK")
+    assert await index_keys(table, "TYPE") == []
+
+    await table.update_item(Key=key, UpdateExpression="SET GSI1SK = :sk", ExpressionAttributeValues={":sk": "2"})
+    assert await index_keys(table, "TYPE") == [("ORG#o", "A")]
+
+    await table.delete_item(Key=key)
+    assert await index_keys(table, "TYPE") == []
+
+
+async def test_index_query_orders_by_range_key_and_pages(table):
+    for sk, range_value in (("A", "3"), ("B", "1"), ("C", "2")):
+        await table.put_item(Item={"PK": "ORG#o", "SK": sk, "GSI1PK": "TYPE", "GSI1SK": range_value})
+
+    first = await table.query(IndexName="GSI1", KeyConditionExpression=Key("GSI1PK").eq("TYPE"), Limit=2)
+    assert [item["SK"] for item in first["Items"]] == ["B", "C"]
+    assert first["LastEvaluatedKey"] == {"PK": "ORG#o", "SK": "C", "GSI1PK": "TYPE", "GSI1SK": "2"}
+
+    second = await table.query(IndexName="GSI1", KeyConditionExpression=Key("GSI1PK").eq("TYPE"),
+                               ExclusiveStartKey=first["LastEvaluatedKey"])
+    assert [item["SK"] for item in second["Items"]] == ["A"]
+
+    response = await table.query(IndexName="GSI1",
+                                 KeyConditionExpression=Key("GSI1PK").eq("TYPE") & Key("GSI1SK").between("2", "3"))
+    assert [item["SK"] for item in response["Items"]] == ["C", "A"]
@@ -0,0 +1,51 @@
+import pytest
+from boto3.dynamodb.conditions import Key
+
+from app.core.metrics import EVICTED_ORGANIZATIONS, CapacityLedger, metrics_scope
+from app.core.services.dynamodb import InstrumentedTable
+
+MISSING = "00000000-0000-0000-0000-000000000404"
+
+
+def test_capacity_ledger_evicts_least_recently_used_pairs():
+    ledger = CapacityLedger(max_entries=3)
+    ledger.add("a", "/route/", 1, 1.0, 0.0)
+    ledger.add("b", "/route/", 1, 2.0, 0.0)
+    ledger.add("a", "/route/", 1, 1.0, 0.0)
+    ledger.add("c", "/route/", 1, 0.0, 4.0)
+    ledger.add("d", "/route/", 1, 0.5, 0.0)
+
+    assert len(ledger.totals) == 3
+    rows = {row["organization"]: row for row in ledger.summary()}
+    assert set(rows) == {"c", "d", EVICTED_ORGANIZATIONS}
+    assert rows[EVICTED_ORGANIZATIONS]["calls"] == 3 and rows[EVICTED_ORGANIZATIONS]["read_units"] == 4.0
+    assert sum(row["capacity_units"] for row in rows.values()) == 8.5
+
+
+@pytest.mark.anyio
+async def test_not_found_requests_are_not_attributed_to_their_organization(client, organization):
+    assert (await client.get(f"/organizations/{MISSING}/users/")).status == 404
+    assert (await client.get(f"/organizations/{organization}/users/")).status == 200
+
+    report = (await client.get("/admin/capacity/")).json()["items"]
+    organizations = {row["organization"] for row in report}
+    assert organization in organizations and MISSING not in organizations
+    assert MISSING not in (await client.get("/metrics/")).body.decode()
+
+
+class RecordingTable:
+    name = "ManagerTable"
+
+    async def query(self, **kwargs):
+        return {"Items": [{"PK": "ORG#1", "SK": "META"}], "Count": 1,
+                "ConsumedCapacity": {"TableName": self.name, "CapacityUnits": 0.5},
+                "ResponseMetadata": {"HTTPHeaders": {"content-length": "1234"}}}
+
+
+@pytest.mark.anyio
+async def test_storage_bytes_come_from_the_response_length():
+    table = InstrumentedTable(RecordingTable())
+    with metrics_scope("org") as metrics:
+        await table.query(KeyConditionExpression=Key("PK").eq("ORG#1"))
+    entry = metrics.calls[("dynamodb", "query", "ORG")]
+    assert (entry["calls"], entry["items"], entry["bytes"], entry["read_units"]) == (1, 1, 1234, 0.5)
@@ -0,0 +1,84 @@
+import asyncio
+
+import boto3
+import pytest
+from boto3.dynamodb.conditions import Key
+from botocore.stub import Stubber
+
+from app.core.services.memory import MemoryTable
+from app.init_table import ENTITY_TYPE_INDEX, backfill_entity_types, migrate_dynamodb_table
+from app.utils.constant import ENTITY_TYPE_ATTRIBUTE, GSI_ENTITY_TYPE, TOMBSTONE_ATTRIBUTE
+
+
+class BlockingResource:
+    """
+    The subset of a boto3 DynamoDB resource the migrations use, over a MemoryTable.
+    """
+
+    def __init__(self, table: MemoryTable):
+        self.table = table
+
+    def Table(self, table_name: str):
+        return self
+
+    def __getattr__(self, name: str):
+        method = getattr(self.table, name)
+        return lambda **kwargs: asyncio.run(method(**kwargs))
+
+
+def indexed_organizations(resource) -> list[str]:
+    response = resource.query(IndexName=GSI_ENTITY_TYPE, KeyConditionExpression=Key(ENTITY_TYPE_ATTRIBUTE).eq("ORG"))
+    return sorted(item["PK"] for item in response["Items"])
+
+
+def test_backfill_skips_tombstoned_organizations():
+    resource = BlockingResource(MemoryTable())
+    resource.put_item(Item={"PK": "ORG#live", "SK": "META", "Name": "Live"})
+    resource.put_item(Item={"PK": "ORG#deleted", "SK": "META", "Name": "Deleted", TOMBSTONE_ATTRIBUTE: 1})
+    resource.put_item(Item={"PK": "ORG#tagged", "SK": "META", "Name": "Tagged", ENTITY_TYPE_ATTRIBUTE: "ORG"})
+    resource.put_item(Item={"PK": "PROJECT#p", "SK": "META"})
+
+    assert backfill_entity_types(resource) == 1
+    assert indexed_organizations(resource) == ["ORG#live", "ORG#tagged"]
+    assert backfill_entity_types(resource) == 0
+
+
+@pytest.mark.anyio
+async def test_organization_list_drops_tombstoned_records(app, client, organization):
+    table = app.container.dynamodb_backend_table()
+    await table.put_item(Item={"PK": "ORG#deleted", "SK": "META", "Name": "Deleted", "Description": "-",
+                               ENTITY_TYPE_ATTRIBUTE: "ORG", TOMBSTONE_ATTRIBUTE: 1})
+
+    response = await client.get("/organizations/")
+    assert [o["uuid"] for o in response.json()] == [organization]
+    response = await client.get("/organizations/?limit=1")
+    assert response.status == 200
+    pages = [o["uuid"] for o in response.json()]
+    cursor = response.headers.get("x-next-cursor")
+    while cursor:
+        response = await client.get(f"/organizations/?limit=1&cursor={cursor}")
+        pages += [o["uuid"] for o in response.json()]
+        cursor = response.headers.get("x-next-cursor")
+    assert pages == [organization]
+
+
+def test_migration_defines_every_key_attribute_of_the_new_index():
+    resource = boto3.resource("dynamodb", region_name="us-east-1", aws_access_key_id="DUMMY",
+                              aws_secret_access_key="DUMMY")
+    with Stubber(resource.meta.client) as stubber:
+        stubber.add_response("describe_table", {"Table": {"TableName": "ManagerTable"}}, {"TableName": "ManagerTable"})
+        stubber.add_response("update_table", {}, {
+            "TableName": "ManagerTable",
+            "AttributeDefinitions": [
+                {"AttributeName": "PK", "AttributeType": "S"},
+                {"AttributeName": ENTITY_TYPE_ATTRIBUTE, "AttributeType": "S"},
+            ],
+            "GlobalSecondaryIndexUpdates": [{"Create": ENTITY_TYPE_INDEX}],
+        })
+        for _ in range(3):  # Both backfills find nothing to do
+            stubber.add_response("scan", {"Items": []})
+        migrate_dynamodb_table(resource)
+        stubber.assert_no_pending_responses()
+
+    key_attributes = {key["AttributeName"] for key in ENTITY_TYPE_INDEX["KeySchema"]}
+    assert key_attributes == {"PK", ENTITY_TYPE_ATTRIBUTE}
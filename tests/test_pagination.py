@@ -0,0 +1,51 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def users(client, organization) -> list[str]:
+    rows = [{"name": f"User {i}", "email": f"user{i}@example.com", "role": "member"} for i in range(25)]
+    response = await client.post(f"/organizations/{organization}/users/bulk/", rows)
+    return sorted(result["uuid"] for result in response.json()["results"])
+
+
+async def pages(client, path: str, limit: int) -> list[list[str]]:
+    result, cursor = [], None
+    while True:
+        response = await client.get(f"{path}?limit={limit}" + (f"&cursor={cursor}" if cursor else ""))
+        assert response.status == 200
+        result.append([item["uuid"] for item in response.json()])
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            return result
+
+
+async def test_cursor_walks_every_item_once(client, organization, users):
+    path = f"/organizations/{organization}/users/"
+    result = await pages(client, path, limit=10)
+    assert [len(page) for page in result] == [10, 10, 5]
+    assert sorted(uuid for page in result for uuid in page) == users
+
+    response = await client.get(path)
+    assert "x-next-cursor" not in response.headers
+    assert sorted(user["uuid"] for user in response.json()) == users
+
+
+async def test_cursor_works_with_sparse_fieldsets(client, organization, users):
+    response = await client.get(f"/organizations/{organization}/users/?limit=5&fields=name")
+    assert set(response.json()[0]) == {"name"}
+    cursor = response.headers["x-next-cursor"]
+    response = await client.get(f"/organizations/{organization}/users/?limit=5&fields=uuid&cursor={cursor}")
+    assert len(response.json()) == 5 and set(response.json()[0]) == {"uuid"}
+
+
+async def test_invalid_cursors_are_rejected(client, organization, users):
+    path = f"/organizations/{organization}/users/"
+    assert (await client.get(f"{path}?cursor=not-a-cursor")).status == 400
+    assert (await client.get(f"{path}?limit=0")).status == 422
+
+    # A cursor of one organization cannot be replayed against another one
+    cursor = (await client.get(f"{path}?limit=5")).headers["x-next-cursor"]
+    other = (await client.post("/organizations/", {"name": "Other", "description": "-"})).json()["uuid"]
+    assert (await client.get(f"/organizations/{other}/users/?limit=5&cursor={cursor}")).status == 400
@@ -0,0 +1,96 @@
+import json
+import uuid
+from decimal import Decimal
+from itertools import combinations
+
+import pytest
+
+from app.modules.v1.organizations.schemas.organizations import ORGANIZATION_SERIALIZER
+from app.modules.v1.organizations.schemas.projects import PROJECT_SERIALIZER
+from app.modules.v1.organizations.schemas.tasks import TASK_SERIALIZER
+from app.modules.v1.organizations.schemas.users import USER_SERIALIZER
+from test_uploads import TASK, create_task, multipart
+
+pytestmark = pytest.mark.anyio
+
+CREATED_AT = Decimal(1_700_000_000)
+
+# DynamoDB items of every response type, with and without their optional attributes and with attributes
+# the responses leave out
+ITEMS = {
+    "organization": (ORGANIZATION_SERIALIZER, [
+        {"PK": f"ORG#{uuid.uuid4()}", "SK": "META", "Name": "Acme", "Description": "An organization",
+         "CreatedAt": CREATED_AT, "EntityType": "ORG"},
+        {"PK": f"ORG#{uuid.uuid4()}", "SK": "META", "Name": "Initech", "Description": ""},
+    ]),
+    "project": (PROJECT_SERIALIZER, [
+        {"PK": "ORG#o", "SK": f"PROJECT#{uuid.uuid4()}", "Title": "Apollo", "Description": "Moon",
+         "Status": "active", "CreatedAt": CREATED_AT},
+        {"PK": "ORG#o", "SK": f"PROJECT#{uuid.uuid4()}", "Title": "Gemini", "Description": "Orbit",
+         "Status": "done"},
+    ]),
+    "user": (USER_SERIALIZER, [
+        {"PK": "ORG#o", "SK": f"USER#{uuid.uuid4()}", "Name": "Ada", "Email": "ada@example.com", "Role": "admin",
+         "CreatedAt": CREATED_AT},
+        {"PK": "ORG#o", "SK": f"USER#{uuid.uuid4()}", "Name": "Bob", "Email": "bob@example.com", "Role": "member"},
+    ]),
+    "task": (TASK_SERIALIZER, [
+        {"PK": "PROJECT#p", "SK": f"TASK#{uuid.uuid4()}", "Title": "Launch", "Description": "Go",
+         "Priority": "high", "Deadline": CREATED_AT, "FileUrl": "/static/uploads/a.txt"},
+        {"PK": "PROJECT#p", "SK": f"TASK#{uuid.uuid4()}", "Title": "Land", "Description": "Come back"},
+    ]),
+}
+
+
+def model_json(serializer, items: list[dict], fields: tuple = None) -> list:
+    """
+    What FastAPI returns for the items through the route's response_model.
+    """
+    include = set(fields) if fields else None
+    return [serializer.model.model_validate(dict(item)).model_dump(mode="json", include=include) for item in items]
+
+
+@pytest.mark.parametrize("name", ITEMS)
+def test_lists_serialize_like_the_response_model(name):
+    serializer, items = ITEMS[name]
+    assert json.loads(serializer.dump_json(items)) == model_json(serializer, items)
+
+
+@pytest.mark.parametrize("name", ITEMS)
+def test_items_serialize_like_the_response_model(name):
+    serializer, items = ITEMS[name]
+    for item in items:
+        assert json.loads(serializer.item_response(item).body) == model_json(serializer, [item])[0]
+
+
+@pytest.mark.parametrize("name", ITEMS)
+def test_sparse_fieldsets_serialize_like_the_response_model(name):
+    serializer, items = ITEMS[name]
+    fields = list(serializer.model.model_fields)
+    for count in (1, 2, len(fields)):
+        for selection in combinations(fields, count):
+            sparse = serializer.select(selection)
+            # Only the keys and the projected attributes are read from DynamoDB (see BaseService.projection_kwargs)
+            attributes = {"PK", "SK", *sparse.projection}
+            projected = [{name: value for name, value in item.items() if name in attributes} for item in items]
+            assert json.loads(sparse.dump_json(projected)) == model_json(serializer, items, selection)
+
+
+def test_fields_read_their_item_attributes():
+    serializer, items = ITEMS["task"]
+    response = json.loads(serializer.dump_json(items[:1]))[0]
+    assert response["uuid"] == items[0]["SK"].split("#", 1)[1]
+    assert response["title"] == "Launch"
+    assert response["description"] == "Go"
+
+
+async def test_task_routes_return_the_task_title(client, organization):
+    response = await client.post(f"/organizations/{organization}/projects/",
+                                 {"title": "Apollo", "description": "Moon", "status": "active"})
+    path = f"/organizations/{organization}/projects/{response.json()['uuid']}/tasks/"
+    await create_task(client, organization, response.json()["uuid"], multipart(TASK, b"hello"))
+
+    listed = (await client.get(path)).json()
+    assert [task["title"] for task in listed] == [TASK["title"]]
+    task = (await client.get(f"{path}{listed[0]['uuid']}/")).json()
+    assert (task["title"], task["description"]) == (TASK["title"], TASK["description"])
@@ -0,0 +1,60 @@
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+pytestmark = pytest.mark.anyio
+
+MISSING = "00000000-0000-0000-0000-000000000000"
+
+
+async def test_update_organization(client, organization):
+    response = await client.put(f"/organizations/{organization}/", {"name": "Acme", "description": "Renamed"})
+    assert response.status == 200
+    assert (await client.get(f"/organizations/{organization}/")).json()["description"] == "Renamed"
+
+
+async def test_update_does_not_create_missing_items(client, organization):
+    response = await client.put(f"/organizations/{MISSING}/", {"name": "Ghost", "description": "-"})
+    assert response.status == 404
+    assert (await client.get(f"/organizations/{MISSING}/")).status == 404
+
+    user = {"name": "Ghost", "email": "ghost@example.com", "role": "member"}
+    assert (await client.put(f"/organizations/{organization}/users/{MISSING}/", user)).status == 404
+    project = {"title": "Ghost", "description": "-", "status": "active"}
+    assert (await client.put(f"/organizations/{organization}/projects/{MISSING}/", project)).status == 404
+    assert (await client.get(f"/organizations/{organization}/users/")).json() == []
+    assert (await client.get(f"/organizations/{organization}/projects/")).json() == []
+
+
+async def test_update_of_deleted_organization_is_not_found(client, organization):
+    user = (await client.post(f"/organizations/{organization}/users/", {"name": "Ada", "email": "ada@example.com",
+                                                                        "role": "admin"})).json()["uuid"]
+    project = (await client.post(f"/organizations/{organization}/projects/",
+                                 {"title": "Apollo", "description": "Moon", "status": "active"})).json()["uuid"]
+    assert (await client.delete(f"/organizations/{organization}/")).status == 202
+
+    response = await client.put(f"/organizations/{organization}/", {"name": "Acme", "description": "Back"})
+    assert response.status == 404
+    assert (await client.get(f"/organizations/{organization}/")).status == 404
+    assert (await client.get("/organizations/")).json() == []
+
+    response = await client.put(f"/organizations/{organization}/users/{user}/",
+                                {"name": "Ada", "email": "ada@example.com", "role": "owner"})
+    assert response.status == 404
+    response = await client.put(f"/organizations/{organization}/projects/{project}/",
+                                {"title": "Apollo", "description": "Moon", "status": "done"})
+    assert response.status == 404
+
+
+async def test_update_task_checks_its_project(app, client, organization):
+    project = (await client.post(f"/organizations/{organization}/projects/",
+                                 {"title": "Apollo", "description": "Moon", "status": "active"})).json()["uuid"]
+    service = app.container.project_service()
+    task = {"title": "Launch", "description": "-", "priority": "high", "deadline": datetime(2030, 1, 1)}
+
+    with pytest.raises(HTTPException, match=f"Task with UUID {MISSING}"):
+        await service.update_task_in_project(organization, project, MISSING, **task)
+    with pytest.raises(HTTPException, match=f"Project with UUID {MISSING}"):
+        await service.update_task_in_project(organization, MISSING, MISSING, **task)
+    assert await service.get_items(identifier=project, sk_prefix="TASK#") == []
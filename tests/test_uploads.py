@@ -0,0 +1,53 @@
+import pytest
+
+from app.utils.constant import UPLOAD_FORM_OVERHEAD
+
+pytestmark = pytest.mark.anyio
+
+BOUNDARY = "test-boundary"
+
+
+def multipart(fields: dict, file: bytes) -> bytes:
+    parts = [f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+             for name, value in fields.items()]
+    parts.append(f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="file"; filename="a.txt"\r\n'
+                 f'Content-Type: text/plain\r\n\r\n'.encode() + file + b"\r\n")
+    return b"".join(parts) + f"--{BOUNDARY}--\r\n".encode()
+
+
+@pytest.fixture
+async def project(client, organization) -> str:
+    response = await client.post(f"/organizations/{organization}/projects/",
+                                 {"title": "Apollo", "description": "Moon", "status": "active"})
+    return response.json()["uuid"]
+
+
+async def create_task(client, organization, project, body: bytes, headers: dict = None):
+    return await client.post(f"/organizations/{organization}/projects/{project}/tasks/", content=body, headers={
+        "content-type": f"multipart/form-data; boundary={BOUNDARY}", **(headers or {}),
+    })
+
+
+TASK = {"title": "Launch", "description": "Go", "priority": "high", "deadline": "2030-01-01T00:00:00"}
+
+
+async def test_task_with_attachment(app, client, organization, project):
+    response = await create_task(client, organization, project, multipart(TASK, b"hello"))
+    assert response.status == 201
+    assert response.json()["file_url"]
+
+
+async def test_oversized_upload_is_refused_from_its_content_length(app, client, organization, project):
+    app.container.file_storage().max_upload_size = 1024
+    declared = 1024 + UPLOAD_FORM_OVERHEAD + 1
+    # The declared length alone is enough: the (truncated) body is never parsed
+    response = await create_task(client, organization, project, multipart(TASK, b"x" * 10),
+                                 headers={"content-length": str(declared)})
+    assert response.status == 413
+    assert (await client.get(f"/organizations/{organization}/projects/{project}/tasks/")).json() == []
+
+
+async def test_oversized_file_within_the_form_overhead_is_refused_while_stored(app, client, organization, project):
+    app.container.file_storage().max_upload_size = 1024
+    response = await create_task(client, organization, project, multipart(TASK, b"x" * 2048))
+    assert response.status == 413